@@ -175,6 +175,37 @@ def test_dependency_graph(client):
     assert "entry_points" in data
     assert "core_components" in data
 
+
+def test_dependency_graph_cycles(client, tmp_path):
+    """Test that import cycles are listed as examples and as components."""
+    project = tmp_path / "cyclic"
+    project.mkdir()
+    (project / "a.py").write_text("import b\n")
+    (project / "b.py").write_text("import a\n")
+    (project / "c.py").write_text("import a\n")
+    response = client.get("/api/detailed-metrics/dependency-graph", params={"directory": str(project)})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["cycles"] == [["a", "b"]]
+    assert data["cyclic_components"] == [["a", "b"]]
+
+
+def test_impact_and_depends(client, tmp_path):
+    """Test the transitive impact and depends-on endpoints."""
+    project = tmp_path / "chain"
+    project.mkdir()
+    (project / "a.py").write_text("import b\n")
+    (project / "b.py").write_text("import c\n")
+    (project / "c.py").write_text("x = 1\n")
+    response = client.get("/api/detailed-metrics/impact", params={"module": "c", "directory": str(project)})
+    assert response.status_code == 200
+    assert response.json()["affected"] == ["a", "b"]
+    response = client.get("/api/detailed-metrics/depends", params={"source": "a", "target": "c", "directory": str(project)})
+    assert response.json()["depends"] is True
+    response = client.get("/api/detailed-metrics/impact", params={"module": "missing", "directory": str(project)})
+    assert response.status_code == 404
+
+
 def test_issues_by_category(client):
     """Test issues-by-category endpoint."""
     response = client.get("/api/detailed-metrics/issues-by-category")
@@ -182,4 +213,13 @@ def test_issues_by_category(client):
     data = response.json()
     assert "issues_by_category" in data
     assert "total_issues" in data
-    assert "files_with_most_issues" in data
\ No newline at end of file
+    assert "files_with_most_issues" in data
+
+
+def test_search(client):
+    """Test that symbol search returns ranked matches from the project."""
+    response = client.get("/api/search", params={"q": "Class1"})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["qualified_name"] == "file2.Class1" and results[0]["match"] == "exact"
+    assert client.get("/api/search").status_code == 422
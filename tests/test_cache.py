@@ -0,0 +1,59 @@
+import pytest
+from treeline.cache import AnalysisCache
+from treeline.dependency_analyzer import ModuleDependencyAnalyzer
+from treeline.enhanced_analyzer import EnhancedCodeAnalyzer
+from treeline.pipeline import AnalysisPipeline
+
+@pytest.fixture
+def sample_dir(tmp_path):
+    dir_path = tmp_path / "sample_project"
+    dir_path.mkdir()
+    (dir_path / "file1.py").write_text("""
+import file2
+def func1():
+    file2.func2()
+""")
+    (dir_path / "file2.py").write_text("""
+def func2():
+    eval("1")
+""")
+    return dir_path
+
+def run(sample_dir, cache):
+    dep_analyzer = ModuleDependencyAnalyzer()
+    code_analyzer = EnhancedCodeAnalyzer()
+    analyses = AnalysisPipeline(dep_analyzer, code_analyzer, cache=cache).run(sample_dir)
+    return dep_analyzer, code_analyzer, analyses
+
+def test_put_and_get(tmp_path):
+    """Test that entries round-trip and are keyed by content hash."""
+    cache = AnalysisCache(tmp_path)
+    cache.put(tmp_path / "a.py", "abc", {"lines": 3})
+    assert cache.get(tmp_path / "a.py", "abc")["lines"] == 3
+    assert cache.get(tmp_path / "a.py", "def") is None
+
+def test_config_change_invalidates(tmp_path):
+    """Test that entries written under one config are not reused under another."""
+    AnalysisCache(tmp_path, config={"MAX_PARAMS": 5}).put(tmp_path / "a.py", "abc", {"lines": 3})
+    assert AnalysisCache(tmp_path, config={"MAX_PARAMS": 6}).get(tmp_path / "a.py", "abc") is None
+
+def test_warm_run_replays_results(sample_dir):
+    """Test that a warm run reuses every file and yields the same results."""
+    cold_dep, cold_code, cold = run(sample_dir, AnalysisCache(sample_dir))
+    cache = AnalysisCache(sample_dir)
+    warm_dep, warm_code, warm = run(sample_dir, cache)
+    assert cache.hits == 2 and cache.misses == 0
+    assert warm_dep.module_imports == cold_dep.module_imports
+    assert warm_dep.function_locations == cold_dep.function_locations
+    assert dict(warm_dep.function_calls) == dict(cold_dep.function_calls)
+    assert dict(warm_code.quality_issues) == dict(cold_code.quality_issues)
+    assert [a.elements for a in warm] == [a.elements for a in cold]
+
+def test_changed_file_is_reanalyzed(sample_dir):
+    """Test that only the edited file misses the cache."""
+    run(sample_dir, AnalysisCache(sample_dir))
+    (sample_dir / "file2.py").write_text("def func2():\n    return 2\n")
+    cache = AnalysisCache(sample_dir)
+    _, code_analyzer, _ = run(sample_dir, cache)
+    assert cache.hits == 1 and cache.misses == 1
+    assert not any("eval" in issue["description"] for issue in code_analyzer.quality_issues["security"])
@@ -134,6 +134,51 @@ def test_get_entry_points(sample_dir):
     assert "file1" in entry_points
     assert "file2" not in entry_points
 
+def test_reverse_import_index(sample_dir):
+    """Test that importer sets and degrees follow merged and forgotten modules."""
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(sample_dir)
+    assert analyzer.importers_of("file2") == {"file1"}
+    assert analyzer.in_degree("file2") == 1 and analyzer.out_degree("file1") == 1
+    analyzer.forget_file(sample_dir / "file1.py")
+    assert analyzer.in_degree("file2") == 0
+    assert analyzer.get_entry_points() == ["file2"]
+
+def test_core_components_use_degrees():
+    """Test that core components need more than two incoming and outgoing imports."""
+    analyzer = ModuleDependencyAnalyzer()
+    for module, imports in {"core": ["a", "b", "c"], "a": ["core"], "b": ["core"], "c": ["core"]}.items():
+        analyzer.merge_result({"module_name": module, "imports": imports, "metrics": {},
+                               "function_locations": {}, "function_calls": [], "class_info": {}})
+    assert analyzer.get_core_components() == [{"name": "core", "incoming": 3, "outgoing": 3}]
+
+def test_quality_attached_by_path_suffix(sample_dir):
+    """Test that issues match modules by exact or trailing path and are deduped."""
+    (sample_dir / "consts.py").write_text("X = 1\n")
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(sample_dir)
+    issue = {"file_path": "sample_project/file2.py", "description": "Too long", "line": 3}
+    enhanced = Mock(quality_issues={
+        "style": [issue, dict(issue)],
+        "security": [{"file_path": str(sample_dir / "consts.py"), "description": "Secret", "line": 1}],
+    })
+    nodes, _ = analyzer.get_graph_data_with_quality(enhanced)
+    assert [smell["description"] for smell in find_node_by_name(nodes, "file2")["code_smells"]] == ["Too long"]
+    assert find_node_by_name(nodes, "consts")["code_smells"][0]["type"] == "security"
+    assert find_node_by_name(nodes, "file1")["code_smells"] == []
+
+def test_build_graph(sample_dir):
+    """Test that merged results freeze into typed import, call and contains edges."""
+    from treeline.optimization.graph import EdgeKind
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(sample_dir)
+    graph = analyzer.build_graph()
+    names = lambda node, kind: {graph.name_of(t) for t in graph.successors(graph.id_of(node), kind)}
+    assert names("file1", EdgeKind.IMPORTS) == {"file2"}
+    assert names("file1.func1", EdgeKind.CALLS) == {"file2.func2"}
+    assert names("file2", EdgeKind.CONTAINS) == {"file2.func2", "file2.Class1"}
+    assert names("file2.Class1", EdgeKind.CONTAINS) == {"file2.Class1.method1"}
+
 def test_clean_for_markdown():
     analyzer = ModuleDependencyAnalyzer()
     input_line = "⚡ func1 # Docstring here"
@@ -164,4 +209,70 @@ def test_analyze_directory_with_subdir(sample_dir_with_subdir):
     assert "file1" in analyzer.module_imports
     assert "sub.file3" in analyzer.module_imports
     assert "sub" in analyzer.module_imports["file1"]
-    assert "sub.file3.func3" in analyzer.function_locations
\ No newline at end of file
+    assert "sub.file3.func3" in analyzer.function_locations
+
+
+def test_impact(sample_dir):
+    """Test that impact lists transitive importers and dependencies."""
+    (sample_dir / "file3.py").write_text("import file1\n")
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(sample_dir)
+    result = analyzer.impact("file2")
+    assert result["affected"] == ["file1", "file3"] and result["depends_on"] == []
+    assert analyzer.impact("file3")["depends_on"] == ["file1", "file2"]
+    assert analyzer.impact("missing") is None
+
+def test_search_symbols_follows_reanalysis(sample_dir):
+    """Test that symbol search ranks by fan-in and catches up after re-analysis."""
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(sample_dir)
+    results = analyzer.search_symbols("func2")
+    assert results[0]["qualified_name"] == "file2.func2" and results[0]["fan_in"] == 1
+    assert analyzer.search_symbols("method1")[0]["kind"] == "method"
+
+    (sample_dir / "file2.py").write_text("def renamed():\n    pass\n")
+    (sample_dir / "file1.py").unlink()
+    analyzer.analyze_directory(sample_dir)
+    assert analyzer.search_symbols("func2") == []
+    assert analyzer.search_symbols("func1") == []
+    assert analyzer.search_symbols("renamed")[0]["qualified_name"] == "file2.renamed"
+
+
+def test_relative_import_of_root_module(tmp_path):
+    """Test that calling a name imported from the analyzed root keeps the module."""
+    (tmp_path / "__init__.py").write_text("")
+    (tmp_path / "a.py").write_text("from . import helper\ndef run():\n    return helper()\n")
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(tmp_path)
+    assert set(analyzer.module_imports) == {"__init__", "a"}
+    assert "a.run" in analyzer.function_locations
+
+
+def test_from_package_import_submodule(tmp_path):
+    """Test that `from pkg import mod` depends on pkg.mod, not only on the package."""
+    package = tmp_path / "pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "a.py").write_text("from pkg import b\nfrom pkg import missing\n")
+    (package / "b.py").write_text("from pkg import a\n")
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(tmp_path)
+    assert analyzer.module_imports["pkg.a"] == {"pkg", "pkg.b"}
+    result = analyzer.impact("pkg.b")
+    assert result["in_cycle"] and result["depends_on"] == ["pkg.__init__", "pkg.a"]
+
+
+def test_degrees_resolve_package_spelling(tmp_path):
+    """Test that imports spelled with the analyzed package's name count towards the module."""
+    package = tmp_path / "pkg"
+    package.mkdir()
+    (package / "mod.py").write_text("def helper():\n    pass\n")
+    (package / "main.py").write_text("import pkg.mod\nfrom pkg.mod import helper\ndef run():\n    helper()\n")
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(package)
+    assert analyzer.in_degree("mod") == 1 and analyzer.importers_of("mod") == {"main"}
+    assert analyzer.get_entry_points() == ["main"]
+    assert analyzer.search_symbols("helper")[0]["fan_in"] == 1
+    (package / "main.py").write_text("")
+    analyzer.analyze_directory(package)
+    assert analyzer.in_degree("mod") == 0 and analyzer.function_calls == {}
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import pytest
+from treeline.discovery import FileDiscovery, git_python_files, scan_python_files
+
+@pytest.fixture
+def sample_dir(tmp_path):
+    dir_path = tmp_path / "sample_project"
+    (dir_path / "pkg").mkdir(parents=True)
+    (dir_path / "venv" / "lib").mkdir(parents=True)
+    (dir_path / "generated").mkdir()
+    (dir_path / "main.py").write_text("import pkg.mod\n")
+    (dir_path / "pkg" / "mod.py").write_text("x = 1\n")
+    (dir_path / "pkg" / "notes.txt").write_text("not python\n")
+    (dir_path / "venv" / "lib" / "site.py").write_text("x = 2\n")
+    (dir_path / "generated" / "out.py").write_text("x = 3\n")
+    (dir_path / ".treeline-ignore").write_text("generated/\n")
+    return dir_path
+
+def age(directory):
+    """Backdate every directory and ignore file so a memoized result is outside the racy window."""
+    for root, dirs, files in os.walk(directory):
+        os.utime(root, (1_000_000_000, 1_000_000_000))
+        for name in files:
+            if name.startswith("."):
+                os.utime(os.path.join(root, name), (1_000_000_000, 1_000_000_000))
+
+def test_scan_prunes_ignored_directories(sample_dir):
+    """Test that ignored directories are skipped and stats are recorded."""
+    discovery = scan_python_files(sample_dir)
+    assert discovery.files == [sample_dir / "main.py", sample_dir / "pkg" / "mod.py"]
+    assert discovery.stats[sample_dir / "main.py"].st_size == len("import pkg.mod\n")
+    assert str(sample_dir / "venv") not in discovery.dir_mtimes
+
+def test_memoized_until_directory_changes(sample_dir):
+    """Test that results are reused until a directory's mtime changes."""
+    discovery = FileDiscovery(use_git=False)
+    first = discovery.discover(sample_dir)
+    assert first.stats
+    age(sample_dir)
+    second = discovery.discover(sample_dir)
+    third = discovery.discover(sample_dir)
+    assert third is discovery._results[(str(sample_dir), False)]
+    assert third.files == second.files and third.stats == {}
+
+    (sample_dir / "pkg" / "new.py").write_text("y = 1\n")
+    assert sample_dir / "pkg" / "new.py" in discovery.discover(sample_dir).files
+
+def test_git_fast_path(sample_dir):
+    """Test that git lists tracked and untracked files but not gitignored or deleted ones."""
+    git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    (sample_dir / ".gitignore").write_text("build_out/\n")
+    (sample_dir / "build_out").mkdir()
+    (sample_dir / "build_out" / "gen.py").write_text("x = 4\n")
+    (sample_dir / "old.py").write_text("x = 5\n")
+    subprocess.run(git + ["init", "-q"], cwd=sample_dir, check=True)
+    subprocess.run(git + ["add", "main.py", "old.py", ".gitignore"], cwd=sample_dir, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "initial"], cwd=sample_dir, check=True)
+    (sample_dir / "old.py").unlink()
+
+    discovery = git_python_files(sample_dir)
+    assert discovery.source == "git"
+    assert discovery.files == [sample_dir / "main.py", sample_dir / "pkg" / "mod.py"]
+
+def test_git_memo_sees_new_untracked_file(sample_dir):
+    """Test that a memoized git listing notices a new file in a directory without Python files."""
+    (sample_dir / "docs").mkdir()
+    subprocess.run(["git", "init", "-q"], cwd=sample_dir, check=True)
+    discovery = FileDiscovery()
+    assert discovery.discover(sample_dir).source == "git"
+    age(sample_dir)
+    discovery.discover(sample_dir)
+    assert discovery.discover(sample_dir) is discovery._results[(str(sample_dir), True)]
+
+    (sample_dir / "docs" / "new.py").write_text("x = 1\n")
+    assert sample_dir / "docs" / "new.py" in discovery.discover(sample_dir).files
+
+def test_git_fast_path_outside_repo(tmp_path):
+    """Test that a directory outside any repository falls back to scanning."""
+    (tmp_path / "a.py").write_text("x = 1\n")
+    discovery = FileDiscovery().discover(tmp_path)
+    assert discovery.files == [tmp_path / "a.py"]
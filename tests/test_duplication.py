@@ -4,6 +4,7 @@ from collections import defaultdict
 from unittest.mock import patch
 from treeline.checkers.duplication import DuplicationDetector
 from treeline.models.enhanced_analyzer import QualityIssue
+from treeline.pipeline import parse_file
 
 @pytest.fixture
 def temp_dir(tmp_path):
@@ -127,4 +128,217 @@ def test_custom_config(temp_dir):
 
     assert len(quality_issues["duplication"]) == 3, "Issues should be logged for all three occurrences."
     paths = {issue["file_path"] for issue in quality_issues["duplication"]}
-    assert paths == {str(file1), str(file2), str(file3)}
\ No newline at end of file
+    assert paths == {str(file1), str(file2), str(file3)}
+
+NEAR_DUPLICATE = '''
+def {name}(records, limit):
+    """Sum the valid records."""
+    total = 0
+    seen = set()
+    for record in records:
+        if record.id in seen:
+            continue
+        seen.add(record.id)
+        if record.value > limit:
+            total += record.value
+        elif record.value < 0:
+            total -= 1
+    return {result}
+'''
+
+UNRELATED = '''
+def render(items, width):
+    lines = []
+    for index, item in enumerate(items):
+        label = str(item).ljust(width)
+        lines.append(f"{index}: {label}")
+    return "\\n".join(lines)
+'''
+
+def issues_of(quality_issues, prefix):
+    return [issue for issue in quality_issues["duplication"] if issue["description"].startswith(prefix)]
+
+def test_near_duplicate_functions(temp_dir):
+    """Test that functions differing in a name and one expression are reported as similar."""
+    (temp_dir / "a.py").write_text(NEAR_DUPLICATE.format(name="total_valid", result="total"))
+    (temp_dir / "b.py").write_text(NEAR_DUPLICATE.format(name="sum_valid", result="total + 1"))
+    (temp_dir / "c.py").write_text(UNRELATED)
+
+    quality_issues = defaultdict(list)
+    DuplicationDetector().analyze_directory(temp_dir, quality_issues)
+
+    [issue] = issues_of(quality_issues, "Similar functions")
+    assert str(temp_dir / "a.py") in issue["description"] and str(temp_dir / "b.py") in issue["description"]
+    assert 0.8 <= issue["similarity"] < 1
+
+def test_near_duplicate_threshold(temp_dir):
+    """Test that a stricter similarity threshold drops the pair and exact copies stay exact."""
+    (temp_dir / "a.py").write_text(NEAR_DUPLICATE.format(name="total_valid", result="total"))
+    (temp_dir / "b.py").write_text(NEAR_DUPLICATE.format(name="sum_valid", result="total + 1"))
+    (temp_dir / "c.py").write_text(NEAR_DUPLICATE.format(name="total_valid", result="total"))
+
+    quality_issues = defaultdict(list)
+    DuplicationDetector({"MIN_DUPLICATION_SIMILARITY": 0.99}).analyze_directory(temp_dir, quality_issues)
+
+    assert issues_of(quality_issues, "Similar functions") == []
+    assert len(issues_of(quality_issues, "Duplicated function")) == 1
+
+def test_near_duplicates_follow_file_changes(temp_dir):
+    """Test that removing a file retracts its similar pairs on refresh."""
+    detector = DuplicationDetector()
+    for name, result in (("a", "total"), ("b", "total + 1")):
+        path = temp_dir / f"{name}.py"
+        path.write_text(NEAR_DUPLICATE.format(name=name, result=result))
+        detector.add_parsed(parse_file(path))
+    quality_issues = defaultdict(list)
+    detector.report(quality_issues, keep_state=True)
+    assert len(issues_of(quality_issues, "Similar functions")) == 1
+    assert len(issues_of(quality_issues, "Structural clone")) == 1
+
+    affected = detector.remove_file(str(temp_dir / "b.py"))
+    detector.refresh(quality_issues, affected)
+    assert quality_issues["duplication"] == []
+
+RENAMED_CLONE = '''
+class {name}:
+    def load(self, {arg}):
+        result = []
+        for entry in {arg}:
+            if entry.{attr} > {limit}:
+                result.append(entry)
+        return result
+'''
+
+def test_structural_clones_ignore_names_and_literals(temp_dir):
+    """Test that renamed copies are one clone group, reported at the largest cloned block."""
+    (temp_dir / "a.py").write_text(RENAMED_CLONE.format(name="Loader", arg="rows", attr="size", limit=10))
+    (temp_dir / "b.py").write_text(RENAMED_CLONE.format(name="Reader", arg="items", attr="weight", limit=3))
+    (temp_dir / "c.py").write_text(RENAMED_CLONE.format(name="Other", arg="rows", attr="size", limit="-1"))
+
+    quality_issues = defaultdict(list)
+    DuplicationDetector().analyze_directory(temp_dir, quality_issues)
+
+    [issue] = issues_of(quality_issues, "Structural clone")
+    assert f"{temp_dir / 'a.py'}:2-8" in issue["description"]
+    assert f"{temp_dir / 'b.py'}:2-8" in issue["description"]
+    assert "c.py" not in issue["description"]
+    assert issues_of(quality_issues, "Duplicated") == []
+
+def test_structural_clones_inside_functions(temp_dir):
+    """Test that a copied block is found inside otherwise different functions."""
+    block = "    for x in data:\n        if x:\n            out.append(x)\n        else:\n            out.append(0)\n"
+    (temp_dir / "a.py").write_text("def first(data, out):\n    setup()\n" + block)
+    (temp_dir / "b.py").write_text("def second(values):\n    out = []\n" + block.replace("data", "values") + "    return out\n")
+
+    quality_issues = defaultdict(list)
+    DuplicationDetector().analyze_directory(temp_dir, quality_issues)
+
+    [issue] = issues_of(quality_issues, "Structural clone")
+    assert issue["line"] == 3 and "b.py:3-7" in issue["description"]
+
+def descriptions(quality_issues):
+    return sorted(issue["description"] for issue in quality_issues["duplication"])
+
+def test_persistent_index_refingerprints_only_changed_files(temp_dir, tmp_path):
+    """Test that warm runs reuse stored fingerprints and match a cold run after edits."""
+    from treeline.cache import AnalysisCache
+    cache = AnalysisCache(temp_dir, cache_dir=tmp_path / "cache")
+    (temp_dir / "a.py").write_text(NEAR_DUPLICATE.format(name="a", result="total"))
+    (temp_dir / "b.py").write_text(NEAR_DUPLICATE.format(name="a", result="total"))
+    (temp_dir / "c.py").write_text(UNRELATED)
+
+    first = defaultdict(list)
+    DuplicationDetector().analyze_directory(temp_dir, first, cache=cache)
+    assert len(issues_of(first, "Duplicated function")) == 1
+
+    warm = defaultdict(list)
+    with patch.object(DuplicationDetector, "fingerprint") as fingerprint:
+        DuplicationDetector().analyze_directory(temp_dir, warm, cache=cache)
+    assert fingerprint.call_count == 0 and descriptions(warm) == descriptions(first)
+
+    (temp_dir / "b.py").write_text(NEAR_DUPLICATE.format(name="b", result="total + 1"))
+    (temp_dir / "d.py").write_text(UNRELATED.replace("render", "draw"))
+    (temp_dir / "c.py").unlink()
+    detector = DuplicationDetector()
+    fingerprinted = []
+    original = detector.fingerprint
+    detector.fingerprint = lambda parsed: fingerprinted.append(parsed.path.name) or original(parsed)
+    edited = defaultdict(list)
+    detector.analyze_directory(temp_dir, edited, cache=cache)
+    assert sorted(fingerprinted) == ["b.py", "d.py"]
+
+    cold = defaultdict(list)
+    DuplicationDetector().analyze_directory(temp_dir, cold)
+    assert descriptions(edited) == descriptions(cold)
+    assert issues_of(edited, "Duplicated function") == []
+
+def test_finalize_with_cache_rereports_only_changed_groups(temp_dir, tmp_path):
+    """Test that pipeline runs with a cache carry duplicate groups over and match a cold run after edits."""
+    from treeline.cache import AnalysisCache
+    from treeline.enhanced_analyzer import EnhancedCodeAnalyzer
+
+    def run(cache=None):
+        analyzer = EnhancedCodeAnalyzer(config={"MIN_DUPLICATED_BLOCK_SIZE": 5})
+        analyzer.analyze_directory(temp_dir, cache=cache)
+        return analyzer.quality_issues
+
+    cache_dir = tmp_path / "cache"
+    (temp_dir / "a.py").write_text(NEAR_DUPLICATE.format(name="a", result="total"))
+    (temp_dir / "b.py").write_text(NEAR_DUPLICATE.format(name="a", result="total"))
+    (temp_dir / "c.py").write_text(UNRELATED)
+    first = run(AnalysisCache(temp_dir, cache_dir=cache_dir))
+    assert len(issues_of(first, "Duplicated function")) == 1
+
+    with patch.object(DuplicationDetector, "report") as report:
+        warm = run(AnalysisCache(temp_dir, cache_dir=cache_dir))
+    assert report.call_count == 0 and descriptions(warm) == descriptions(first)
+
+    (temp_dir / "b.py").write_text(NEAR_DUPLICATE.format(name="b", result="total + 1"))
+    (temp_dir / "d.py").write_text(UNRELATED.replace("render", "draw"))
+    (temp_dir / "c.py").unlink()
+    edited = run(AnalysisCache(temp_dir, cache_dir=cache_dir))
+    assert descriptions(edited) == descriptions(run())
+    assert issues_of(edited, "Similar functions") and not issues_of(edited, "Duplicated function")
+
+COPIED_LINES = """
+total = 0
+for value in values:
+    if value > limit:  # keep large ones
+        total += value
+    else:
+        skipped += 1
+print(total, skipped)
+"""
+
+def test_line_windows_merge_into_maximal_ranges(temp_dir):
+    """Test that copied lines are found up to comments and indentation and merged into one range."""
+    (temp_dir / "a.py").write_text("import os\n" + COPIED_LINES + "x = 1\n")
+    (temp_dir / "b.py").write_text(
+        "def run(values, limit, skipped):\n" + "\n".join("    " + line.split("  #")[0] for line in COPIED_LINES.splitlines())
+    )
+
+    quality_issues = defaultdict(list)
+    config = {"MAX_DUPLICATED_LINES": 4, "MAX_DUPLICATED_BLOCKS": 0}
+    DuplicationDetector(config).analyze_directory(temp_dir, quality_issues)
+
+    issues = {issue["file_path"]: issue for issue in issues_of(quality_issues, "1 duplicated block")}
+    assert issues[str(temp_dir / "a.py")]["description"].endswith(f"lines 3-9 (also at {temp_dir / 'b.py'}:3)")
+    assert issues[str(temp_dir / "b.py")]["line"] == 3
+
+def test_line_duplication_allows_max_blocks(temp_dir):
+    """Test that files are only flagged past MAX_DUPLICATED_BLOCKS ranges and follow removals."""
+    (temp_dir / "a.py").write_text(COPIED_LINES + "first = 1\n" + COPIED_LINES)
+    (temp_dir / "b.py").write_text(COPIED_LINES)
+
+    detector = DuplicationDetector({"MAX_DUPLICATED_LINES": 4, "MAX_DUPLICATED_BLOCKS": 1})
+    for name in ("a.py", "b.py"):
+        detector.add_parsed(parse_file(temp_dir / name))
+    quality_issues = defaultdict(list)
+    detector.report(quality_issues, keep_state=True)
+    [issue] = issues_of(quality_issues, "2 duplicated blocks")
+    assert issue["file_path"] == str(temp_dir / "a.py")
+
+    detector.refresh(quality_issues, detector.remove_file(str(temp_dir / "b.py")))
+    assert len(issues_of(quality_issues, "2 duplicated blocks")) == 1
+    detector.refresh(quality_issues, detector.remove_file(str(temp_dir / "a.py")))
+    assert quality_issues["duplication"] == []
@@ -0,0 +1,95 @@
+import ast
+import pytest
+from collections import defaultdict
+from pathlib import Path
+from treeline.checkers.engine import CheckerEngine
+from treeline.utils.metrics import calculate_cognitive_complexity, calculate_cyclomatic_complexity
+
+CODE = """
+def outer(a, b):
+    if a and b or a:
+        for x in a:
+            while x:
+                return 1
+    try:
+        pass
+    except ValueError:
+        return 2
+    def inner():
+        if a:
+            if b:
+                return 3
+    return 4
+
+class Widget:
+    def method(self):
+        with open("f") as f:
+            if f:
+                return f
+"""
+
+@pytest.fixture
+def tree():
+    return ast.parse(CODE)
+
+def collect_stats(tree):
+    stats = {}
+    engine = CheckerEngine()
+    engine.on_leave((ast.FunctionDef, ast.ClassDef), lambda node, ctx, s: stats.__setitem__(node.name, s))
+    engine.run(tree, Path("test.py"), defaultdict(list))
+    return stats
+
+def test_dispatches_only_registered_types(tree):
+    """Test that handlers only see nodes of the type they registered for."""
+    seen = []
+    engine = CheckerEngine()
+    engine.on(ast.Return, lambda node, ctx: seen.append(type(node)))
+    engine.run(tree, Path("test.py"), defaultdict(list))
+    assert seen == [ast.Return] * 5
+
+def test_scope_stats_match_metrics(tree):
+    """Test that single-pass scope stats agree with the standalone metric functions."""
+    stats = collect_stats(tree)
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            assert stats[node.name].cyclomatic == calculate_cyclomatic_complexity(node)
+            assert stats[node.name].cognitive == calculate_cognitive_complexity(node)
+
+def test_scope_stats_nesting_returns_and_branches(tree):
+    """Test nesting depth, return count and branch count per function."""
+    stats = collect_stats(tree)
+    assert stats["outer"].max_nesting == 3
+    assert stats["outer"].returns == 4
+    assert stats["outer"].if_count == 3
+    assert stats["inner"].max_nesting == 2
+    assert stats["inner"].returns == 1
+    assert stats["method"].max_nesting == 2
+
+def test_parent_and_enclosing_scope(tree):
+    """Test that handlers can see the direct parent and the enclosing class."""
+    found = []
+    def on_return(node, ctx):
+        found.append((type(ctx.parent).__name__, ctx.enclosing(ast.ClassDef)))
+    CheckerEngine().on(ast.Return, on_return).run(tree, Path("test.py"), defaultdict(list))
+    assert found[-1][0] == "If"
+    assert found[-1][1].name == "Widget"
+    assert found[0][1] is None
+
+def test_failing_checker_is_disabled(tree):
+    """Test that a checker with handle_error is skipped after its first error."""
+    class Broken:
+        def __init__(self):
+            self.errors = []
+            self.calls = 0
+        def register(self, engine):
+            engine.on(ast.Return, self.visit)
+        def visit(self, node, ctx):
+            self.calls += 1
+            raise RuntimeError("boom")
+        def handle_error(self, error, ctx):
+            self.errors.append(str(error))
+
+    broken = Broken()
+    CheckerEngine([broken]).run(tree, Path("test.py"), defaultdict(list))
+    assert broken.calls == 1
+    assert broken.errors == ["boom"]
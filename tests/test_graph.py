@@ -1,5 +1,6 @@
 import pytest
-from treeline.optimization.graph import OptimizedDependencyGraph  
+from treeline.optimization.graph import EdgeKind, GraphBuilder, NamedAdjacency, OptimizedDependencyGraph
+from treeline.optimization.reachability import ReachabilityIndex
 
 @pytest.fixture
 def empty_graph():
@@ -117,3 +118,76 @@ def test_multiple_components(empty_graph):
     graph.add_edge("C", "D")
     components = graph.get_connected_components()
     assert len(components) == 4, "Four nodes without cycles should form four SCCs"
+
+def test_builder_freeze_dedupes_and_sorts():
+    """Test that freezing groups edges by source, sorted by node ID and without duplicates."""
+    builder = GraphBuilder()
+    builder.add_edge("A", "C")
+    builder.add_edge("A", "B", EdgeKind.CALLS)
+    builder.add_edge("A", "C")
+    builder.add_node("D")
+    graph = builder.freeze()
+    a, b, c = graph.id_of("A"), graph.id_of("B"), graph.id_of("C")
+    assert graph.node_count == 4 and graph.edge_count == 2
+    assert list(graph.successors(a)) == [c, b]
+    assert graph.successors(a, EdgeKind.CALLS) == [b]
+    assert graph.out_degree(graph.id_of("D")) == 0
+
+def test_reverse_view():
+    """Test that the reverse graph is cached and keeps edge kinds."""
+    builder = GraphBuilder()
+    builder.add_edge("A", "C")
+    builder.add_edge("B", "C", EdgeKind.CONTAINS)
+    graph = builder.freeze()
+    reverse = graph.reverse()
+    assert reverse is graph.reverse() and reverse.reverse() is graph
+    c = graph.id_of("C")
+    assert [graph.name_of(node) for node in reverse.successors(c)] == ["A", "B"]
+    assert reverse.successors(c, EdgeKind.CONTAINS) == [graph.id_of("B")]
+    assert graph.in_degree(c) == 2
+
+def test_filtered_by_kind():
+    """Test that a filtered graph keeps only one kind of edge."""
+    builder = GraphBuilder()
+    builder.add_edge("A", "B", EdgeKind.IMPORTS)
+    builder.add_edge("A", "C", EdgeKind.CALLS)
+    imports = builder.freeze().filtered(EdgeKind.IMPORTS)
+    assert [imports.name_of(node) for node in imports.successors(imports.id_of("A"))] == ["B"]
+
+def test_named_adjacency():
+    """Test the name-to-names mapping view over a frozen graph."""
+    builder = GraphBuilder()
+    builder.add_edge("A", "B")
+    view = NamedAdjacency(builder.freeze())
+    assert view["A"] == {"B"} and view["missing"] == set()
+    assert list(view) == ["A"] and "B" not in view
+
+def test_reachability_index():
+    """Test transitive queries across a cycle and incremental edge changes."""
+    builder = GraphBuilder()
+    for source, target in [("A", "B"), ("B", "C"), ("C", "B"), ("C", "D")]:
+        builder.add_edge(source, target)
+    index = ReachabilityIndex(builder.freeze())
+    assert index.reaches("A", "D") and not index.reaches("D", "A")
+    assert index.descendants("A") == {"B", "C", "D"}
+    assert index.descendants("B") == {"B", "C", "D"}
+    assert index.ancestors("D") == {"A", "B", "C"}
+    index.add_edge("D", "E")
+    assert index.ancestors("E") == {"A", "B", "C", "D"}
+    index.remove_edge("C", "D")
+    assert not index.reaches("A", "E")
+    index.add_edge("E", "A")
+    assert index.descendants("D") == {"A", "B", "C", "E"}
+    assert index.graph.id_of("E") is None and list(index.graph.successors(index.graph.id_of("D"))) == []
+
+def test_graph_depends_on(empty_graph):
+    """Test transitive dependency checks, including after a cycle is added."""
+    graph = empty_graph
+    graph.add_edge("A", "B")
+    graph.add_edge("B", "C")
+    assert graph.depends_on("A", "C") and not graph.depends_on("C", "A")
+    graph.add_edge("C", "A")
+    assert graph.depends_on("C", "B")
+    reachability = graph.reachability()
+    graph.add_edge("A", "D")
+    assert graph.reachability() is reachability and graph.depends_on("B", "D")
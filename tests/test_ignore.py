@@ -0,0 +1,68 @@
+import pytest
+from pathlib import Path
+from treeline.ignore import IgnoreMatcher, compile_pattern, should_ignore
+
+@pytest.mark.parametrize("pattern,path,expected", [
+    ("*.py", "a.py", True),
+    ("*.py", "pkg/a.py", True),
+    ("/top.py", "top.py", True),
+    ("/top.py", "pkg/top.py", False),
+    ("pkg/*.py", "pkg/a.py", True),
+    ("pkg/*.py", "src/pkg/a.py", False),
+    ("a/**/b.py", "a/b.py", True),
+    ("a/**/b.py", "a/x/y/b.py", True),
+    ("**/gen.py", "x/y/gen.py", True),
+    ("docs/**", "docs/a/b.py", True),
+    ("file?.py", "file1.py", True),
+    ("file[!0-9].py", "file1.py", False),
+    ("\\#odd.py", "#odd.py", True),
+])
+def test_pattern_semantics(pattern, path, expected):
+    """Test that single patterns follow gitignore matching rules."""
+    assert IgnoreMatcher(patterns=[pattern]).match(Path(path)) is expected
+
+def test_comments_and_blank_lines():
+    """Test that comments and blank lines compile to nothing."""
+    assert compile_pattern("# comment") is None
+    assert compile_pattern("   ") is None
+
+def test_negation_last_match_wins():
+    """Test that a later negation re-includes a file and a later pattern excludes it again."""
+    matcher = IgnoreMatcher(patterns=["*.py", "!keep*.py", "keep_not.py"])
+    assert matcher.is_ignored(Path("a.py"))
+    assert not matcher.is_ignored(Path("pkg/keep.py"))
+    assert matcher.is_ignored(Path("keep_not.py"))
+
+def test_directory_patterns_and_pruning():
+    """Test that dir-only patterns prune directories and nothing inside can be re-included."""
+    matcher = IgnoreMatcher(patterns=["gen/", "!gen/keep.py"])
+    assert matcher.prune(Path("src/gen"))
+    assert not matcher.match(Path("src/gen"))
+    assert matcher.is_ignored(Path("src/gen/keep.py"))
+
+def test_nested_gitignore(tmp_path):
+    """Test that deeper .gitignore files apply relative to their directory and take precedence."""
+    (tmp_path / ".gitignore").write_text("*.gen.py\n")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / ".gitignore").write_text("/local.py\n!keep.gen.py\n")
+    matcher = IgnoreMatcher(tmp_path, use_gitignore=True)
+    assert matcher.is_ignored(tmp_path / "a.gen.py")
+    assert matcher.is_ignored(tmp_path / "pkg" / "local.py")
+    assert not matcher.is_ignored(tmp_path / "local.py")
+    assert not matcher.is_ignored(tmp_path / "pkg" / "keep.gen.py")
+    assert not IgnoreMatcher(tmp_path).is_ignored(tmp_path / "a.gen.py")
+
+def test_treeline_ignore_and_defaults(tmp_path):
+    """Test that default patterns and .treeline-ignore are part of the root scope."""
+    (tmp_path / ".treeline-ignore").write_text("scratch/\n")
+    matcher = IgnoreMatcher(tmp_path)
+    assert matcher.is_ignored(tmp_path / "venv" / "lib" / "x.py")
+    assert matcher.is_ignored(tmp_path / "scratch" / "x.py")
+    assert not matcher.is_ignored(tmp_path / "src" / "x.py")
+
+def test_should_ignore_compatibility():
+    """Test that the pattern-list helper keeps working on arbitrary paths."""
+    patterns = ["venv/", "*.log"]
+    assert should_ignore(Path("/home/me/project/venv/lib/a.py"), patterns)
+    assert should_ignore(Path("logs/run.log"), patterns)
+    assert not should_ignore(Path("src/a.py"), patterns)
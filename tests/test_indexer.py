@@ -0,0 +1,124 @@
+import pytest
+from treeline.optimization.indexer import FastIndexer
+
+@pytest.fixture
+def sample_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dir_path = tmp_path / "sample_project"
+    dir_path.mkdir()
+    (dir_path / "file1.py").write_text("import os\n\ndef func1():\n    pass\n")
+    (dir_path / "file2.py").write_text("class Class1:\n    def method1(self):\n        pass\n")
+    (dir_path / "big.py").write_text("def big():\n" + "    x = 1\n" * 200)
+    return dir_path
+
+def test_index_codebase_in_chunks(sample_dir):
+    """Test that every file is indexed when files are sent to workers in small chunks."""
+    indexer = FastIndexer(max_workers=2, chunk_bytes=64)
+    indexer.index_codebase(sample_dir)
+    assert set(indexer.file_hashes) == {str(sample_dir / name) for name in ("file1.py", "file2.py", "big.py")}
+    names = {entry.name for entry in indexer.index.values()}
+    assert {"file1", "func1", "Class1", "method1", "big"} <= names
+
+def test_dependency_queries(sample_dir):
+    """Test that dependency and dependent walks run over the frozen graph."""
+    (sample_dir / "file3.py").write_text("import file1\n")
+    indexer = FastIndexer(max_workers=1)
+    indexer.index_codebase(sample_dir)
+    assert indexer.get_dependencies("file1") == {"os"}
+    assert indexer.get_dependents("os") == {"file1", "file3"}
+    assert indexer.get_dependents("os", depth=1) == {"file1"}
+    assert indexer.dependency_graph["file3"] == {"file1"}
+    assert indexer.get_dependencies("missing") == set()
+
+def test_warm_run_reads_entries_from_store(sample_dir):
+    """Test that unchanged files keep their entries across indexer instances."""
+    FastIndexer(max_workers=1).index_codebase(sample_dir)
+    indexer = FastIndexer(max_workers=1)
+    indexer.index_codebase(sample_dir)
+    names = {entry.name for entry in indexer.index.values()}
+    assert {"file1", "func1", "Class1", "method1", "big"} <= names
+    assert indexer.get_dependents("os") == {"file1"}
+    assert [entry.name for entry in indexer.get_definitions_for_file(str(sample_dir / "file2.py"))] == ["Class1", "method1"]
+
+def test_incremental_run_upserts_changed_files(sample_dir):
+    """Test that edited files are replaced and deleted files are dropped."""
+    indexer = FastIndexer(max_workers=1)
+    indexer.index_codebase(sample_dir)
+    (sample_dir / "file1.py").write_text("import sys\n\ndef func2():\n    pass\n")
+    (sample_dir / "big.py").unlink()
+    indexer.index_codebase(sample_dir)
+    names = {entry.name for entry in indexer.index.values()}
+    assert "func1" not in names and "big" not in names
+    assert indexer.find("func2")[0].path == str(sample_dir / "file1.py")
+    assert indexer.get_dependencies("file1") == {"sys"}
+    assert indexer.get_dependents("os") == set()
+
+def test_find_qualified(sample_dir):
+    """Test that entries are stored under their dotted module path."""
+    indexer = FastIndexer(max_workers=1)
+    indexer.index_codebase(sample_dir)
+    assert [entry.name for entry in indexer.find_qualified("file2.Class1")] == ["Class1"]
+    assert indexer.find_qualified("file1")[0].type == "module"
+
+LARGE_SOURCE = '''import os, sys as system
+from collections import (
+    OrderedDict,
+    defaultdict as dd,
+)
+
+@decorator(
+    arg=1,
+)
+class Outer(Base):
+    """Doc."""
+
+    def method(self):
+        import json
+        return json
+
+    async def fetch(self):
+        def inner(): return 1
+        # trailing comment
+
+    class Nested: pass
+
+def after(): x = 1; import re
+'''
+
+def test_large_file_tokenizer_matches_ast(tmp_path, monkeypatch):
+    """Test that files above the mmap threshold get the same entries as parsed ones, async included."""
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "gen.py"
+    source.write_text(LARGE_SOURCE)
+    indexer = FastIndexer(max_workers=1)
+    indexer.mmap_threshold = 0
+    file_hash, entries = indexer._process_file(source)
+    assert file_hash
+    spans = {(entry.type, entry.name): (entry.line_start, entry.line_end) for entry in entries}
+    assert spans == {
+        ("module", "gen"): (1, 1),
+        ("class", "Outer"): (10, 21),
+        ("function", "method"): (13, 15),
+        ("function", "fetch"): (17, 18),
+        ("function", "inner"): (18, 18),
+        ("class", "Nested"): (21, 21),
+        ("function", "after"): (23, 23),
+    }
+    by_name = {entry.name: entry for entry in entries}
+    assert by_name["gen"].dependencies == {"os", "sys", "collections.OrderedDict", "collections.defaultdict"}
+    assert by_name["Outer"].dependencies == {"json"}
+    assert by_name["method"].dependencies == {"json"}
+    assert by_name["inner"].hash == f"{file_hash}:18-18"
+
+def test_reachability_follows_reindexing(sample_dir):
+    """Test that a built reachability index is updated with the edges of re-indexed files."""
+    indexer = FastIndexer(max_workers=1)
+    indexer.index_codebase(sample_dir)
+    reachability = indexer.reachability
+    assert indexer.get_dependents("os") == {"file1"}
+    (sample_dir / "file1.py").write_text("import sys\n")
+    (sample_dir / "file3.py").write_text("import file1\n")
+    indexer.index_codebase(sample_dir)
+    assert indexer.reachability is reachability
+    assert indexer.get_dependents("os") == set()
+    assert indexer.get_dependents("sys") == {"file1", "file3"}
@@ -0,0 +1,56 @@
+import pytest
+from treeline.module_index import ModuleIndex, absolute_import
+from treeline.dependency_analyzer import ModuleDependencyAnalyzer
+
+@pytest.fixture
+def sample_dir(tmp_path):
+    dir_path = tmp_path / "proj"
+    (dir_path / "pkg" / "sub").mkdir(parents=True)
+    (dir_path / "main.py").write_text("from pkg import helper\nhelper.run()\n")
+    (dir_path / "pkg" / "__init__.py").write_text("from . import helper\n")
+    (dir_path / "pkg" / "helper.py").write_text("from .sub.leaf import value\ndef run():\n    return value()\n")
+    (dir_path / "pkg" / "sub" / "__init__.py").write_text("")
+    (dir_path / "pkg" / "sub" / "leaf.py").write_text("from .. import helper\ndef value():\n    return 1\n")
+    return dir_path
+
+def test_absolute_import():
+    """Test that relative imports resolve against the importing module's package."""
+    assert absolute_import("pkg.mod", "other", 1) == "pkg.other"
+    assert absolute_import("pkg.__init__", None, 1) == "pkg"
+    assert absolute_import("pkg.sub.leaf", "helper", 2) == "pkg.helper"
+    assert absolute_import("main", "x", 3) == "x"
+
+def test_two_way_lookup(sample_dir):
+    """Test that files and module names map to each other, packages to __init__."""
+    index = ModuleIndex(sample_dir, sorted(sample_dir.rglob("*.py")))
+    assert len(index) == 5
+    assert index.module_for(sample_dir / "pkg" / "sub" / "leaf.py") == "pkg.sub.leaf"
+    assert index.file_for("pkg.sub.leaf") == sample_dir / "pkg" / "sub" / "leaf.py"
+    assert index.file_for("pkg") == sample_dir / "pkg" / "__init__.py"
+    assert index.file_for("missing") is None
+    index.remove(sample_dir / "pkg" / "helper.py")
+    assert "pkg.helper" not in index
+
+def test_resolve(sample_dir):
+    """Test resolution of packages, attributes, relative and package-prefixed names."""
+    index = ModuleIndex(sample_dir, sorted(sample_dir.rglob("*.py")))
+    assert index.resolve("pkg") == "pkg.__init__"
+    assert index.resolve("pkg.helper.run") == "pkg.helper"
+    assert index.resolve("proj.pkg.sub.leaf") == "pkg.sub.leaf"
+    assert index.resolve("helper", importer="pkg.sub.leaf", level=2) == "pkg.helper"
+    assert index.resolve("os.path") is None
+
+def test_relative_imports_in_graph(sample_dir):
+    """Test that relative imports become graph links and cross-module calls."""
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(sample_dir)
+    assert "pkg.helper" in analyzer.module_imports["pkg.__init__"]
+    assert "pkg.sub.leaf" in analyzer.module_imports["pkg.helper"]
+    assert analyzer.function_calls["pkg.sub.leaf.value"][0]["from_module"] == "pkg.helper"
+    assert analyzer.file_for_module("pkg.helper.run") == str(sample_dir / "pkg" / "helper.py")
+
+    nodes, links = analyzer.get_graph_data()
+    names = {node["id"]: node["name"] for node in nodes}
+    imports = {(names[link["source"]], names[link["target"]]) for link in links if link["type"] == "imports"}
+    assert ("pkg.sub.leaf", "pkg.helper") in imports
+    assert ("main", "pkg.__init__") in imports
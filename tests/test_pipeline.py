@@ -0,0 +1,134 @@
+import ast
+import pytest
+from treeline.pipeline import AnalysisPipeline, ParsedFile, count_lines, parse_file, size_chunks
+from treeline.dependency_analyzer import ModuleDependencyAnalyzer
+from treeline.enhanced_analyzer import EnhancedCodeAnalyzer
+from treeline.checkers.security import SecurityAnalyzer
+from collections import defaultdict
+
+@pytest.fixture
+def sample_dir(tmp_path):
+    dir_path = tmp_path / "sample_project"
+    dir_path.mkdir()
+    (dir_path / "file1.py").write_text("""
+import file2
+def func1():
+    file2.func2()
+""")
+    (dir_path / "file2.py").write_text("""
+def func2():
+    pass
+""")
+    (dir_path / "broken.py").write_text("def broken(:\n")
+    return dir_path
+
+def test_parse_file(tmp_path):
+    """Test that a parsed file carries its source, lines, tree and parent links."""
+    file_path = tmp_path / "module.py"
+    file_path.write_text("def func():\r\n    return 1\r\n")
+    parsed = parse_file(file_path)
+    assert parsed.path == file_path
+    assert parsed.lines == ["def func():", "    return 1", ""]
+    assert count_lines(parsed) == 2
+    func = parsed.tree.body[0]
+    assert parsed.parent_of(func) is parsed.tree
+    assert parsed.parent_of(func.body[0]) is func
+
+def test_parent_index(tmp_path):
+    """Test parent, ancestor and enclosing lookups, and that the index is built once per file."""
+    file_path = tmp_path / "module.py"
+    file_path.write_text("class A:\n    def f(self):\n        return input()\n")
+    parsed = parse_file(file_path)
+    index = parsed.parent_index
+    assert parsed.parent_index is index
+    method = parsed.tree.body[0].body[0]
+    call = method.body[0].value
+    assert [type(node).__name__ for node in index.ancestors(call)] == ["Return", "FunctionDef", "ClassDef", "Module"]
+    assert index.enclosing(call, ast.ClassDef) is parsed.tree.body[0]
+    assert index.parent(parsed.tree) is None and index.parent(ast.Pass()) is None
+    assert len(index) == len(list(ast.walk(parsed.tree)))
+
+def test_pipeline_feeds_both_analyzers(sample_dir):
+    """Test that one pipeline run populates the dependency and quality analyzers."""
+    dep_analyzer = ModuleDependencyAnalyzer()
+    code_analyzer = EnhancedCodeAnalyzer()
+    analyses = AnalysisPipeline(dep_analyzer, code_analyzer).run(sample_dir)
+    assert len(analyses) == 3
+    assert "file1" in dep_analyzer.module_imports
+    assert "file2" in dep_analyzer.module_imports["file1"]
+    assert "file2.func2" in dep_analyzer.function_locations
+    names = [element["name"] for analysis in analyses for element in analysis.elements]
+    assert "func1" in names and "func2" in names
+    parsing_issues = code_analyzer.quality_issues["parsing"]
+    assert parsing_issues and parsing_issues[0]["file_path"] == str(sample_dir / "broken.py")
+
+def test_checker_uses_parsed_lines(tmp_path):
+    """Test that checkers read lines from the shared parse instead of the file."""
+    file_path = tmp_path / "missing.py"
+    parsed = ParsedFile.from_source("eval('1')\n", file_path)
+    quality_issues = defaultdict(list)
+    SecurityAnalyzer().check(parsed.tree, file_path, quality_issues, parsed)
+    assert any("eval" in issue["description"] for issue in quality_issues["security"])
+
+def run_pipeline(sample_dir, workers):
+    dep_analyzer = ModuleDependencyAnalyzer()
+    code_analyzer = EnhancedCodeAnalyzer()
+    pipeline = AnalysisPipeline(dep_analyzer, code_analyzer, workers=workers)
+    pipeline.PARALLEL_THRESHOLD = 1
+    analyses = pipeline.run(sample_dir)
+    return dep_analyzer, code_analyzer, analyses
+
+def test_parallel_matches_serial(sample_dir):
+    """Test that a process pool run merges the same results as a serial run."""
+    (sample_dir / "file3.py").write_text("import os\ndef func2():\n    pass\n")
+    serial = run_pipeline(sample_dir, workers=1)
+    parallel = run_pipeline(sample_dir, workers=2)
+    assert parallel[0].module_imports == serial[0].module_imports
+    assert dict(parallel[0].function_calls) == dict(serial[0].function_calls)
+    assert dict(parallel[1].quality_issues) == dict(serial[1].quality_issues)
+    assert [a.elements for a in parallel[2]] == [a.elements for a in serial[2]]
+
+def test_unused_code_reduced_across_files(sample_dir):
+    """Test that unused imports are reported per file and unused functions across files."""
+    (sample_dir / "file3.py").write_text("import os\ndef orphan():\n    pass\ndef used():\n    pass\nused()\n")
+    _, code_analyzer, _ = run_pipeline(sample_dir, workers=2)
+    descriptions = [issue["description"] for issue in code_analyzer.quality_issues["unused_code"]]
+    assert "Unused import: os" in descriptions
+    assert "Unused function: orphan" in descriptions
+    assert "Unused function: used" not in descriptions
+
+def test_size_chunks():
+    """Test that items are packed largest first up to the byte budget."""
+    items = [("a", 10), ("b", 300), ("c", 40), ("d", 60), ("e", 50)]
+    assert size_chunks(items, 100) == [["b"], ["d"], ["e", "c", "a"]]
+    assert size_chunks([], 100) == []
+
+def test_parallel_small_chunks(sample_dir):
+    """Test that one file per chunk still merges results in file order."""
+    serial = run_pipeline(sample_dir, workers=1)
+    dep_analyzer, code_analyzer = ModuleDependencyAnalyzer(), EnhancedCodeAnalyzer()
+    pipeline = AnalysisPipeline(dep_analyzer, code_analyzer, workers=2, chunk_bytes=1)
+    pipeline.PARALLEL_THRESHOLD = 1
+    analyses = pipeline.run(sample_dir)
+    assert [a.path for a in analyses] == [a.path for a in serial[2]]
+    assert dict(code_analyzer.quality_issues) == dict(serial[1].quality_issues)
+
+def test_chunk_bytes_from_config():
+    """Test that the chunk budget is read from the analyzer config."""
+    pipeline = AnalysisPipeline(ModuleDependencyAnalyzer(config={"PARALLEL_CHUNK_BYTES": 4096}))
+    assert pipeline.chunk_bytes == 4096
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_iter_run_streams_every_file(sample_dir, workers):
+    """Test that iter_run yields each file once and finalizes after the last one."""
+    (sample_dir / "file3.py").write_text("def func2():\n    pass\n")
+    code_analyzer = EnhancedCodeAnalyzer()
+    pipeline = AnalysisPipeline(ModuleDependencyAnalyzer(), code_analyzer, workers=workers, chunk_bytes=1)
+    pipeline.PARALLEL_THRESHOLD = 1
+    stream = pipeline.iter_run(sample_dir)
+    first = next(stream)
+    assert code_analyzer.quality_issues["duplication"] == []
+    paths = [first.path] + [analysis.path for analysis in stream]
+    assert sorted(paths) == sorted(str(path) for path in sample_dir.rglob("*.py"))
+    assert len(code_analyzer.quality_issues["duplication"]) == 1
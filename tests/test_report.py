@@ -121,4 +121,18 @@ def test_empty_directory(target_dir, mocker):
     mocker.patch.object(generator.dependency_analyzer, "analyze_directory")
     generator.analyze()
     assert len(generator.analyzed_files) == 0
-    assert generator.issues_count == 0
\ No newline at end of file
+    assert generator.issues_count == 0
+
+
+def test_module_cycles_are_bounded(target_dir, mocker):
+    """Test that dense import cycles are listed up to the configured count and length."""
+    generator = ReportGenerator(target_dir)
+    modules = [f"m{i}" for i in range(12)]
+    generator.dependency_analyzer.module_imports = {m: set(modules) - {m} for m in modules}
+    generator.function_dependencies = {}
+    config = {"MAX_CYCLES_REPORTED": 5, "MAX_CYCLE_LENGTH": 3}
+    mocker.patch("treeline.utils.report.get_config", return_value=config)
+    circular_deps = generator.detect_circular_dependencies()
+    assert len(circular_deps["module_level"]) == 5
+    assert all(len(cycle) <= 4 and cycle[0] == cycle[-1] for cycle in circular_deps["module_level"])
+    assert circular_deps["module_components"] == [sorted(modules)]
@@ -0,0 +1,45 @@
+from treeline.optimization.search import Symbol, SymbolSearchIndex
+
+def symbol(qualified_name, kind="function"):
+    module = qualified_name.rsplit(".", 1)[0]
+    return Symbol(qualified_name, qualified_name.rsplit(".", 1)[-1], kind, module, f"{module}.py", 1)
+
+def test_ranks_exact_then_prefix_then_fuzzy():
+    """Test that match tiers come first and fan-in orders ties."""
+    index = SymbolSearchIndex()
+    index.set_module("a", [symbol("a.parse"), symbol("a.parse_file"), symbol("a.parse_args")])
+    index.set_module("b", [symbol("b.prase")])
+    fan_in = {"a.parse_args": 5}
+    results = index.search("parse", fan_in=lambda s: fan_in.get(s.qualified_name, 0))
+    assert [(r.symbol.qualified_name, r.match) for r in results][:3] == [
+        ("a.parse", "exact"), ("a.parse_args", "prefix"), ("a.parse_file", "prefix")]
+    fuzzy = index.search("parse_fiel")
+    assert fuzzy[0].symbol.qualified_name == "a.parse_file" and fuzzy[0].match == "fuzzy"
+    assert index.search("prase")[0].symbol.qualified_name == "b.prase"
+
+def test_qualified_prefix_and_limit():
+    """Test that qualified names are searchable and results are capped."""
+    index = SymbolSearchIndex()
+    index.set_module("pkg.mod", [symbol(f"pkg.mod.f{i}") for i in range(30)])
+    assert len(index.search("pkg.mod.f", limit=5)) == 5
+    assert index.search("PKG.MOD.F7")[0].match == "exact"
+
+def test_set_and_remove_module_are_incremental():
+    """Test that replacing a module's symbols hides the old ones."""
+    index = SymbolSearchIndex()
+    index.set_module("a", [symbol("a.old")])
+    index.set_module("a", [symbol("a.new")])
+    assert index.search("old") == []
+    assert index.search("new")[0].symbol.qualified_name == "a.new"
+    index.remove_module("a")
+    assert index.search("new") == [] and len(index) == 0
+
+def test_compaction_keeps_live_symbols():
+    """Test that dropping tombstones leaves every live module searchable."""
+    index = SymbolSearchIndex()
+    for i in range(3000):
+        index.set_module(f"m{i}", [symbol(f"m{i}.func{i}")])
+    for i in range(2500):
+        index.remove_module(f"m{i}")
+    assert len(index) == 500 and len(index._symbols) < 3000
+    assert index.search("func2999")[0].symbol.module == "m2999"
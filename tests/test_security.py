@@ -76,6 +76,31 @@ def test_check_regex_patterns_insecure_function():
     assert len(quality_issues["security"]) == 1
     assert "Use of potentially insecure function" in quality_issues["security"][0]["description"]
 
+def test_check_regex_patterns_one_issue_per_category():
+    """Test that one line can hit several categories, each reported once, and exclusions still apply."""
+    analyzer = SecurityAnalyzer()
+    quality_issues = defaultdict(list)
+    lines = [
+        "eval('x' + cmd); cursor.execute('SELECT ' + cmd % 1)",
+        "yaml.load(stream, Loader=yaml.SafeLoader)",
+        "test_pickle.loads(data)",
+        "digest = hashlib.MD5(data)",
+    ]
+    analyzer._check_regex_patterns(lines, Path("test.py"), quality_issues)
+    found = [(issue["line"], issue["description"].split("(")[-1], issue["severity"]) for issue in quality_issues["security"]]
+    assert found == [(1, "sql_injection)", "high"), (1, "command_injection)", "high"), (4, "insecure_function)", "low")]
+
+def test_pattern_categories_without_keywords():
+    """Test that a category added without keywords turns off the prefilter instead of being skipped."""
+    analyzer = SecurityAnalyzer()
+    analyzer.security_patterns["debug"] = {
+        "patterns": [(r"breakpoint\(\)", "low")], "exclude_patterns": [], "message": "Leftover breakpoint"
+    }
+    analyzer._compile_patterns()
+    quality_issues = defaultdict(list)
+    analyzer._check_regex_patterns(["x = 1", "breakpoint()"], Path("test.py"), quality_issues)
+    assert [issue["line"] for issue in quality_issues["security"]] == [2]
+
 def test_is_credential_false_positive_true():
     """Test false positive detection for credentials."""
     analyzer = SecurityAnalyzer()
@@ -130,14 +155,6 @@ def test_check_dangerous_ast_patterns_file_operation():
     assert "Potential path traversal vulnerability" in quality_issues["security"][0]["description"]
     assert quality_issues["security"][0]["severity"] == "high"
 
-def test_get_parent():
-    """Test getting the parent node in the AST."""
-    analyzer = SecurityAnalyzer()
-    tree = ast.parse("exec(input('Enter code: '))")
-    call_node = tree.body[0].value
-    parent = analyzer._get_parent(call_node, tree)
-    assert isinstance(parent, ast.Expr)
-
 def test_check_with_file(temp_file):
     """Integration test for check method with a file."""
     analyzer = SecurityAnalyzer()
@@ -0,0 +1,93 @@
+import subprocess
+import pytest
+from treeline.cache import AnalysisCache
+from treeline.dependency_analyzer import ModuleDependencyAnalyzer
+from treeline.since import GitError, git_changed_files, importers_closure, select_since
+from treeline.utils.report import ReportGenerator
+
+def git(directory, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=directory, check=True, capture_output=True,
+    )
+
+@pytest.fixture
+def repo(tmp_path):
+    dir_path = tmp_path / "project"
+    dir_path.mkdir()
+    (dir_path / "base.py").write_text("def helper():\n    return 1\n")
+    (dir_path / "middle.py").write_text("import base\ndef middle():\n    return base.helper()\n")
+    (dir_path / "top.py").write_text("from middle import middle\nmiddle()\n")
+    (dir_path / "other.py").write_text("def other():\n    return 2\n")
+    git(dir_path, "init", "-q")
+    git(dir_path, "add", ".")
+    git(dir_path, "commit", "-q", "-m", "initial")
+    return dir_path
+
+def test_git_changed_files(repo):
+    """Test that modified and untracked Python files are reported."""
+    (repo / "base.py").write_text("def helper():\n    return 3\n")
+    (repo / "new.py").write_text("x = 1\n")
+    (repo / "notes.txt").write_text("not python\n")
+    assert git_changed_files(repo, "HEAD") == [repo / "base.py", repo / "new.py"]
+
+def test_git_changed_files_bad_revision(repo):
+    """Test that an unknown revision raises GitError."""
+    with pytest.raises(GitError):
+        git_changed_files(repo, "no-such-rev")
+
+def test_importers_closure(tmp_path):
+    """Test that transitive importers are included and unrelated modules are not."""
+    root = tmp_path / "proj"
+    (root / "pkg").mkdir(parents=True)
+    sources = {"a.py": "import os\n", "b.py": "import a\n", "c.py": "import b\n", "d.py": "import os\n",
+               "pkg/__init__.py": "import d\n", "e.py": "import pkg\n", "f.py": "import proj.a\n"}
+    for name, source in sources.items():
+        (root / name).write_text(source)
+    analyzer = ModuleDependencyAnalyzer()
+    analyzer.analyze_directory(root)
+    assert importers_closure(analyzer, {"a"}) == {"a", "b", "c", "f"}
+    assert importers_closure(analyzer, {"d"}) == {"d", "pkg.__init__", "e"}
+    assert importers_closure(analyzer, {"gone"}) == {"gone"}
+
+def test_select_since_includes_dependents(repo):
+    """Test that a change to a leaf module selects everything that imports it."""
+    (repo / "base.py").write_text("def helper():\n    return 3\n")
+    selected = select_since(repo, "HEAD", ModuleDependencyAnalyzer())
+    assert sorted(p.name for p in selected) == ["base.py", "middle.py", "top.py"]
+
+def test_select_since_deleted_file(repo):
+    """Test that importers of a deleted module are still selected."""
+    (repo / "base.py").unlink()
+    selected = select_since(repo, "HEAD", ModuleDependencyAnalyzer())
+    assert sorted(p.name for p in selected) == ["middle.py", "top.py"]
+
+def test_select_since_reuses_cache(repo):
+    """Test that only the changed file is parsed when the cache is warm."""
+    select_since(repo, "HEAD", ModuleDependencyAnalyzer(), cache=AnalysisCache(repo))
+    (repo / "other.py").write_text("def other():\n    return 4\n")
+    cache = AnalysisCache(repo)
+    selected = select_since(repo, "HEAD", ModuleDependencyAnalyzer(), cache=cache)
+    assert [p.name for p in selected] == ["other.py"]
+    assert cache.misses == 1
+
+def test_report_since(repo, tmp_path):
+    """Test that a report generated with since only covers the selected files."""
+    (repo / "middle.py").write_text("import base\ndef middle():\n    return base.helper() + 1\n")
+    report = ReportGenerator(repo, output_dir=tmp_path / "reports", since="HEAD")
+    report.analyze()
+    assert sorted(p.name for p in report.analyzed_files) == ["middle.py", "top.py"]
+    assert report.generate_report_json()["metadata"]["since"] == "HEAD"
+
+def test_report_since_keeps_cross_file_context(repo, tmp_path):
+    """Test that duplicates of unselected files are still found from their cached results."""
+    body = "def copied(values):\n    total = 0\n    for value in values:\n        total += value\n    return total\n"
+    (repo / "other.py").write_text("def other():\n    return 2\n\n" + body)
+    git(repo, "commit", "-q", "-am", "add copied")
+    ReportGenerator(repo, output_dir=tmp_path / "reports", cache=AnalysisCache(repo)).analyze()
+    (repo / "top.py").write_text("from middle import middle\nmiddle()\n\n" + body)
+    report = ReportGenerator(repo, output_dir=tmp_path / "reports", cache=AnalysisCache(repo), since="HEAD")
+    report.analyze()
+    assert [p.name for p in report.analyzed_files] == ["top.py"]
+    duplicates = report.enhanced_analyzer.quality_issues["duplication"]
+    assert any("other.py" in issue["description"] and "top.py" in issue["description"] for issue in duplicates)
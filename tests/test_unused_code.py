@@ -48,6 +48,14 @@ def test_collect_imports_and_functions_with_alias():
     assert "operating_system" in checker.imported_names["test.py"]
     assert "ver" in checker.imported_names["test.py"]
 
+def test_future_and_dotted_imports_not_reported(temp_file):
+    checker = UnusedCodeChecker()
+    tree = ast.parse("from __future__ import annotations\nimport os.path\nos.getcwd()\n")
+    quality_issues = defaultdict(list)
+    checker.check(tree, temp_file, quality_issues)
+    checker.finalize_checks(quality_issues)
+    assert not [issue for issue in quality_issues["unused_code"] if issue["description"].startswith("Unused import")]
+
 def test_check_name_usage_basic(temp_file):
     checker = UnusedCodeChecker()
     tree = ast.parse("import os\nos.path.join('a', 'b')\nfunc1()\n")
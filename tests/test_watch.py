@@ -0,0 +1,106 @@
+import pytest
+import time
+from treeline.watch import PollingWatcher, WatchSession, create_watcher, module_cycles_through
+
+@pytest.fixture
+def sample_dir(tmp_path):
+    dir_path = tmp_path / "sample_project"
+    dir_path.mkdir()
+    (dir_path / "file1.py").write_text("""
+import file2
+def func1():
+    file2.func2()
+""")
+    (dir_path / "file2.py").write_text("""
+def func2():
+    pass
+""")
+    return dir_path
+
+@pytest.fixture
+def session(sample_dir):
+    session = WatchSession(sample_dir)
+    session.start()
+    return session
+
+def test_edit_patches_analyzers_in_place(sample_dir, session):
+    """Test that an edited file replaces its previous dependency and quality results."""
+    file2 = sample_dir / "file2.py"
+    file2.write_text("def func3():\n    eval('1')\n")
+    summary = session.apply([file2])
+    dep = session.dependency_analyzer
+    assert summary.changed == [str(file2)]
+    assert "file2.func2" not in dep.function_locations
+    assert "file2.func3" in dep.function_locations
+    assert dep.function_calls["file2.func2"][0]["from_module"] == "file1"
+    assert any("eval" in issue["description"] for issue in summary.issues[str(file2)])
+
+def test_removed_file_is_forgotten(sample_dir, session):
+    """Test that deleting a file drops its module and issues."""
+    file2 = sample_dir / "file2.py"
+    file2.unlink()
+    summary = session.apply([file2])
+    assert summary.removed == [str(file2)]
+    assert "file2" not in session.dependency_analyzer.module_imports
+    assert file2 not in session.files
+
+def test_duplication_updates_incrementally(sample_dir, session):
+    """Test that duplicate groups appear and disappear as files change."""
+    copy = sample_dir / "file3.py"
+    copy.write_text((sample_dir / "file2.py").read_text())
+    summary = session.apply([copy])
+    assert len(summary.duplication) == 1
+    assert len(session.code_analyzer.quality_issues["duplication"]) == 1
+
+    copy.write_text("def other():\n    return 1\n")
+    session.apply([copy])
+    assert session.code_analyzer.quality_issues["duplication"] == []
+
+def test_cycle_through_changed_module(sample_dir, session):
+    """Test that a new import cycle is reported for the changed module."""
+    file2 = sample_dir / "file2.py"
+    file2.write_text("import file1\ndef func2():\n    pass\n")
+    summary = session.apply([file2])
+    assert summary.cycles == [["file1", "file2"]]
+
+def test_module_cycles_through():
+    """Test that only components containing the given modules are returned."""
+    imports = {"a": {"b"}, "b": {"a", "os"}, "c": {"d"}, "d": {"c"}, "e": {"a"}}
+    assert module_cycles_through(imports, ["a"]) == [["a", "b"]]
+    assert module_cycles_through(imports, ["e"]) == []
+
+def test_polling_watcher_detects_changes(sample_dir):
+    """Test that the polling fallback reports new, changed and deleted files."""
+    watcher = PollingWatcher(sample_dir, interval=0.01)
+    new_file = sample_dir / "file3.py"
+    new_file.write_text("x = 1\n")
+    assert watcher.poll(timeout=1) == {new_file}
+    new_file.unlink()
+    assert watcher.poll(timeout=1) == {new_file}
+    assert watcher.poll(timeout=0.05) == set()
+
+def test_default_watcher_detects_write(sample_dir):
+    """Test that the platform watcher (inotify on Linux) sees a saved file."""
+    watcher = create_watcher(sample_dir, interval=0.01)
+    try:
+        target = sample_dir / "file1.py"
+        target.write_text("import file2\n")
+        changed = set()
+        deadline = time.monotonic() + 2
+        while target not in changed and time.monotonic() < deadline:
+            changed |= watcher.poll(timeout=0.2)
+        assert target in changed
+    finally:
+        watcher.close()
+
+def test_unused_functions_refreshed(sample_dir, session):
+    """Test that the cross-file unused-function report follows edits."""
+    unused = lambda: [i["description"] for i in session.code_analyzer.quality_issues["unused_code"]]
+    assert unused().count("Unused function: func2") == 1
+    file2 = sample_dir / "file2.py"
+    file2.write_text("def func2():\n    pass\nfunc2()\n")
+    session.apply([file2])
+    assert "Unused function: func2" not in unused()
+    file2.write_text("def func2():\n    pass\n")
+    session.apply([file2])
+    assert unused().count("Unused function: func2") == 1
@@ -3,7 +3,6 @@ import json
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import traceback
-from concurrent.futures import ProcessPoolExecutor
 import logging
 import re
 import os
@@ -18,6 +17,8 @@ from pydantic import ValidationError
 from treeline.dependency_analyzer import ModuleDependencyAnalyzer
 from treeline.utils.report import ReportGenerator
 from treeline.enhanced_analyzer import EnhancedCodeAnalyzer
+from treeline.discovery import discover_python_files
+from treeline.pipeline import AnalysisPipeline
 from treeline.api.routes.reports import reports_router
 from treeline.api.routes.detailed_metrics import detailed_metrics_router
 
@@ -44,7 +45,7 @@ def extract_id(item):
 
 def calculate_directory_hash(directory: Path) -> str:
     file_hashes = []
-    for file_path in sorted(directory.rglob("*.py")):
+    for file_path in discover_python_files(directory):
         with open(file_path, "rb") as f:
             file_hash = hashlib.sha256(f.read()).hexdigest()
         file_hashes.append(file_hash)
@@ -85,9 +86,6 @@ def save_cache(dir_path: Path, data: Dict[str, Any]) -> None:
     with open(cache_file, "w") as f:
         json.dump(cache_data, f)
 
-def analyze_file_wrapper(file_path, analyzer):
-    return analyzer.analyze_file(file_path)
-
 
 app = FastAPI(
     title="Treeline API",
@@ -138,13 +136,7 @@ async def get_visualization(analyzer: ModuleDependencyAnalyzer = Depends(get_dep
             logger.info("Loaded graph data from cache")
             return cached_data
         else:
-            python_files = list(target_dir.rglob("*.py"))
-            with ProcessPoolExecutor(max_workers=4) as executor:
-                futures = [executor.submit(analyze_file_wrapper, f, code_analyzer) for f in python_files]
-                results = [f.result() for f in futures]
-            all_results = [item for sublist in results for item in sublist if item is not None]
-
-            dependency_analyzer.analyze_directory(target_dir)
+            AnalysisPipeline(dependency_analyzer, code_analyzer).run(target_dir)
             nodes, links = dependency_analyzer.get_graph_data_with_quality(code_analyzer)
             graph_data = {"nodes": nodes, "links": links}
             save_cache(target_dir, graph_data)
@@ -308,12 +300,7 @@ async def get_node_by_path(file_path: str):
             dependency_analyzer = ModuleDependencyAnalyzer()
             enhanced_analyzer = EnhancedCodeAnalyzer()
             
-            dependency_analyzer.analyze_directory(project_root)
-            python_files = list(project_root.rglob("*.py"))
-            
-            with ProcessPoolExecutor(max_workers=4) as executor:
-                futures = [executor.submit(analyze_file_wrapper, f, enhanced_analyzer) for f in python_files]
-                results = [f.result() for f in futures]
+            AnalysisPipeline(dependency_analyzer, enhanced_analyzer).run(project_root)
             
             nodes, links = dependency_analyzer.get_graph_data()
             indices = build_path_indices(nodes)
@@ -450,6 +437,29 @@ async def get_node_by_path(file_path: str):
             content={"detail": f"Error fetching node details: {str(e)}"}
         )
 
+_search_analyzers: Dict[Path, ModuleDependencyAnalyzer] = {}
+
+@app.get("/api/search")
+async def search_symbols(
+    q: str = Query(..., min_length=1, description="Name, prefix or approximate name to look for"),
+    limit: int = Query(20, ge=1, le=200),
+    refresh: bool = Query(False, description="Re-analyze the project before searching"),
+):
+    """Rank the module, class and function names matching ``q``."""
+    try:
+        with open(".treeline_dir", "r") as f:
+            target_dir = Path(f.read().strip()).resolve()
+    except FileNotFoundError:
+        target_dir = Path(".").resolve()
+
+    analyzer = _search_analyzers.get(target_dir)
+    if analyzer is None or refresh:
+        # Re-analysis reuses the analyzer so only changed modules are re-indexed.
+        analyzer = analyzer or ModuleDependencyAnalyzer()
+        analyzer.analyze_directory(target_dir)
+        _search_analyzers[target_dir] = analyzer
+    return {"query": q, "results": analyzer.search_symbols(q, limit)}
+
 def is_safe_path(base_dir: Path, requested_path: Path) -> bool:
     base_dir = base_dir.resolve()
     requested_path = requested_path.resolve()
@@ -466,9 +476,10 @@ async def get_module_metrics(module_path: str):
     if module_path not in dependency_analyzer.module_metrics:
         raise HTTPException(status_code=404, detail=f"Module {module_path} not found")
 
+    file_path = dependency_analyzer.file_for_module(module_path)
     return {
         "metrics": dependency_analyzer.module_metrics[module_path],
-        "quality": code_analyzer.analyze_file(Path(module_path)),
+        "quality": code_analyzer.analyze_file(Path(file_path)) if file_path else [],
     }
 
 def analyze_directory(directory: Path):
@@ -479,11 +490,7 @@ def analyze_directory(directory: Path):
     dependency_analyzer = ModuleDependencyAnalyzer()
     enhanced_analyzer = EnhancedCodeAnalyzer()
     
-    dependency_analyzer.analyze_directory(directory)
-    python_files = list(directory.rglob("*.py"))
-    with ProcessPoolExecutor(max_workers=4) as executor:
-        futures = [executor.submit(analyze_file_wrapper, f, enhanced_analyzer) for f in python_files]
-        [f.result() for f in futures]
+    AnalysisPipeline(dependency_analyzer, enhanced_analyzer).run(directory)
     
     current_directory = directory
     return dependency_analyzer, enhanced_analyzer
@@ -1,8 +1,8 @@
 from pathlib import Path
 from typing import Tuple
-from concurrent.futures import ProcessPoolExecutor
 from treeline.dependency_analyzer import ModuleDependencyAnalyzer
 from treeline.enhanced_analyzer import EnhancedCodeAnalyzer
+from treeline.pipeline import AnalysisPipeline
 
 def get_project_path():
     """Returns the project path from .treeline_dir or current directory"""
@@ -20,14 +20,6 @@ def get_analyzers(path: Path = None) -> Tuple[ModuleDependencyAnalyzer, Enhanced
     dependency_analyzer = ModuleDependencyAnalyzer()
     enhanced_analyzer = EnhancedCodeAnalyzer()
     
-    dependency_analyzer.analyze_directory(path)
-    python_files = list(path.rglob("*.py"))
-    
-    def analyze_file_wrapper(file_path, analyzer):
-        return analyzer.analyze_file(file_path)
-    
-    with ProcessPoolExecutor(max_workers=4) as executor:
-        futures = [executor.submit(analyze_file_wrapper, f, enhanced_analyzer) for f in python_files]
-        [f.result() for f in futures]
+    AnalysisPipeline(dependency_analyzer, enhanced_analyzer).run(path)
     
     return dependency_analyzer, enhanced_analyzer
\ No newline at end of file
@@ -10,6 +10,10 @@ from collections import Counter
     
 from fastapi import APIRouter, Query, HTTPException, Path as FastAPIPath, Depends
 from treeline.models.graphing import DetailedAnalysisResponse, FileMetricsDetail, ComplexityBreakdown
+from treeline.config_manager import get_config
+from treeline.discovery import discover_python_files
+from treeline.optimization.graph import EdgeKind, cyclic_components, simple_cycles
+from treeline.pipeline import ParentIndex
 
 detailed_metrics_router = APIRouter(prefix="/api/detailed-metrics", tags=["detailed_metrics"])
 files_router = APIRouter(prefix="/api/file-metrics", tags=["file_metrics"])
@@ -29,12 +33,13 @@ async def get_detailed_metrics(
     
     from treeline.dependency_analyzer import ModuleDependencyAnalyzer
     from treeline.enhanced_analyzer import EnhancedCodeAnalyzer
+    from treeline.pipeline import AnalysisPipeline
     
     dep_analyzer = ModuleDependencyAnalyzer()
     code_analyzer = EnhancedCodeAnalyzer()
     
-    dep_analyzer.analyze_directory(target_dir)
-    file_results = code_analyzer.analyze_directory(target_dir)
+    analyses = AnalysisPipeline(dep_analyzer, code_analyzer).run(target_dir)
+    file_results = [element for analysis in analyses for element in analysis.elements]
     
     files_data = {}
     issues_summary = defaultdict(int)
@@ -332,8 +337,9 @@ async def get_complexity_breakdown(
     target_dir = Path(directory).resolve()
 
     class ComplexityBreakdownAnalyzer(ast.NodeVisitor):
-        def __init__(self):
+        def __init__(self, parents: ParentIndex):
             self.breakdown = Counter()
+            self.parents = parents
             
         def visit_If(self, node):
             self.breakdown['if_statements'] += 1
@@ -388,13 +394,13 @@ async def get_complexity_breakdown(
             self.generic_visit(node)
             
         def visit_FunctionDef(self, node):
-            parent = getattr(node, 'parent', None)
+            parent = self.parents.parent(node)
             if parent and isinstance(parent, ast.FunctionDef):
                 self.breakdown['nested_functions'] += 1
             self.generic_visit(node)
             
         def visit_ClassDef(self, node):
-            parent = getattr(node, 'parent', None)
+            parent = self.parents.parent(node)
             if parent and isinstance(parent, ast.ClassDef):
                 self.breakdown['nested_classes'] += 1
             self.generic_visit(node)
@@ -402,18 +408,14 @@ async def get_complexity_breakdown(
     total_breakdown = Counter()
     file_breakdowns = {}
     
-    for file_path in target_dir.rglob("*.py"):
+    for file_path in discover_python_files(target_dir):
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
                 
             tree = ast.parse(content)
             
-            for parent in ast.walk(tree):
-                for child in ast.iter_child_nodes(parent):
-                    child.parent = parent
-            
-            analyzer = ComplexityBreakdownAnalyzer()
+            analyzer = ComplexityBreakdownAnalyzer(ParentIndex(tree))
             analyzer.visit(tree)
             
             total_breakdown.update(analyzer.breakdown)
@@ -477,16 +479,68 @@ async def get_detailed_dependency_graph(
                                 "methods": list(info.get("methods", {}).keys())
                             })
     
+    config = get_config()
+    import_graph = dep_analyzer.build_graph().filtered(EdgeKind.IMPORTS)
+    cycles = simple_cycles(
+        import_graph,
+        max_cycles=config.get("MAX_CYCLES_REPORTED", 100),
+        max_length=config.get("MAX_CYCLE_LENGTH", 10) or None,
+    )
+    
     return {
         "nodes": nodes,
         "links": links,
         "entry_points": dep_analyzer.get_entry_points(),
         "core_components": dep_analyzer.get_core_components(),
-        # Cycles detection would require additional code
-        "cycles": [],
+        "cycles": [[import_graph.name_of(node) for node in cycle] for cycle in cycles],
+        "cyclic_components": [
+            sorted(import_graph.name_of(node) for node in component)
+            for component in cyclic_components(import_graph)
+        ],
         "module_metrics": dep_analyzer.module_metrics
     }
 
+@detailed_metrics_router.get("/impact")
+async def get_module_impact(
+    module: str = Query(..., description="Dotted module name"),
+    directory: str = Query(".", description="Directory to analyze")
+):
+    """
+    Get the modules transitively affected by changing a module, and the ones it depends on.
+    """
+    from treeline.dependency_analyzer import ModuleDependencyAnalyzer
+
+    dep_analyzer = ModuleDependencyAnalyzer()
+    dep_analyzer.analyze_directory(Path(directory).resolve())
+    result = dep_analyzer.impact(module)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Module {module} not found")
+    return result
+
+@detailed_metrics_router.get("/depends")
+async def get_module_depends(
+    source: str = Query(..., description="Module that may depend on target"),
+    target: str = Query(..., description="Module that may be depended on"),
+    directory: str = Query(".", description="Directory to analyze")
+):
+    """
+    Check whether one module transitively imports another.
+    """
+    from treeline.dependency_analyzer import ModuleDependencyAnalyzer
+
+    dep_analyzer = ModuleDependencyAnalyzer()
+    dep_analyzer.analyze_directory(Path(directory).resolve())
+    source_module = dep_analyzer.module_index.resolve(source)
+    target_module = dep_analyzer.module_index.resolve(target)
+    if source_module is None or target_module is None:
+        missing = source if source_module is None else target
+        raise HTTPException(status_code=404, detail=f"Module {missing} not found")
+    return {
+        "source": source_module,
+        "target": target_module,
+        "depends": dep_analyzer.import_reachability().reaches(source_module, target_module),
+    }
+
 @detailed_metrics_router.get("/issues-by-category")
 async def get_issues_by_category(
     directory: str = Query(".", description="Directory to analyze")
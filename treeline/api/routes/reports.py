@@ -8,7 +8,7 @@ import json
 from treeline.dependency_analyzer import ModuleDependencyAnalyzer
 from treeline.enhanced_analyzer import EnhancedCodeAnalyzer
 from treeline.utils.report import ReportGenerator
-from concurrent.futures import ProcessPoolExecutor
+from treeline.pipeline import AnalysisPipeline
 
 reports_router = APIRouter(prefix="/reports", tags=["reports"])
 static_path = Path(__file__).parent.parent / "static"
@@ -26,9 +26,6 @@ def is_safe_path(base_dir: Path, requested_path: Path) -> bool:
     except ValueError:
         return False
         
-def analyze_file_wrapper(file_path, analyzer):
-    return analyzer.analyze_file(file_path)
-
 def analyze_directory(directory: Path):
     global dependency_analyzer, enhanced_analyzer, current_directory
     if current_directory == directory and dependency_analyzer and enhanced_analyzer:
@@ -37,11 +34,7 @@ def analyze_directory(directory: Path):
     dependency_analyzer = ModuleDependencyAnalyzer()
     enhanced_analyzer = EnhancedCodeAnalyzer()
     
-    dependency_analyzer.analyze_directory(directory)
-    python_files = list(directory.rglob("*.py"))
-    with ProcessPoolExecutor(max_workers=4) as executor:
-        futures = [executor.submit(analyze_file_wrapper, f, enhanced_analyzer) for f in python_files]
-        [f.result() for f in futures]
+    AnalysisPipeline(dependency_analyzer, enhanced_analyzer).run(directory)
     
     current_directory = directory
     return dependency_analyzer, enhanced_analyzer
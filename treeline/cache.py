@@ -0,0 +1,118 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import xxhash
+
+# Bump whenever the shape or meaning of cached analyzer output changes.
+CACHE_VERSION = 7
+CACHE_DIR_NAME = ".treeline_cache"
+# Config keys that only affect scheduling, not results, so they don't invalidate entries.
+SCHEDULING_KEYS = ("PARALLEL_CHUNK_BYTES",)
+
+
+def hash_bytes(data: bytes) -> str:
+    return xxhash.xxh64(data).hexdigest()
+
+
+def config_digest(*configs: Optional[Dict]) -> str:
+    payload = json.dumps([config or {} for config in configs], sort_keys=True, default=str)
+    return hash_bytes(payload.encode("utf-8"))
+
+
+class AnalysisCache:
+    """
+    On-disk cache of per-file analysis results.
+
+    Each file gets one JSON entry under ``<root>/.treeline_cache/files``, keyed by
+    its path relative to the analyzed root. An entry is only reused when the
+    file's content hash, ``CACHE_VERSION`` and the analyzer config all match.
+    Size and mtime are stored too, so unchanged files don't have to be re-read
+    to be hashed.
+    """
+
+    def __init__(self, root: Path, config: Dict = None, cache_dir: Path = None):
+        self.root = Path(root).resolve()
+        self.cache_dir = Path(cache_dir) if cache_dir else self.root / CACHE_DIR_NAME
+        self.files_dir = self.cache_dir / "files"
+        self.config_hash = config_digest({k: v for k, v in (config or {}).items() if k not in SCHEDULING_KEYS})
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, rel_path: str) -> Path:
+        return self.files_dir / f"{hash_bytes(rel_path.encode('utf-8'))}.json"
+
+    def relative_key(self, file_path: Union[str, Path]) -> str:
+        path = Path(file_path).resolve()
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def _read_entry(self, rel_path: str) -> Optional[Dict[str, Any]]:
+        entry_path = self._entry_path(rel_path)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, PermissionError, json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        if (
+            entry.get("version") != CACHE_VERSION
+            or entry.get("config") != self.config_hash
+            or entry.get("path") != rel_path
+        ):
+            return None
+        return entry
+
+    def lookup(self, file_path: Union[str, Path], stat: os.stat_result = None) -> Optional[Dict[str, Any]]:
+        """Return the entry for ``file_path`` if the file hasn't changed on disk since it was stored."""
+        entry = self._read_entry(self.relative_key(file_path))
+        if entry is None:
+            return None
+        if stat is None:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return None
+        if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry
+        return None
+
+    def get(self, file_path: Union[str, Path], content_hash: str) -> Optional[Dict[str, Any]]:
+        entry = self._read_entry(self.relative_key(file_path))
+        if entry is None or entry.get("hash") != content_hash:
+            return None
+        return entry
+
+    def put(self, file_path: Union[str, Path], content_hash: str, results: Dict[str, Any], stat: os.stat_result = None):
+        """Store ``results`` for ``file_path``, keeping sections of a still-valid entry that weren't recomputed."""
+        rel_path = self.relative_key(file_path)
+        existing = self.get(file_path, content_hash)
+        entry = existing if existing is not None else {}
+        entry.update(results)
+        entry.update({
+            "version": CACHE_VERSION,
+            "config": self.config_hash,
+            "path": rel_path,
+            "hash": content_hash,
+        })
+        if stat is not None:
+            entry["size"] = stat.st_size
+            entry["mtime_ns"] = stat.st_mtime_ns
+
+        try:
+            self.files_dir.mkdir(parents=True, exist_ok=True)
+            entry_path = self._entry_path(rel_path)
+            tmp_path = entry_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, entry_path)
+        except (PermissionError, IOError):
+            pass
+
+    def invalidate(self, file_path: Union[str, Path]):
+        try:
+            self._entry_path(self.relative_key(file_path)).unlink()
+        except FileNotFoundError:
+            pass
@@ -3,6 +3,7 @@ from collections import defaultdict
 from pathlib import Path
 from typing import Dict
 
+from treeline.checkers.engine import CheckContext, CheckerEngine, ScopeStats
 from treeline.models.enhanced_analyzer import QualityIssue
 from treeline.utils.metrics import calculate_cyclomatic_complexity, calculate_cognitive_complexity
 from treeline.config_manager import get_config
@@ -14,23 +15,27 @@ class ComplexityAnalyzer:
         self.max_cognitive = self.config.get("MAX_COGNITIVE_COMPLEXITY", 15)
 
     def check(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict):
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-                cc = self._calculate_cyclomatic_complexity(node)
-                cog = self._calculate_cognitive_complexity(node)
-                element_type = "function" if isinstance(node, ast.FunctionDef) else "class"
-                if cc > self.max_cyclomatic:
-                    quality_issues["complexity"].append(QualityIssue(
-                        description=f"High cyclomatic complexity ({cc} > {self.max_cyclomatic}) in {element_type} '{node.name}'",
-                        file_path=str(file_path),
-                        line=node.lineno
-                    ).__dict__)
-                if cog > self.max_cognitive:
-                    quality_issues["complexity"].append(QualityIssue(
-                        description=f"High cognitive complexity ({cog} > {self.max_cognitive}) in {element_type} '{node.name}'",
-                        file_path=str(file_path),
-                        line=node.lineno
-                    ).__dict__)
+        CheckerEngine([self]).run(tree, file_path, quality_issues)
+
+    def register(self, engine: CheckerEngine):
+        engine.on_leave((ast.FunctionDef, ast.ClassDef), self._check_scope)
+
+    def _check_scope(self, node: ast.AST, ctx: CheckContext, stats: ScopeStats):
+        cc = stats.cyclomatic
+        cog = stats.cognitive
+        element_type = "function" if isinstance(node, ast.FunctionDef) else "class"
+        if cc > self.max_cyclomatic:
+            ctx.quality_issues["complexity"].append(QualityIssue(
+                description=f"High cyclomatic complexity ({cc} > {self.max_cyclomatic}) in {element_type} '{node.name}'",
+                file_path=str(ctx.file_path),
+                line=node.lineno
+            ).__dict__)
+        if cog > self.max_cognitive:
+            ctx.quality_issues["complexity"].append(QualityIssue(
+                description=f"High cognitive complexity ({cog} > {self.max_cognitive}) in {element_type} '{node.name}'",
+                file_path=str(ctx.file_path),
+                line=node.lineno
+            ).__dict__)
 
     def _calculate_cyclomatic_complexity(self, node: ast.AST) -> int:
         return calculate_cyclomatic_complexity(node)
@@ -1,60 +1,800 @@
+from array import array
 from collections import defaultdict
+from operator import eq
 from pathlib import Path
-from typing import Dict
+import base64
+import json
+import os
+from typing import Dict, List, Optional, Set, Tuple, Union
 import ast
+from ast import AST
+
+import xxhash
+
+from treeline.cache import CACHE_VERSION, AnalysisCache, config_digest, hash_bytes
+from treeline.discovery import discover_python_files
 from treeline.models.enhanced_analyzer import QualityIssue
+from treeline.pipeline import ParsedFile, decode_source, parse_file
+
+DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# MinHash signature length and the number of tokens per shingle.
+SIGNATURE_SIZE = 128
+SHINGLE_SIZE = 5
+# Bucket-mates verified per signature and band; bounds the work on huge buckets.
+MAX_BUCKET_CANDIDATES = 32
+
+_MASK = (1 << 64) - 1
+_SHINGLE_BASE = 0x100000001B3
+_EMPTY = 1 << 32
+# Detector state kept under the cache directory between runs.
+STATE_FILE_NAME = "duplication.json"
+
+Location = Tuple[str, int]
+
+
+def walk_tree(tree: ast.AST, min_lines: int) -> Tuple[List[str], Dict[ast.AST, Tuple[int, int]], List[List]]:
+    """
+    Walk ``tree`` once for exact tokens and structural subtree hashes.
+
+    ``tokens`` are the pre-order node types, identifiers and constants, with
+    a ``)`` closing every node so the sequence pins down the tree's shape.
+    Positions and expression contexts are left out, so formatting and
+    comments don't matter. Every function and class covers a contiguous range
+    of the tokens, returned as ``spans`` in pre-order.
+
+    Every node, and every list of child nodes, is also hashed bottom-up from
+    its children's hashes, with identifiers dropped and constants reduced to
+    their type, so renamed copies hash alike. ``blocks`` holds
+    ``[hash, node, line, end_line, enclosing block index]`` for compound
+    statements and runs of two or more statements spanning at least
+    ``min_lines`` lines.
+    """
+    tokens = []
+    spans = {}
+    blocks = []
+    hashes = []
+    open_blocks = []
+    stack = [(tree, None)]
+    while stack:
+        node, closing = stack.pop()
+        if closing is not None:
+            mark, header, block = closing
+            if not isinstance(node, list):
+                tokens.append(")")
+                if isinstance(node, DEFINITIONS):
+                    spans[node] = (spans[node], len(tokens))
+            digest = xxhash.xxh64_intdigest(header.encode("utf-8") + array("Q", hashes[mark:]).tobytes())
+            del hashes[mark:]
+            hashes.append(digest)
+            if block is not None:
+                blocks[block][0] = digest
+                open_blocks.pop()
+            continue
+
+        block = None
+        children = []
+        if isinstance(node, list):
+            header = "["
+            children = node
+            if len(node) > 1 and isinstance(node[0], ast.stmt):
+                block = _open_block(blocks, open_blocks, node, node[0].lineno, node[-1].end_lineno, min_lines)
+        else:
+            if isinstance(node, DEFINITIONS):
+                spans[node] = len(tokens)
+            name = type(node).__name__
+            tokens.append(name)
+            header = [name]
+            for field in node._fields:
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    items = [item for item in value if isinstance(item, AST)]
+                    if items:
+                        children.append(items)
+                    for item in value:
+                        if not isinstance(item, AST):
+                            tokens.append(repr(item))
+                            header.append("s" if isinstance(item, str) else repr(item))
+                elif isinstance(value, AST):
+                    if not isinstance(value, ast.expr_context):
+                        children.append(value)
+                elif value is None:
+                    header.append("-")
+                else:
+                    tokens.append(repr(value))
+                    if isinstance(node, ast.Constant):
+                        header.append(type(value).__name__)
+                    else:
+                        header.append("s" if isinstance(value, str) else repr(value))
+            header = " ".join(header)
+            if isinstance(node, ast.stmt) and hasattr(node, "body"):
+                block = _open_block(blocks, open_blocks, node, node.lineno, node.end_lineno, min_lines)
+
+        stack.append((node, (len(hashes), header, block)))
+        for child in reversed(children):
+            stack.append((child, None))
+    return tokens, spans, blocks
+
+
+def _open_block(blocks: List[List], open_blocks: List[int], node, line: int, end_line: int,
+                min_lines: int) -> Optional[int]:
+    if end_line - line + 1 < min_lines:
+        return None
+    blocks.append([None, node, line, end_line, open_blocks[-1] if open_blocks else None])
+    open_blocks.append(len(blocks) - 1)
+    return len(blocks) - 1
+
+
+def shingle_hashes(tokens: List[str], width: int = SHINGLE_SIZE) -> List[int]:
+    """Hash of every run of ``width`` consecutive tokens, by a rolling polynomial hash."""
+    token_hashes = {}
+    values = []
+    for token in tokens:
+        value = token_hashes.get(token)
+        if value is None:
+            value = token_hashes[token] = xxhash.xxh64_intdigest(token.encode("utf-8"))
+        values.append(value)
+
+    power = pow(_SHINGLE_BASE, width, 1 << 64)
+    rolling = 0
+    for value in values[:width - 1]:
+        rolling = (rolling * _SHINGLE_BASE + value) & _MASK
+    shingles = []
+    for index in range(width - 1, len(values)):
+        rolling = (rolling * _SHINGLE_BASE + values[index]) & _MASK
+        if index >= width:
+            rolling = (rolling - values[index - width] * power) & _MASK
+        # Mix so the low bits depend on every token, not just the last.
+        mixed = ((rolling ^ (rolling >> 31)) * 0x9E3779B97F4A7C15) & _MASK
+        shingles.append(mixed ^ (mixed >> 29))
+    return shingles
+
+
+def normalized_lines(lines: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    Lines stripped of indentation, trailing whitespace and comments, with the
+    1-based number of each. Blank lines and import statements are left out,
+    so they neither start nor break up a duplicated range.
+    """
+    texts = []
+    numbers = []
+    in_parens = continued = False
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if "#" in text:
+            text = _strip_comment(text)
+        if not text:
+            continue
+        if in_parens or continued or text.startswith(("import ", "from ")):
+            in_parens = ")" not in text and (in_parens or "(" in text)
+            continued = text.endswith("\\")
+            continue
+        texts.append(text)
+        numbers.append(number)
+    return texts, numbers
+
+
+def _strip_comment(text: str) -> str:
+    code = text[:text.index("#")]
+    if "'" not in code and '"' not in code:
+        return code.rstrip()
+    quote = None
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if quote:
+            if char == "\\":
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "#":
+            return text[:index].rstrip()
+        index += 1
+    return text
+
+
+def _pack(typecode: str, values) -> str:
+    return base64.b64encode(array(typecode, values).tobytes()).decode("ascii")
+
+
+def _unpack(typecode: str, packed: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(packed))
+    return values
+
+
+def minhash(shingles: List[int], size: int = SIGNATURE_SIZE) -> List[int]:
+    """
+    One-permutation MinHash signature of a set of shingle hashes.
+
+    Each shingle is hashed once: its top bits pick a bin and the bin keeps
+    its smallest low 32 bits. Empty bins borrow the next filled bin's value,
+    offset by the distance, so signatures of small sets still compare well.
+    """
+    bits = size.bit_length() - 1
+    signature = [_EMPTY] * size
+    for shingle in shingles:
+        slot = shingle >> (64 - bits)
+        value = shingle & 0xFFFFFFFF
+        if value < signature[slot]:
+            signature[slot] = value
+    if _EMPTY in signature and len(set(signature)) > 1:
+        filled = list(signature)
+        for slot in range(size):
+            distance = 0
+            while filled[(slot + distance) % size] == _EMPTY:
+                distance += 1
+            if distance:
+                signature[slot] = (filled[(slot + distance) % size] + distance * 0x9E3779B1) & 0xFFFFFFFF
+    return signature
+
+
+def similarity(first, second) -> float:
+    """The fraction of equal MinHash slots, an estimate of the Jaccard similarity."""
+    return sum(map(eq, first, second)) / len(first)
+
+
+def lsh_bands(threshold: float, size: int = SIGNATURE_SIZE) -> Tuple[int, int]:
+    """
+    ``(bands, rows)`` splitting a signature for locality-sensitive hashing.
+
+    Pairs become candidates once they agree on every row of some band. The
+    chance of that rises steeply around ``(1 / bands) ** (1 / rows)``, which
+    is put just below ``threshold`` so few true matches are missed while
+    clearly different functions rarely need verifying.
+    """
+    best = (size, 1)
+    for rows in range(1, size + 1):
+        if size % rows == 0 and (rows / size) ** (1 / rows) <= threshold - 0.05:
+            best = (size // rows, rows)
+    return best
+
 
 class DuplicationDetector:
+    """
+    Reports duplicated, structurally cloned and near-duplicate code.
+
+    Files are fingerprinted independently (in the pipeline's workers): one
+    walk per file gives every definition an exact digest, every function of
+    at least ``MIN_DUPLICATED_BLOCK_SIZE`` lines a MinHash signature, and
+    every block of that size a structural hash that ignores names and
+    literals. Exact groups share a digest and structural clones share a
+    block hash. Near duplicates are found by locality-sensitive hashing:
+    signatures are cut into bands, functions sharing a band bucket are
+    candidates, and candidates whose estimated similarity reaches
+    ``MIN_DUPLICATION_SIMILARITY`` are reported as pairs.
+
+    Copy-pasted lines are found from a Rabin-Karp hash of every window of
+    ``MAX_DUPLICATED_LINES`` normalized lines. A table of window hashes is
+    shared by all files; runs of a file's windows that occur elsewhere merge
+    into maximal ranges, and files with more than ``MAX_DUPLICATED_BLOCKS``
+    ranges are reported. Both passes are linear in the number of lines.
+    """
+
     def __init__(self, config: Dict = None):
         self.config = config or {"MIN_DUPLICATED_BLOCK_SIZE": 5}
+        self.min_block_lines = self.config.get("MIN_DUPLICATED_BLOCK_SIZE", 5)
+        self.threshold = self.config.get("MIN_DUPLICATION_SIMILARITY", 0.8)
+        self.bands, self.rows = lsh_bands(self.threshold)
+        self.window_lines = max(1, self.config.get("MAX_DUPLICATED_LINES", 6))
+        self.max_blocks = self.config.get("MAX_DUPLICATED_BLOCKS", 2)
+        self.function_defs = defaultdict(list)
+        self.class_defs = defaultdict(list)
+        self.file_fingerprints = {}
+        self.signatures: Dict[Location, Tuple[str, array]] = {}
+        self.buckets: Dict[Tuple[int, int], List[Location]] = defaultdict(list)
+        self.clones: Dict[str, List[Tuple]] = defaultdict(list)
+        self.structures: Dict[Location, str] = {}
+        # Line windows: hash -> packed (file id, position), or a list of them once repeated.
+        self.windows: Dict[int, Union[int, List[int]]] = {}
+        self.line_files: Dict[str, Tuple[int, array, array]] = {}
+        self.line_paths: Dict[int, str] = {}
+        self._next_line_file = 0
+        self.reported = {}
 
-    def analyze_directory(self, directory: Path, quality_issues: defaultdict):
-
-        function_defs = defaultdict(list)
-        class_defs = defaultdict(list)
+    def analyze_directory(self, directory: Path, quality_issues: defaultdict, cache: AnalysisCache = None):
+        """
+        Report duplication across every Python file under ``directory``.
 
-        for file_path in directory.rglob("*.py"):
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
+        With ``cache`` the fingerprints and reported groups are kept in the
+        cache directory, keyed by each file's content hash. Later runs only
+        fingerprint files that changed, and only the groups those files were
+        or are now part of get re-reported.
+        """
+        if cache is not None:
+            self._analyze_incremental(directory, quality_issues, cache)
+            return
 
+        for file_path in discover_python_files(directory):
             try:
-                tree = ast.parse(content)
+                parsed = parse_file(file_path)
             except SyntaxError:
-                continue  
-
-            for node in ast.walk(tree):
-                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                    func_code = ast.unparse(node).strip()
-                    normalized_code = "\n".join(line.strip() for line in func_code.splitlines())
-                    function_defs[normalized_code].append((str(file_path), node.lineno))
-                
-                elif isinstance(node, ast.ClassDef):
-                    class_code = ast.unparse(node).strip()
-                    normalized_code = "\n".join(line.strip() for line in class_code.splitlines())
-                    class_defs[normalized_code].append((str(file_path), node.lineno))
-
-        for func_code, locations in function_defs.items():
-            if len(locations) > 1:  
-                description = "Duplicated function found at " + ", ".join(
-                    [f"{file}:{line}" for file, line in locations]
-                )
-                quality_issues["duplication"].append(
-                    QualityIssue(
-                        description=description,
-                        file_path=locations[0][0],
-                        line=locations[0][1]
-                    ).__dict__
-                )
-
-        for class_code, locations in class_defs.items():
-            if len(locations) > 1:  
-                description = "Duplicated class found at " + ", ".join(
-                    [f"{file}:{line}" for file, line in locations]
-                )
-                quality_issues["duplication"].append(
-                    QualityIssue(
-                        description=description,
-                        file_path=locations[0][0],
-                        line=locations[0][1]
-                    ).__dict__
-                )
\ No newline at end of file
+                continue
+
+            self.add_parsed(parsed)
+
+        self.report(quality_issues)
+
+    def _analyze_incremental(self, directory: Path, quality_issues: defaultdict, cache: AnalysisCache):
+        state_path = cache.cache_dir / STATE_FILE_NAME
+        files = self._load_state(state_path)
+        if files is None:
+            files = {}
+            self._reset()
+        quality_issues["duplication"].extend(self.reported.values())
+
+        changed = []
+        current = {}
+        restated = False
+        for file_path in discover_python_files(directory):
+            key = cache.relative_key(file_path)
+            entry = files.pop(key, None)
+            if entry is not None and entry["path"] != str(file_path):
+                files[key] = entry
+                entry = None
+            try:
+                stat = os.stat(file_path)
+                if entry is None or (entry.get("size"), entry.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+                    with open(file_path, "rb") as f:
+                        raw = f.read()
+                    content_hash = hash_bytes(raw)
+                    if entry is None or entry.get("hash") != content_hash:
+                        changed.append((file_path, raw))
+                        if entry is not None:
+                            files[key] = entry
+                    entry = {"path": str(file_path), "hash": content_hash,
+                             "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                    restated = True
+            except OSError:
+                if entry is not None:
+                    files[key] = entry
+                continue
+            current[key] = entry
+
+        affected = set()
+        for entry in files.values():
+            affected |= self.remove_file(entry["path"])
+        for file_path, raw in changed:
+            try:
+                parsed = ParsedFile.from_source(decode_source(raw), file_path)
+                fingerprints = self.fingerprint(parsed)
+            except (SyntaxError, ValueError, UnicodeDecodeError):
+                fingerprints = {"functions": [], "classes": [], "signatures": [], "blocks": [], "lines": None}
+            self.add_fingerprints(str(file_path), fingerprints)
+            affected |= self.groups_for(str(file_path))
+        self.refresh(quality_issues, affected)
+        if restated or files:
+            self._save_state(state_path, current)
+
+    def report_cached(self, quality_issues: defaultdict, cache: AnalysisCache, keep_state: bool = False):
+        """
+        Like ``report``, but starting from the groups reported by the last run
+        with the same ``cache``.
+
+        The fingerprints added since are compared with the ones saved then, and
+        only the groups of files that changed, appeared or disappeared are
+        re-reported, so the cost follows the size of the change rather than of
+        the tree.
+        """
+        state_path = cache.cache_dir / STATE_FILE_NAME
+        state = self._read_state(state_path)
+        if state is None:
+            self.report(quality_issues, keep_state=True)
+            changed = True
+        else:
+            saved = {entry["path"]: entry["fingerprints"] for entry in state["files"].values()}
+            self.reported = {_key_from_json(key): issue for key, issue in state["reported"]}
+            affected = set()
+            for file_path, fingerprints in saved.items():
+                if self.file_fingerprints.get(file_path) != fingerprints:
+                    affected |= self._saved_groups(file_path, fingerprints)
+            for file_path, fingerprints in self.file_fingerprints.items():
+                if saved.get(file_path) != fingerprints:
+                    affected |= self.groups_for(file_path)
+            if self.reported:
+                quality_issues["duplication"].extend(self.reported.values())
+            self.refresh(quality_issues, affected)
+            changed = bool(affected) or saved.keys() != self.file_fingerprints.keys()
+        if changed:
+            self._save_state(state_path, {
+                cache.relative_key(file_path): {"path": file_path} for file_path in self.file_fingerprints
+            })
+        if not keep_state:
+            self._reset()
+
+    def _saved_groups(self, file_path: str, fingerprints: Dict[str, List]) -> Set[Tuple]:
+        """Groups ``file_path`` was part of when it had the saved ``fingerprints``, for ``report_cached``."""
+        groups = {(kind, digest) for kind in ("functions", "classes") for digest, _ in fingerprints[kind]}
+        groups |= {("clones", block[0]) for block in fingerprints.get("blocks", ())}
+        groups |= {key for key in self.reported if key[0] == "similar" and file_path in (key[1][0], key[2][0])}
+        groups.add(("lines", file_path))
+        if fingerprints.get("lines"):
+            # Files that shared a window with the old copy still hold it in the table.
+            table = self.windows
+            for window in set(_unpack("Q", fingerprints["lines"][0])):
+                existing = table.get(window)
+                if existing is not None:
+                    locations = existing if type(existing) is list else (existing,)
+                    groups.update(("lines", self.line_paths[location >> 32]) for location in locations)
+        return groups
+
+    def _read_state(self, state_path: Path) -> Optional[Dict]:
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, PermissionError, json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        if state.get("version") != CACHE_VERSION or state.get("config") != config_digest(self.config):
+            return None
+        return state
+
+    def _load_state(self, state_path: Path) -> Optional[Dict[str, Dict]]:
+        """Restore fingerprints and reported groups saved by ``_save_state``; returns the file entries."""
+        state = self._read_state(state_path)
+        if state is None:
+            return None
+        self._reset()
+        for entry in state["files"].values():
+            self.add_fingerprints(entry["path"], entry.pop("fingerprints"))
+        self.reported = {_key_from_json(key): issue for key, issue in state["reported"]}
+        return state["files"]
+
+    def _save_state(self, state_path: Path, files: Dict[str, Dict]):
+        for entry in files.values():
+            entry["fingerprints"] = self.file_fingerprints[entry["path"]]
+        state = {
+            "version": CACHE_VERSION,
+            "config": config_digest(self.config),
+            "files": files,
+            "reported": list(self.reported.items()),
+        }
+        try:
+            state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = state_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, state_path)
+        except (PermissionError, IOError):
+            pass
+        finally:
+            for entry in files.values():
+                entry.pop("fingerprints", None)
+
+    def add_parsed(self, parsed: ParsedFile):
+        self.add_fingerprints(str(parsed.path), self.fingerprint(parsed))
+
+    def fingerprint(self, parsed: ParsedFile) -> Dict[str, List]:
+        """
+        Digest every function and class in a file, sign the functions for
+        near-duplicate search, hash its blocks for structural clones and its
+        line windows for copy-pasted lines.
+        """
+        fingerprints = {"functions": [], "classes": [], "signatures": [], "blocks": []}
+        texts, numbers = normalized_lines(parsed.lines)
+        windows = shingle_hashes(texts, self.window_lines) if len(texts) >= self.window_lines else []
+        fingerprints["lines"] = [_pack("Q", windows), _pack("I", numbers)]
+        tokens, spans, blocks = walk_tree(parsed.tree, self.min_block_lines)
+        digests = {}
+        shingles = None
+        for node, (start, end) in spans.items():
+            digest = digests[node] = xxhash.xxh64("\0".join(tokens[start:end]).encode("utf-8")).hexdigest()
+            if isinstance(node, ast.ClassDef):
+                fingerprints["classes"].append([digest, node.lineno])
+                continue
+            fingerprints["functions"].append([digest, node.lineno])
+            if node.end_lineno - node.lineno + 1 >= self.min_block_lines:
+                if shingles is None:
+                    shingles = shingle_hashes(tokens)
+                signature = minhash(shingles[start:max(start, end - SHINGLE_SIZE + 1)])
+                fingerprints["signatures"].append([digest, node.lineno, signature])
+        for structure, node, line, end_line, parent in blocks:
+            fingerprints["blocks"].append([
+                f"{structure:016x}", line, end_line,
+                None if parent is None else f"{blocks[parent][0]:016x}",
+                digests.get(node, "") if isinstance(node, AST) else "",
+            ])
+        return fingerprints
+
+    def add_fingerprints(self, file_path: str, fingerprints: Dict[str, List]):
+        self.file_fingerprints[file_path] = fingerprints
+        for digest, line in fingerprints["functions"]:
+            self.function_defs[digest].append((file_path, line))
+        for digest, line in fingerprints["classes"]:
+            self.class_defs[digest].append((file_path, line))
+        for digest, line, signature in fingerprints.get("signatures", ()):
+            location = (file_path, line)
+            signature = array("L", signature)
+            self.signatures[location] = (digest, signature)
+            for bucket in self._band_keys(signature):
+                self.buckets[bucket].append(location)
+        for structure, line, end_line, parent, digest in fingerprints.get("blocks", ()):
+            self.clones[structure].append((file_path, line, end_line, parent, digest))
+            if digest:
+                self.structures[(file_path, line)] = structure
+        if fingerprints.get("lines"):
+            self._add_lines(file_path, _unpack("Q", fingerprints["lines"][0]), _unpack("I", fingerprints["lines"][1]))
+
+    def _add_lines(self, file_path: str, windows: array, numbers: array):
+        file_id = self._next_line_file
+        self._next_line_file += 1
+        self.line_files[file_path] = (file_id, windows, numbers)
+        self.line_paths[file_id] = file_path
+        table = self.windows
+        location = file_id << 32
+        for window in windows:
+            existing = table.get(window)
+            if existing is None:
+                table[window] = location
+            elif type(existing) is int:
+                table[window] = [existing, location]
+            else:
+                existing.append(location)
+            location += 1
+
+    def _remove_lines(self, file_path: str):
+        file_id, windows, _ = self.line_files.pop(file_path)
+        del self.line_paths[file_id]
+        table = self.windows
+        location = file_id << 32
+        for window in windows:
+            existing = table[window]
+            if type(existing) is int:
+                del table[window]
+            else:
+                existing.remove(location)
+                if len(existing) == 1:
+                    table[window] = existing[0]
+            location += 1
+
+    def _line_neighbours(self, file_path: str) -> Set[Tuple[str, str]]:
+        """Keys of the line-duplication issues of ``file_path`` and of every file sharing a window with it."""
+        keys = {("lines", file_path)}
+        if file_path not in self.line_files:
+            return keys
+        _, windows, _ = self.line_files[file_path]
+        table = self.windows
+        for window in windows:
+            existing = table.get(window)
+            if type(existing) is list:
+                keys.update(("lines", self.line_paths[location >> 32]) for location in existing)
+        return keys
+
+    def _line_ranges(self, file_path: str) -> List[Tuple[int, int, int]]:
+        """
+        Maximal runs of ``file_path``'s lines covered by windows found elsewhere
+        too, as ``(first line, last line, packed location of one other copy)``.
+        """
+        file_id, windows, numbers = self.line_files[file_path]
+        table = self.windows
+        width = self.window_lines
+        ranges = []
+        start = end = other = None
+        location = file_id << 32
+        for position, window in enumerate(windows):
+            existing = table[window]
+            if type(existing) is list:
+                if end is not None and position <= end + width:
+                    end = position
+                else:
+                    if end is not None:
+                        ranges.append((numbers[start], numbers[end + width - 1], other))
+                    start = end = position
+                    other = next(copy for copy in existing if copy != location + position)
+        if end is not None:
+            ranges.append((numbers[start], numbers[end + width - 1], other))
+        return ranges
+
+    def _band_keys(self, signature: array) -> List[Tuple[int, int]]:
+        rows = self.rows
+        return [(band, hash(tuple(signature[band * rows:(band + 1) * rows]))) for band in range(self.bands)]
+
+    def _similar_candidates(self, location: Location) -> Set[Tuple[str, Location, Location]]:
+        """Keys of the near-duplicate pairs ``location`` may form, found through its band buckets."""
+        digest, signature = self.signatures[location]
+        keys = set()
+        for bucket in self._band_keys(signature):
+            for other in self.buckets.get(bucket, ())[:MAX_BUCKET_CANDIDATES]:
+                if other != location and self.signatures[other][0] != digest:
+                    keys.add(("similar", *sorted((location, other))))
+        return keys
+
+    def remove_file(self, file_path: str) -> Set[Tuple]:
+        """Drop a file's definitions and return the groups that changed."""
+        fingerprints = self.file_fingerprints.pop(file_path, None)
+        if fingerprints is None:
+            return set()
+        affected = set()
+        for kind, defs in (("functions", self.function_defs), ("classes", self.class_defs)):
+            for digest, _ in fingerprints[kind]:
+                locations = [loc for loc in defs.get(digest, []) if loc[0] != file_path]
+                if locations:
+                    defs[digest] = locations
+                else:
+                    defs.pop(digest, None)
+                affected.add((kind, digest))
+        for _, line, _ in fingerprints.get("signatures", ()):
+            location = (file_path, line)
+            affected |= self._similar_candidates(location)
+            _, signature = self.signatures.pop(location)
+            for bucket in self._band_keys(signature):
+                members = self.buckets[bucket]
+                members.remove(location)
+                if not members:
+                    del self.buckets[bucket]
+        for structure, line, _, _, digest in fingerprints.get("blocks", ()):
+            members = [member for member in self.clones.get(structure, []) if member[0] != file_path]
+            if members:
+                self.clones[structure] = members
+            else:
+                self.clones.pop(structure, None)
+            self.structures.pop((file_path, line), None)
+            affected.add(("clones", structure))
+        if file_path in self.line_files:
+            affected |= self._line_neighbours(file_path)
+            self._remove_lines(file_path)
+        affected |= {key for key in self.reported if key[0] == "similar" and file_path in (key[1][0], key[2][0])}
+        return affected
+
+    def groups_for(self, file_path: str) -> Set[Tuple]:
+        fingerprints = self.file_fingerprints.get(file_path, {"functions": [], "classes": []})
+        groups = {(kind, digest) for kind in ("functions", "classes") for digest, _ in fingerprints[kind]}
+        for _, line, _ in fingerprints.get("signatures", ()):
+            groups |= self._similar_candidates((file_path, line))
+        groups |= {("clones", block[0]) for block in fingerprints.get("blocks", ())}
+        groups |= self._line_neighbours(file_path)
+        return groups
+
+    def report(self, quality_issues: defaultdict, keep_state: bool = False):
+        for kind, defs in (("functions", self.function_defs), ("classes", self.class_defs)):
+            for digest, locations in defs.items():
+                issue = self._group_issue(kind, locations)
+                if issue is not None:
+                    quality_issues["duplication"].append(issue)
+                    if keep_state:
+                        self.reported[(kind, digest)] = issue
+
+        for structure in self.clones:
+            issue = self._clone_issue(structure)
+            if issue is not None:
+                quality_issues["duplication"].append(issue)
+                if keep_state:
+                    self.reported[("clones", structure)] = issue
+
+        for file_path in self.line_files:
+            issue = self._lines_issue(file_path)
+            if issue is not None:
+                quality_issues["duplication"].append(issue)
+                if keep_state:
+                    self.reported[("lines", file_path)] = issue
+
+        seen = set()
+        for location in self.signatures:
+            for key in sorted(self._similar_candidates(location) - seen):
+                seen.add(key)
+                issue = self._similar_issue(key)
+                if issue is not None:
+                    quality_issues["duplication"].append(issue)
+                    if keep_state:
+                        self.reported[key] = issue
+
+        if not keep_state:
+            self._reset()
+
+    def _reset(self):
+        self.function_defs.clear()
+        self.class_defs.clear()
+        self.file_fingerprints.clear()
+        self.signatures.clear()
+        self.buckets.clear()
+        self.clones.clear()
+        self.structures.clear()
+        self.windows.clear()
+        self.line_files.clear()
+        self.line_paths.clear()
+        self.reported.clear()
+
+    def refresh(self, quality_issues: defaultdict, affected: Set[Tuple]):
+        """Re-report only the duplicate groups in ``affected``; requires ``report(keep_state=True)`` first."""
+        stale = {id(self.reported.pop(key)) for key in affected if key in self.reported}
+        if stale:
+            quality_issues["duplication"] = [
+                issue for issue in quality_issues["duplication"] if id(issue) not in stale
+            ]
+        for key in affected:
+            if key[0] == "similar":
+                issue = self._similar_issue(key)
+            elif key[0] == "clones":
+                issue = self._clone_issue(key[1])
+            elif key[0] == "lines":
+                issue = self._lines_issue(key[1])
+            else:
+                kind, digest = key
+                defs = self.function_defs if kind == "functions" else self.class_defs
+                issue = self._group_issue(kind, defs.get(digest, []))
+            if issue is not None:
+                quality_issues["duplication"].append(issue)
+                self.reported[key] = issue
+
+    def _group_issue(self, kind: str, locations: List[Tuple[str, int]]) -> Optional[Dict]:
+        if len(locations) <= 1:
+            return None
+        label = "function" if kind == "functions" else "class"
+        description = f"Duplicated {label} found at " + ", ".join(
+            [f"{file}:{line}" for file, line in locations]
+        )
+        return QualityIssue(
+            description=description,
+            file_path=locations[0][0],
+            line=locations[0][1]
+        ).__dict__
+
+    def _clone_issue(self, structure: str) -> Optional[Dict]:
+        """
+        Issue for blocks sharing a structural hash, unless they are exact
+        duplicate definitions or all sit inside copies of one larger clone,
+        which are reported instead.
+        """
+        members = self.clones.get(structure, [])
+        if len(members) <= 1:
+            return None
+        digests = {member[4] for member in members}
+        if len(digests) == 1 and "" not in digests:
+            return None
+        parents = {member[3] for member in members}
+        if len(parents) == 1 and None not in parents and len(self.clones.get(parents.pop(), [])) > 1:
+            return None
+        description = "Structural clone (same code up to names and literals) found at " + ", ".join(
+            [f"{file}:{line}-{end_line}" for file, line, end_line, _, _ in members]
+        )
+        return QualityIssue(
+            description=description,
+            file_path=members[0][0],
+            line=members[0][1]
+        ).__dict__
+
+    def _lines_issue(self, file_path: str) -> Optional[Dict]:
+        """Issue listing a file's duplicated line ranges once there are more than ``MAX_DUPLICATED_BLOCKS``."""
+        if file_path not in self.line_files:
+            return None
+        ranges = self._line_ranges(file_path)
+        if len(ranges) <= self.max_blocks:
+            return None
+        copies = []
+        for first, last, other in ranges:
+            other_path = self.line_paths[other >> 32]
+            other_line = self.line_files[other_path][2][other & 0xFFFFFFFF]
+            copies.append(f"{first}-{last} (also at {other_path}:{other_line})")
+        return QualityIssue(
+            description=f"{len(ranges)} duplicated blocks of {self.window_lines}+ lines "
+                        f"(max {self.max_blocks}) at lines " + ", ".join(copies),
+            file_path=file_path,
+            line=ranges[0][0]
+        ).__dict__
+
+    def _similar_issue(self, key: Tuple[str, Location, Location]) -> Optional[Dict]:
+        _, first, second = key
+        if first not in self.signatures or second not in self.signatures:
+            return None
+        structure = self.structures.get(first)
+        if structure is not None and structure == self.structures.get(second):
+            return None
+        score = similarity(self.signatures[first][1], self.signatures[second][1])
+        if score < self.threshold:
+            return None
+        issue = QualityIssue(
+            description=f"Similar functions ({score:.0%} alike) found at "
+                        f"{first[0]}:{first[1]}, {second[0]}:{second[1]}",
+            file_path=first[0],
+            line=first[1]
+        ).__dict__
+        issue["similarity"] = round(score, 3)
+        return issue
+
+
+def _key_from_json(key):
+    """Rebuild a group key from its JSON form, where tuples became lists."""
+    if isinstance(key, list):
+        return tuple(_key_from_json(part) for part in key)
+    return key
@@ -0,0 +1,223 @@
+import ast
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Type
+
+from treeline.pipeline import ParsedFile, read_source
+
+BLOCK_NODES = (ast.If, ast.For, ast.While, ast.With, ast.Try, ast.AsyncFor, ast.AsyncWith)
+BRANCH_NODES = (ast.If, ast.While, ast.For, ast.ExceptHandler)
+COGNITIVE_NODES = (ast.If, ast.While, ast.For)
+SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+@dataclass
+class ScopeStats:
+    """Metrics for a function or class body, gathered while the engine walks it.
+
+    Nodes inside nested definitions also count towards the enclosing scope,
+    which matches what ``ast.walk`` over the outer node would report.
+    """
+
+    node: ast.AST
+    entry_depth: int
+    entry_cognitive_depth: int
+    max_nesting: int = 0
+    returns: int = 0
+    if_count: int = 0
+    cyclomatic: int = 1
+    cognitive: int = 0
+
+
+class CheckContext:
+    """Per-file state handed to every handler."""
+
+    def __init__(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict, parsed: ParsedFile = None):
+        self.tree = tree
+        self.file_path = file_path
+        self.quality_issues = quality_issues
+        self.parsed = parsed
+        self.parent: Optional[ast.AST] = None
+        self.scopes: List[ScopeStats] = []
+        self._lines = parsed.lines if parsed is not None else None
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = read_source(self.file_path).split("\n")
+        return self._lines
+
+    @property
+    def scope(self) -> Optional[ScopeStats]:
+        return self.scopes[-1] if self.scopes else None
+
+    def enclosing(self, node_type: Type[ast.AST]) -> Optional[ast.AST]:
+        for stats in reversed(self.scopes):
+            if isinstance(stats.node, node_type):
+                return stats.node
+        return None
+
+
+Handler = Callable[[ast.AST, CheckContext], None]
+LeaveHandler = Callable[[ast.AST, CheckContext, ScopeStats], None]
+
+
+class CheckerEngine:
+    """Walks an AST once and dispatches each node to the handlers registered for its type.
+
+    Checkers register through ``register(engine)``; a checker that defines
+    ``handle_error(error, ctx)`` is switched off for the rest of the file when
+    one of its handlers raises, otherwise the error propagates.
+    """
+
+    def __init__(self, checkers: List = None):
+        self._enter: Dict[type, List[tuple]] = defaultdict(list)
+        self._leave: Dict[type, List[tuple]] = defaultdict(list)
+        self._start: List[tuple] = []
+        self._finish: List[tuple] = []
+        self._current_owner = None
+        for checker in checkers or []:
+            self.register(checker)
+
+    def register(self, checker):
+        self._current_owner = checker
+        try:
+            checker.register(self)
+        finally:
+            self._current_owner = None
+        return self
+
+    def on(self, node_types, handler: Handler, owner=None):
+        for node_type in self._as_types(node_types):
+            self._enter[node_type].append((owner or self._current_owner, handler))
+        return self
+
+    def on_leave(self, node_types, handler: LeaveHandler, owner=None):
+        for node_type in self._as_types(node_types):
+            if not issubclass(node_type, SCOPE_NODES):
+                raise ValueError(f"Leave handlers are only supported for scopes, not {node_type.__name__}")
+            self._leave[node_type].append((owner or self._current_owner, handler))
+        return self
+
+    def on_start(self, handler: Callable[[CheckContext], None], owner=None):
+        """Run ``handler(ctx)`` once per file before the walk, e.g. for line-based checks."""
+        self._start.append((owner or self._current_owner, handler))
+        return self
+
+    def on_finish(self, handler: Callable[[CheckContext], None], owner=None):
+        """Run ``handler(ctx)`` once per file after the walk."""
+        self._finish.append((owner or self._current_owner, handler))
+        return self
+
+    @staticmethod
+    def _as_types(node_types) -> tuple:
+        return node_types if isinstance(node_types, tuple) else (node_types,)
+
+    def run(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict, parsed: ParsedFile = None) -> CheckContext:
+        ctx = CheckContext(tree, file_path, quality_issues, parsed)
+        enter, leave = self._enter, self._leave
+        failed = set()
+        depth = 0
+        cognitive_depth = 0
+        boolop_depth = 0
+        self._dispatch_file(self._start, failed, ctx)
+
+        stack = [(tree, None, False)]
+        while stack:
+            node, parent, leaving = stack.pop()
+            node_type = type(node)
+
+            if leaving:
+                if node_type in BLOCK_NODES:
+                    depth -= 1
+                if node_type in COGNITIVE_NODES:
+                    cognitive_depth -= 1
+                if node_type is ast.BoolOp:
+                    boolop_depth -= 1
+                if node_type in SCOPE_NODES:
+                    stats = ctx.scopes.pop()
+                    ctx.parent = parent
+                    self._dispatch(leave.get(node_type), failed, ctx, node, stats)
+                    if ctx.scopes:
+                        self._merge_into_parent(ctx.scopes[-1], stats)
+                continue
+
+            if node_type in BLOCK_NODES:
+                depth += 1
+            if ctx.scopes:
+                self._count(ctx.scopes, node, node_type, depth, cognitive_depth, boolop_depth)
+
+            ctx.parent = parent
+            handlers = enter.get(node_type)
+            if handlers:
+                self._dispatch(handlers, failed, ctx, node)
+
+            if node_type in SCOPE_NODES:
+                ctx.scopes.append(ScopeStats(node, depth, cognitive_depth))
+            if node_type in COGNITIVE_NODES:
+                cognitive_depth += 1
+            if node_type is ast.BoolOp:
+                boolop_depth += 1
+
+            stack.append((node, parent, True))
+            children = list(ast.iter_child_nodes(node))
+            for child in reversed(children):
+                stack.append((child, node, False))
+
+        ctx.parent = None
+        self._dispatch_file(self._finish, failed, ctx)
+        return ctx
+
+    @staticmethod
+    def _count(scopes: List[ScopeStats], node: ast.AST, node_type: type, depth: int, cognitive_depth: int, boolop_depth: int):
+        stats = scopes[-1]
+        if node_type in BLOCK_NODES and depth - stats.entry_depth > stats.max_nesting:
+            stats.max_nesting = depth - stats.entry_depth
+        if node_type is ast.Return:
+            stats.returns += 1
+        elif node_type is ast.If:
+            stats.if_count += 1
+        if node_type in BRANCH_NODES:
+            stats.cyclomatic += 1
+        elif node_type is ast.BoolOp:
+            stats.cyclomatic += len(node.values) - 1
+
+        # Cognitive weight depends on nesting relative to each enclosing scope,
+        # so it is credited to all of them here instead of merged on leave.
+        if node_type in COGNITIVE_NODES:
+            for scope in scopes:
+                scope.cognitive += 1 + cognitive_depth - scope.entry_cognitive_depth
+        elif node_type is ast.BoolOp and boolop_depth == 0:
+            for scope in scopes:
+                scope.cognitive += len(node.values) - 1
+
+    @staticmethod
+    def _merge_into_parent(parent: ScopeStats, child: ScopeStats):
+        parent.returns += child.returns
+        parent.if_count += child.if_count
+        parent.cyclomatic += child.cyclomatic - 1
+        parent.max_nesting = max(parent.max_nesting, child.max_nesting + child.entry_depth - parent.entry_depth)
+
+    def _dispatch(self, handlers, failed: set, ctx: CheckContext, node: ast.AST, *extra):
+        if not handlers:
+            return
+        for owner, handler in handlers:
+            self._call(owner, handler, failed, ctx, node, ctx, *extra)
+
+    def _dispatch_file(self, handlers, failed: set, ctx: CheckContext):
+        for owner, handler in handlers:
+            self._call(owner, handler, failed, ctx, ctx)
+
+    @staticmethod
+    def _call(owner, handler, failed: set, ctx: CheckContext, *args):
+        if owner is not None and id(owner) in failed:
+            return
+        try:
+            handler(*args)
+        except Exception as e:
+            error_handler = getattr(owner, "handle_error", None)
+            if error_handler is None:
+                raise
+            failed.add(id(owner))
+            error_handler(e, ctx)
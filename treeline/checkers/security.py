@@ -4,6 +4,18 @@ from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 
+from treeline.checkers.engine import CheckContext, CheckerEngine
+from treeline.pipeline import ParsedFile
+
+# Any of these marks a credential match as a likely false positive.
+CREDENTIAL_FALSE_POSITIVES = re.compile("|".join([
+    r'[\'"].*\{.*\}.*[\'"]',
+    r'(?:password|apikey|secret|token).*=.*[\'"][^\'"]{1,7}[\'"]',
+    r'(?:password|apikey|secret|token).*=.*os\.environ',
+    r'(?:user|admin|test|example|dummy|foo|bar)',
+]), re.IGNORECASE)
+
+
 class SecurityAnalyzer:
     def __init__(self, config: Dict = None):
         self.config = config or {}
@@ -20,6 +32,7 @@ class SecurityAnalyzer:
                     r'password.*required|password.*field|password.*\(|password.*\)',
                     r'token.*required|token.*field|token.*\(|token.*\)',
                 ],
+                "keywords": ["pass", "pwd", "api", "secret", "token", "auth"],
                 "message": "Possible hardcoded credential"
             },
             
@@ -31,6 +44,7 @@ class SecurityAnalyzer:
                     (r'execute\(.*f[\'"]', "high"),
                 ],
                 "exclude_patterns": [],
+                "keywords": ["execute("],
                 "message": "Potential SQL injection risk"
             },
             
@@ -42,6 +56,7 @@ class SecurityAnalyzer:
                     (r'(?:os\.system|subprocess\.call|subprocess\.Popen|exec|eval)\(.*f[\'"]', "high"),
                 ],
                 "exclude_patterns": [],
+                "keywords": ["system(", "call(", "popen(", "exec(", "eval("],
                 "message": "Potential command injection risk"
             },
             
@@ -57,40 +72,94 @@ class SecurityAnalyzer:
                     r'test_',
                     r'example',
                 ],
+                "keywords": ["pickle", "yaml", "hashlib", "random"],
                 "message": "Use of potentially insecure function"
             }
         }
+        self._compile_patterns()
 
-    def check(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-                
-            self._check_regex_patterns(lines, file_path, quality_issues)
-            self._check_dangerous_ast_patterns(tree, file_path, quality_issues)
-            
-        except Exception as e:
-            quality_issues["security"].append({
-                "description": f"Error during security analysis: {str(e)}",
-                "file_path": str(file_path),
-                "line": None,
-                "severity": "low"
-            })
+    def _compile_patterns(self):
+        """
+        Fold every category's patterns and exclusions into one regex.
+
+        Each pattern becomes an optional lookahead at the start of the line
+        whose named group is set when the pattern matches anywhere in it, so
+        a single ``match`` call answers every category. Lines containing
+        none of the categories' ``keywords`` are skipped before that; a
+        category without keywords turns the prefilter off.
+        """
+        lookaheads = []
+        categories = []
+        keywords = set()
+        for index, (category, config) in enumerate(self.security_patterns.items()):
+            exclude = None
+            if config["exclude_patterns"]:
+                exclude = f"exclude_{index}"
+                alternatives = "|".join(f"(?:{pattern})" for pattern in config["exclude_patterns"])
+                lookaheads.append(f"(?=(?:.*?(?P<{exclude}>{alternatives}))?)")
+            patterns = []
+            for number, (pattern, severity) in enumerate(config["patterns"]):
+                name = f"pattern_{index}_{number}"
+                lookaheads.append(f"(?=(?:.*?(?P<{name}>{pattern}))?)")
+                patterns.append((name, severity))
+            categories.append((category, config["message"], exclude, patterns))
+            if keywords is not None and config.get("keywords"):
+                keywords.update(keyword.lower() for keyword in config["keywords"])
+            else:
+                keywords = None
+
+        self._scanner = re.compile("".join(lookaheads), re.IGNORECASE)
+        # Group numbers are 1-based; ``match.groups()`` is indexed from 0.
+        groups = self._scanner.groupindex
+        self._categories = [
+            (category, message, None if exclude is None else groups[exclude] - 1,
+             [(groups[name] - 1, severity) for name, severity in patterns])
+            for category, message, exclude, patterns in categories
+        ]
+        self._keywords = sorted(keywords) if keywords is not None else None
+
+    def check(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict, parsed: ParsedFile = None):
+        CheckerEngine([self]).run(tree, file_path, quality_issues, parsed)
+
+    def register(self, engine: CheckerEngine):
+        engine.on_start(self._check_lines)
+        engine.on(ast.Call, self._check_call)
+
+    def handle_error(self, error: Exception, ctx: CheckContext):
+        ctx.quality_issues["security"].append({
+            "description": f"Error during security analysis: {str(error)}",
+            "file_path": str(ctx.file_path),
+            "line": None,
+            "severity": "low"
+        })
+
+    def _check_lines(self, ctx: CheckContext):
+        self._check_regex_patterns(ctx.lines, ctx.file_path, ctx.quality_issues)
 
     def _check_regex_patterns(self, lines: List[str], file_path: Path, quality_issues: defaultdict):
+        keywords = self._keywords
+        match = self._scanner.match
         for i, line in enumerate(lines, start=1):
-            for category, config in self.security_patterns.items():
-                if any(re.search(ex_pattern, line, re.IGNORECASE) for ex_pattern in config["exclude_patterns"]):
+            if keywords is not None:
+                lowered = line.lower()
+                for keyword in keywords:
+                    if keyword in lowered:
+                        break
+                else:
+                    continue
+
+            groups = match(line).groups()
+            for category, message, exclude, patterns in self._categories:
+                if exclude is not None and groups[exclude] is not None:
                     continue
-                
-                for pattern, severity in config["patterns"]:
-                    if re.search(pattern, line, re.IGNORECASE):
+
+                for group, severity in patterns:
+                    if groups[group] is not None:
                         if category == "credential" and self._is_credential_false_positive(line):
-                            continue
-                        
+                            break
+
                         quality_issues["security"].append({
-                            "description": f"{config['message']} ({category})",
+                            "description": f"{message} ({category})",
                             "file_path": str(file_path),
                             "line": i,
                             "severity": severity
@@ -98,65 +167,46 @@ class SecurityAnalyzer:
                         break
 
     def _is_credential_false_positive(self, line: str) -> bool:
-        if re.search(r'[\'"].*\{.*\}.*[\'"]', line):
-            return True
-            
-        if re.search(r'(?:password|apikey|secret|token).*=.*[\'"][^\'"]{1,7}[\'"]', line, re.IGNORECASE):
-            return True
-            
-        if re.search(r'(?:password|apikey|secret|token).*=.*os\.environ', line, re.IGNORECASE):
-            return True
-            
-        if re.search(r'(?:user|admin|test|example|dummy|foo|bar)', line, re.IGNORECASE):
-            return True
-            
-        return False
+        return CREDENTIAL_FALSE_POSITIVES.search(line) is not None
 
     def _check_dangerous_ast_patterns(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict):
-        for node in ast.walk(tree):
-            if (isinstance(node, ast.Call) and
-                ((isinstance(node.func, ast.Name) and node.func.id == 'open') or
-                (isinstance(node.func, ast.Attribute) and node.func.attr in ['open', 'read', 'write']))):
-                
-                for arg in node.args:
-                    if isinstance(arg, ast.BinOp) or (
-                        isinstance(arg, ast.Call) and
-                        isinstance(arg.func, ast.Attribute) and
-                        arg.func.attr == 'format'
-                    ):
-                        quality_issues["security"].append({
-                            "description": "Potential path traversal vulnerability in file operation",
-                            "file_path": str(file_path),
-                            "line": node.lineno,
-                            "severity": "high"
-                        })
-                        break
-            # Keep existing checks for eval, input, etc.
-            if (isinstance(node, ast.Call) and 
-                isinstance(node.func, ast.Name) and 
-                node.func.id == 'eval'):
-                quality_issues["security"].append({
-                    "description": "Use of eval() function - potential security risk",
-                    "file_path": str(file_path),
-                    "line": node.lineno,
-                    "severity": "high"
-                })
-            if (isinstance(node, ast.Call) and 
-                isinstance(node.func, ast.Name) and 
-                node.func.id == 'input'):
-                parent = self._get_parent(node, tree)
-                if parent and isinstance(parent, ast.Call) and hasattr(parent.func, 'id'):
-                    if parent.func.id in ['eval', 'exec', 'os.system', 'subprocess.call']:
-                        quality_issues["security"].append({
-                            "description": f"User input passed directly to {parent.func.id} - critical security risk",
-                            "file_path": str(file_path),
-                            "line": node.lineno,
-                            "severity": "critical"
-                        })
+        CheckerEngine().on(ast.Call, self._check_call).run(tree, file_path, quality_issues)
 
-    def _get_parent(self, node, tree):
-        for parent in ast.walk(tree):
-            for child in ast.iter_child_nodes(parent):
-                if child == node:
-                    return parent
-        return None
\ No newline at end of file
+    def _check_call(self, node: ast.Call, ctx: CheckContext):
+        file_path, quality_issues = ctx.file_path, ctx.quality_issues
+        if ((isinstance(node.func, ast.Name) and node.func.id == 'open') or
+            (isinstance(node.func, ast.Attribute) and node.func.attr in ['open', 'read', 'write'])):
+            
+            for arg in node.args:
+                if isinstance(arg, ast.BinOp) or (
+                    isinstance(arg, ast.Call) and
+                    isinstance(arg.func, ast.Attribute) and
+                    arg.func.attr == 'format'
+                ):
+                    quality_issues["security"].append({
+                        "description": "Potential path traversal vulnerability in file operation",
+                        "file_path": str(file_path),
+                        "line": node.lineno,
+                        "severity": "high"
+                    })
+                    break
+        # Keep existing checks for eval, input, etc.
+        if (isinstance(node.func, ast.Name) and 
+            node.func.id == 'eval'):
+            quality_issues["security"].append({
+                "description": "Use of eval() function - potential security risk",
+                "file_path": str(file_path),
+                "line": node.lineno,
+                "severity": "high"
+            })
+        if (isinstance(node.func, ast.Name) and 
+            node.func.id == 'input'):
+            parent = ctx.parent
+            if parent and isinstance(parent, ast.Call) and hasattr(parent.func, 'id'):
+                if parent.func.id in ['eval', 'exec', 'os.system', 'subprocess.call']:
+                    quality_issues["security"].append({
+                        "description": f"User input passed directly to {parent.func.id} - critical security risk",
+                        "file_path": str(file_path),
+                        "line": node.lineno,
+                        "severity": "critical"
+                    })
\ No newline at end of file
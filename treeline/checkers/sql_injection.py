@@ -2,7 +2,10 @@ import ast
 import re
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Set
+
+from treeline.checkers.engine import CheckContext, CheckerEngine
+from treeline.pipeline import ParsedFile
 
 class SQLInjectionChecker:
     def __init__(self, config: Dict = None):
@@ -34,53 +37,50 @@ class SQLInjectionChecker:
             (r'.*f[\'"].*\{.*\}', 'high'),
         ]
 
-    def check(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-                
-            self._check_ast_for_sql_injection(tree, file_path, quality_issues, lines)
-                
-        except Exception as e:
-            quality_issues["security"].append({
-                "description": f"Error checking for SQL injection: {str(e)}",
-                "file_path": str(file_path),
-                "line": None,
-                "severity": "low"
-            })
+    def check(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict, parsed: ParsedFile = None):
+        CheckerEngine([self]).run(tree, file_path, quality_issues, parsed)
 
-    def _check_ast_for_sql_injection(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict, lines: List[str]):
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Call):
-                func_name = self._get_func_name(node)
-                
-                if func_name and any(sql_func in func_name for sql_func in self.sql_functions):
-                    line_num = node.lineno
-                    line_content = lines[line_num - 1] if line_num <= len(lines) else ""
-                    
-                    if any(re.match(pattern, line_content) for pattern in self.safe_patterns):
-                        continue
-                    
-                    for pattern, severity in self.risk_patterns:
-                        if re.match(pattern, line_content):
-                            quality_issues["security"].append({
-                                "description": f"Potential SQL injection: {func_name} with unsanitized input",
-                                "file_path": str(file_path),
-                                "line": line_num,
-                                "severity": severity,
-                                "code": line_content.strip()
-                            })
-                            break
-                    
-                    if node.args and self._has_injection_risk(node.args[0]):
-                        quality_issues["security"].append({
-                            "description": f"Potential SQL injection in {func_name}: Query contains dynamic values",
-                            "file_path": str(file_path),
-                            "line": line_num,
-                            "severity": "high",
-                            "code": line_content.strip()
-                        })
+    def register(self, engine: CheckerEngine):
+        engine.on(ast.Call, self._check_call)
+
+    def handle_error(self, error: Exception, ctx: CheckContext):
+        ctx.quality_issues["security"].append({
+            "description": f"Error checking for SQL injection: {str(error)}",
+            "file_path": str(ctx.file_path),
+            "line": None,
+            "severity": "low"
+        })
+
+    def _check_call(self, node: ast.Call, ctx: CheckContext):
+        func_name = self._get_func_name(node)
+        
+        if func_name and any(sql_func in func_name for sql_func in self.sql_functions):
+            file_path, quality_issues, lines = ctx.file_path, ctx.quality_issues, ctx.lines
+            line_num = node.lineno
+            line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+            
+            if any(re.match(pattern, line_content) for pattern in self.safe_patterns):
+                return
+            
+            for pattern, severity in self.risk_patterns:
+                if re.match(pattern, line_content):
+                    quality_issues["security"].append({
+                        "description": f"Potential SQL injection: {func_name} with unsanitized input",
+                        "file_path": str(file_path),
+                        "line": line_num,
+                        "severity": severity,
+                        "code": line_content.strip()
+                    })
+                    break
+            
+            if node.args and self._has_injection_risk(node.args[0]):
+                quality_issues["security"].append({
+                    "description": f"Potential SQL injection in {func_name}: Query contains dynamic values",
+                    "file_path": str(file_path),
+                    "line": line_num,
+                    "severity": "high",
+                    "code": line_content.strip()
+                })
 
     def _get_func_name(self, node: ast.Call) -> str:
         if isinstance(node.func, ast.Name):
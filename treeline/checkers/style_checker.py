@@ -3,6 +3,7 @@ import re
 from pathlib import Path
 from typing import Dict
 from treeline.config_manager import get_config
+from treeline.pipeline import ParsedFile, read_source
 
 class StyleChecker:
     """
@@ -25,11 +26,13 @@ class StyleChecker:
         ]
         self.exception_regexes = [re.compile(pattern) for pattern in self.exception_patterns]
 
-    def check(self, file_path: Path, quality_issues: defaultdict):
+    def check(self, file_path: Path, quality_issues: defaultdict, parsed: ParsedFile = None):
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                
+            source = parsed.source if parsed is not None else read_source(file_path)
+            lines = parsed.lines if parsed is not None else source.split("\n")
+            if lines and lines[-1] == "":
+                lines = lines[:-1]
+
             if len(lines) > self.max_file_lines:
                 quality_issues["style"].append({
                     "description": f"File has {len(lines)} lines (over {self.max_file_lines})",
@@ -51,7 +54,7 @@ class StyleChecker:
             for i, line in enumerate(lines, start=1):
                 if line.strip() == "":
                     continue
-                if line.rstrip('\n').endswith((' ', '\t')):
+                if line.endswith((' ', '\t')):
                     quality_issues["style"].append({
                         "description": "Line has trailing whitespace",
                         "file_path": str(file_path),
@@ -76,7 +79,7 @@ class StyleChecker:
                     "severity": "medium"
                 })
                 
-            if lines and not lines[-1].endswith('\n'):
+            if lines and not source.endswith('\n'):
                 quality_issues["style"].append({
                     "description": "File does not end with a newline",
                     "file_path": str(file_path),
@@ -1,9 +1,11 @@
 import ast
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
+from treeline.checkers.engine import CheckContext, CheckerEngine
 from treeline.config_manager import get_config
+from treeline.pipeline import ParsedFile
 
 class UnusedCodeChecker:
     def __init__(self, config: Dict = None):
@@ -13,73 +15,134 @@ class UnusedCodeChecker:
         self.defined_functions = {}
         self.called_functions = set()
         self.globally_used_imports = set()
+        self.partials = {}
+        self.reported = []
 
-    def check(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict):
+    def check(self, tree: ast.AST, file_path: Path, quality_issues: defaultdict, parsed: ParsedFile = None):
         """Check for unused imports and functions in a single file"""
-        str_path = str(file_path)
-        
-        self._collect_imports_and_functions(tree, str_path)
-        self._check_name_usage(tree, str_path)
-        self._report_unused_imports(str_path, quality_issues)
+        CheckerEngine([self]).run(tree, file_path, quality_issues, parsed)
+
+    def register(self, engine: CheckerEngine):
+        self._register_definitions(engine)
+        self._register_usages(engine)
+        engine.on_finish(self._report_file)
+
+    def finalize_checks(self, quality_issues: defaultdict, keep_state: bool = False):
+        """
+        Report functions that are defined but never called in any file.
+
+        Definitions and calls come from this checker's own state plus every
+        partial added with ``add_partial``. With ``keep_state`` the partials are
+        kept so ``refresh`` can re-run the report after files change.
+        """
+        defined = dict(self.defined_functions)
+        called = set(self.called_functions)
+        for partial in self.partials.values():
+            defined.update(partial["defined"])
+            called.update(partial["called"])
+
+        start = len(quality_issues["unused_code"])
+        self._report_unused_functions(quality_issues, defined, called)
+        if keep_state:
+            self.reported = quality_issues["unused_code"][start:]
+        else:
+            self.partials.clear()
+            self.reported = []
+
+    def for_file(self) -> "UnusedCodeChecker":
+        """A fresh checker for one file; its ``partial()`` is merged back with ``add_partial``."""
+        return UnusedCodeChecker(self.config)
+
+    def partial(self) -> Dict:
+        """The definitions and calls ``finalize_checks`` needs, in a picklable, JSON-safe form."""
+        return {"defined": self.defined_functions, "called": sorted(self.called_functions)}
+
+    def add_partial(self, file_path: str, partial: Dict):
+        self.partials[file_path] = partial
+
+    def remove_file(self, file_path: str):
+        self.partials.pop(file_path, None)
+
+    def refresh(self, quality_issues: defaultdict):
+        """Replace the unused-function issues from the last ``finalize_checks(keep_state=True)``."""
+        stale = {id(issue) for issue in self.reported}
+        quality_issues["unused_code"] = [
+            issue for issue in quality_issues["unused_code"] if id(issue) not in stale
+        ]
+        self.finalize_checks(quality_issues, keep_state=True)
+
+    def _register_definitions(self, engine: CheckerEngine):
+        engine.on((ast.Import, ast.ImportFrom), self._visit_import)
+        engine.on(ast.FunctionDef, self._visit_function)
 
-    def finalize_checks(self, quality_issues: defaultdict):
-        self._report_unused_functions(quality_issues)
+    def _register_usages(self, engine: CheckerEngine):
+        engine.on(ast.Name, self._visit_name)
+        engine.on(ast.Call, self._visit_call)
 
     def _collect_imports_and_functions(self, tree: ast.AST, file_path: str):
-        for node in ast.walk(tree):
-            for child in ast.iter_child_nodes(node):
-                child.parent = node
-            if isinstance(node, ast.Import):
-                for name in node.names:
-                    alias = name.asname or name.name
-                    self.imported_names[file_path].add(alias)
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    for name in node.names:
-                        alias = name.asname or name.name
-                        self.imported_names[file_path].add(alias)
-            elif isinstance(node, ast.FunctionDef):
-                module_name = Path(file_path).stem
-                parent = getattr(node, "parent", None)
-                if isinstance(parent, ast.ClassDef):
-                    class_name = parent.name
-                    func_name = f"{module_name}.{class_name}.{node.name}"
-                else:
-                    func_name = f"{module_name}.{node.name}"
-                self.defined_functions[func_name] = {
-                    "file_path": file_path,
-                    "line": node.lineno,
-                    "name": node.name
-                }
+        engine = CheckerEngine()
+        self._register_definitions(engine)
+        engine.run(tree, file_path, defaultdict(list))
 
     def _check_name_usage(self, tree: ast.AST, file_path: str):
-        for node in ast.walk(tree):
-            for child in ast.iter_child_nodes(node):
-                child.parent = node
-            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
-                self.used_names[file_path].add(node.id)
-                self.globally_used_imports.add(node.id)
-            elif isinstance(node, ast.Call):
-                if isinstance(node.func, ast.Name):
-                    func_name = node.func.id
-                    module_name = Path(file_path).stem
-                    self.called_functions.add(f"{module_name}.{func_name}")
-                elif isinstance(node.func, ast.Attribute):
-                    if isinstance(node.func.value, ast.Name):
-                        if node.func.value.id == 'self':
-                            parent = node
-                            while parent and not isinstance(parent, ast.ClassDef):
-                                parent = getattr(parent, "parent", None)
-                            if parent and isinstance(parent, ast.ClassDef):
-                                module_name = Path(file_path).stem
-                                class_name = parent.name
-                                method_name = node.func.attr
-                                self.called_functions.add(f"{module_name}.{class_name}.{method_name}")
-                        else:
-                            self.used_names[file_path].add(node.func.value.id)
-                            self.globally_used_imports.add(node.func.value.id)
-
-    def _report_unused_imports(self, file_path: str, quality_issues: defaultdict):
+        engine = CheckerEngine()
+        self._register_usages(engine)
+        engine.run(tree, file_path, defaultdict(list))
+
+    def _report_file(self, ctx: CheckContext):
+        lines = ctx.parsed.lines if ctx.parsed is not None else None
+        self._report_unused_imports(str(ctx.file_path), ctx.quality_issues, lines)
+
+    def _visit_import(self, node: ast.AST, ctx: CheckContext):
+        if isinstance(node, ast.ImportFrom) and node.module in (None, "__future__"):
+            return
+        file_path = str(ctx.file_path)
+        for name in node.names:
+            if name.name == "*":
+                continue
+            # ``import a.b`` binds ``a``, which is the name later code uses.
+            alias = name.asname or name.name.split(".")[0]
+            self.imported_names[file_path].add(alias)
+
+    def _visit_function(self, node: ast.FunctionDef, ctx: CheckContext):
+        file_path = str(ctx.file_path)
+        module_name = Path(file_path).stem
+        if isinstance(ctx.parent, ast.ClassDef):
+            class_name = ctx.parent.name
+            func_name = f"{module_name}.{class_name}.{node.name}"
+        else:
+            func_name = f"{module_name}.{node.name}"
+        self.defined_functions[func_name] = {
+            "file_path": file_path,
+            "line": node.lineno,
+            "name": node.name
+        }
+
+    def _visit_name(self, node: ast.Name, ctx: CheckContext):
+        if isinstance(node.ctx, ast.Load):
+            self.used_names[str(ctx.file_path)].add(node.id)
+            self.globally_used_imports.add(node.id)
+
+    def _visit_call(self, node: ast.Call, ctx: CheckContext):
+        file_path = str(ctx.file_path)
+        if isinstance(node.func, ast.Name):
+            func_name = node.func.id
+            module_name = Path(file_path).stem
+            self.called_functions.add(f"{module_name}.{func_name}")
+        elif isinstance(node.func, ast.Attribute):
+            if isinstance(node.func.value, ast.Name):
+                if node.func.value.id == 'self':
+                    parent = ctx.enclosing(ast.ClassDef)
+                    if parent is not None:
+                        module_name = Path(file_path).stem
+                        class_name = parent.name
+                        method_name = node.func.attr
+                        self.called_functions.add(f"{module_name}.{class_name}.{method_name}")
+                else:
+                    self.used_names[file_path].add(node.func.value.id)
+                    self.globally_used_imports.add(node.func.value.id)
+
+    def _report_unused_imports(self, file_path: str, quality_issues: defaultdict, lines: List[str] = None):
         imported = self.imported_names.get(file_path, set())
         used = self.used_names.get(file_path, set())
         
@@ -89,18 +152,22 @@ class UnusedCodeChecker:
             quality_issues["unused_code"].append({
                 "description": f"Unused import: {name}",
                 "file_path": file_path,
-                "line": self._find_import_line(file_path, name),
+                "line": self._find_import_line(file_path, name, lines),
                 "severity": "low"
             })
 
-    def _report_unused_functions(self, quality_issues: defaultdict):
+    def _report_unused_functions(self, quality_issues: defaultdict, defined: Dict = None, called: set = None):
         special_patterns = {"__init__", "main", "test_", "setup", "teardown"}
+        if defined is None:
+            defined = self.defined_functions
+        if called is None:
+            called = self.called_functions
         
-        for func_name, info in self.defined_functions.items():
+        for func_name, info in defined.items():
             if any(pattern in func_name.split(".")[-1] for pattern in special_patterns):
                 continue
                 
-            if func_name not in self.called_functions:
+            if func_name not in called:
                 quality_issues["unused_code"].append({
                     "description": f"Unused function: {info['name']}",
                     "file_path": info["file_path"],
@@ -108,12 +175,13 @@ class UnusedCodeChecker:
                     "severity": "medium"
                 })
 
-    def _find_import_line(self, file_path: str, name: str) -> int:
+    def _find_import_line(self, file_path: str, name: str, lines: List[str] = None) -> int:
         """Find the line number where a name is imported"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
+            if lines is None:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    lines = f.readlines()
+
             for i, line in enumerate(lines, 1):
                 if f"import {name}" in line or f"as {name}" in line:
                     return i
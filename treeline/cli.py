@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import json
 from pathlib import Path
 
 import click
@@ -7,13 +8,21 @@ from rich.panel import Panel
 from rich.table import Table
 import uvicorn
 
+from treeline.cache import AnalysisCache
 from treeline.dependency_analyzer import ModuleDependencyAnalyzer
 from treeline.enhanced_analyzer import EnhancedCodeAnalyzer
+from treeline.since import select_since, unselected_files
 from treeline.utils.report import ReportGenerator
 from treeline.config_manager import get_config, ConfigManager
 
 console = Console()
 
+def _get_cache(directory, config_manager, no_cache: bool):
+    """Per-file analysis cache for ``directory``, or None when disabled."""
+    if no_cache:
+        return None
+    return AnalysisCache(Path(directory), config=config_manager.as_dict())
+
 @click.group()
 def cli():
     """
@@ -32,7 +41,9 @@ def cli():
 @click.argument("directory", type=click.Path(exists=True))
 @click.option("--depth", default=1, help="Analysis depth for dependencies")
 @click.option("--config", type=click.Path(), help="Path to configuration file")
-def analyze(directory, depth, config):
+@click.option("--no-cache", is_flag=True, help="Ignore and don't update the per-file analysis cache")
+@click.option("--since", metavar="REV", help="Only analyze files changed since a git revision, plus their dependents")
+def analyze(directory, depth, config, no_cache, since):
     """
     Analyze your codebase structure and quality metrics.
 
@@ -41,20 +52,30 @@ def analyze(directory, depth, config):
       treeline analyze /path/to/codebase
       treeline analyze . --depth 2
       treeline analyze . --config ./my_config.json
+      treeline analyze . --no-cache
+      treeline analyze . --since origin/main
     """
     config_manager = get_config(config)
+    cache = _get_cache(directory, config_manager, no_cache)
     
     with console.status("[bold green]Analyzing codebase..."):
         try:
             dep_analyzer = ModuleDependencyAnalyzer(config=config_manager.as_dict())
             code_analyzer = EnhancedCodeAnalyzer(config=config_manager.as_dict())
 
-            dep_analyzer.analyze_directory(Path(directory))
-
-            entry_points = dep_analyzer.get_entry_points()
-            core_components = dep_analyzer.get_core_components()
+            if since:
+                selected = select_since(Path(directory), since, dep_analyzer, cache=cache)
+                modules = {dep_analyzer.module_name_for(fp) for fp in selected}
+                entry_points = [ep for ep in dep_analyzer.get_entry_points() if ep in modules]
+                core_components = [c for c in dep_analyzer.get_core_components() if c["name"] in modules]
+            else:
+                dep_analyzer.analyze_directory(Path(directory), cache=cache)
+                entry_points = dep_analyzer.get_entry_points()
+                core_components = dep_analyzer.get_core_components()
 
             console.print("\n[bold]📊 Analysis Results[/]")
+            if since:
+                console.print(f"\n[bold]Changed since {since}:[/] {len(selected)} files including dependents")
 
             console.print("\n[bold]Entry Points:[/]")
             if entry_points:
@@ -193,7 +214,10 @@ def set_config(key, value, path):
 @cli.command()
 @click.argument("directory", type=click.Path(exists=True))
 @click.option("--min-complexity", default=10, help="Minimum complexity to report")
-def quality(directory, min_complexity):
+@click.option("--no-cache", is_flag=True, help="Ignore and don't update the per-file analysis cache")
+@click.option("--since", metavar="REV", help="Only analyze files changed since a git revision, plus their dependents")
+@click.option("--ndjson", is_flag=True, help="Stream one JSON object per file as it is analyzed")
+def quality(directory, min_complexity, no_cache, since, ndjson):
     """
     Analyze code quality metrics and highlight complex or smelly code.
 
@@ -201,22 +225,28 @@ def quality(directory, min_complexity):
     Examples:
       treeline quality /path/to/codebase
       treeline quality . --min-complexity 12
+      treeline quality . --no-cache
+      treeline quality . --since origin/main
+      treeline quality . --ndjson > quality.ndjson
     """
+    if ndjson:
+        _stream_quality(directory, no_cache, since)
+        return
+
     with console.status("[bold green]Analyzing code quality..."):
         try:
             analyzer = EnhancedCodeAnalyzer()
-            results = []
-
-            for file in Path(directory).rglob("*.py"):
-                results.extend(analyzer.analyze_file(file))
+            complex_funcs = []
+            smells = []
+            for analysis in _iter_quality(analyzer, directory, no_cache, since):
+                for r in analysis.elements:
+                    if r["type"] == "function" and r["metrics"]["complexity"] >= min_complexity:
+                        complex_funcs.append(r)
+                    if r["code_smells"]:
+                        smells.append(r)
 
             console.print("\n[bold]🔍 Code Quality Report[/]\n")
 
-            complex_funcs = [
-                r for r in results
-                if r["type"] == "function"
-                and r["metrics"]["complexity"] >= min_complexity
-            ]
             if complex_funcs:
                 table = Table(show_header=True, title="Complex Functions")
                 table.add_column("Function")
@@ -237,7 +267,6 @@ def quality(directory, min_complexity):
             else:
                 console.print("No functions exceed the specified complexity threshold.")
 
-            smells = [r for r in results if r["code_smells"]]
             if smells:
                 console.print("\n[bold]Code Smells:[/]")
                 for item in smells:
@@ -251,6 +280,175 @@ def quality(directory, min_complexity):
             console.print(f"[red]Error:[/] {str(e)}", style="bold red")
 
 
+def _iter_quality(analyzer, directory, no_cache: bool, since: str = None):
+    cache = _get_cache(directory, get_config(), no_cache)
+    files = context = None
+    if since:
+        files = select_since(Path(directory), since, ModuleDependencyAnalyzer(), cache=cache)
+        context = unselected_files(Path(directory), files)
+    return analyzer.iter_analyze(Path(directory), cache=cache, files=files, context=context)
+
+
+def _stream_quality(directory, no_cache: bool, since: str = None):
+    """Write one ``file`` record per analyzed file, then a ``summary`` with cross-file issues."""
+    analyzer = EnhancedCodeAnalyzer()
+    files = 0
+    try:
+        for analysis in _iter_quality(analyzer, directory, no_cache, since):
+            files += 1
+            click.echo(json.dumps(
+                {"type": "file", "path": analysis.path, "lines": analysis.lines, "elements": analysis.elements},
+                default=str,
+            ))
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        raise SystemExit(1)
+
+    click.echo(json.dumps({
+        "type": "summary",
+        "files": files,
+        "issue_counts": {category: len(issues) for category, issues in analyzer.quality_issues.items()},
+        "duplication": analyzer.quality_issues.get("duplication", []),
+        "unused_functions": [
+            issue for issue in analyzer.quality_issues.get("unused_code", [])
+            if issue["description"].startswith("Unused function")
+        ],
+    }, default=str))
+
+
+@cli.command()
+@click.argument("directory", type=click.Path(exists=True, file_okay=False), default=".")
+@click.option("--poll", is_flag=True, help="Use stat polling instead of inotify")
+@click.option("--interval", default=1.0, help="Polling interval in seconds")
+@click.option("--debounce", default=0.2, help="Seconds to wait for a burst of saves to settle")
+@click.option("--no-cache", is_flag=True, help="Ignore and don't update the per-file analysis cache")
+def watch(directory, poll, interval, debounce, no_cache):
+    """
+    Watch a codebase and re-analyze files as they change.
+
+    \b
+    Examples:
+      treeline watch .
+      treeline watch /path/to/codebase --poll --interval 2
+    """
+    from treeline.watch import WatchSession, watch as watch_directory
+
+    config_manager = get_config()
+    directory = Path(directory)
+    session = WatchSession(directory, config=config_manager.as_dict(), cache=_get_cache(directory, config_manager, no_cache))
+
+    with console.status("[bold green]Running initial analysis..."):
+        session.start()
+    issue_count = sum(len(issues) for issues in session.code_analyzer.quality_issues.values())
+    console.print(f"[green]Watching {len(session.files)} files[/] ({issue_count} issues). Press Ctrl+C to stop.")
+
+    def report_changes(summary):
+        table = Table(show_header=True, title=f"Re-analyzed in {summary.elapsed * 1000:.0f} ms")
+        table.add_column("File")
+        table.add_column("Issues", justify="right")
+        for path in summary.changed:
+            table.add_row(path, str(len(summary.issues.get(path, []))))
+        for path in summary.removed:
+            table.add_row(path, "[dim]removed[/]")
+        console.print(table)
+        for issue in summary.duplication:
+            console.print(f"  [yellow]duplication:[/] {issue['description']}")
+        for cycle in summary.cycles:
+            console.print(f"  [red]import cycle:[/] {' -> '.join(cycle)}")
+
+    try:
+        watch_directory(directory, session, report_changes, debounce=debounce,
+                        force_polling=poll, interval=interval)
+    except KeyboardInterrupt:
+        console.print("\n[green]Stopped watching.[/]")
+
+
+@cli.command()
+@click.argument("module")
+@click.argument("directory", type=click.Path(exists=True, file_okay=False), default=".")
+@click.option("--depends-on", "other", metavar="MODULE", help="Only check whether MODULE is a transitive dependency")
+@click.option("--json", "as_json", is_flag=True, help="Print the result as JSON")
+@click.option("--no-cache", is_flag=True, help="Ignore and don't update the per-file analysis cache")
+def impact(module, directory, other, as_json, no_cache):
+    """
+    Show the modules affected by changing MODULE and the ones it depends on.
+
+    \b
+    Examples:
+      treeline impact treeline.cache treeline
+      treeline impact cli . --depends-on cache
+    """
+    dep_analyzer = ModuleDependencyAnalyzer()
+    with console.status("[bold green]Analyzing imports..."):
+        dep_analyzer.analyze_directory(Path(directory), cache=_get_cache(directory, get_config(), no_cache))
+        reachability = dep_analyzer.import_reachability()
+
+    result = dep_analyzer.impact(module, reachability)
+    if result is None:
+        console.print(f"[red]Error:[/] no analyzed module matches '{module}'", style="bold red")
+        raise SystemExit(1)
+
+    if other is not None:
+        target = dep_analyzer.module_index.resolve(other)
+        depends = target is not None and reachability.reaches(result["module"], target)
+        if as_json:
+            click.echo(json.dumps({"module": result["module"], "other": target, "depends": depends}))
+        else:
+            verdict = "depends" if depends else "does not depend"
+            console.print(f"{result['module']} {verdict} on {target or other}")
+        return
+
+    if as_json:
+        click.echo(json.dumps(result))
+        return
+
+    console.print(f"\n[bold]Impact of changing {result['module']}[/] ({result['file']})")
+    if result["in_cycle"]:
+        console.print("[yellow]This module is part of an import cycle.[/]")
+    for title, modules in (("Affected modules", result["affected"]), ("Depends on", result["depends_on"])):
+        table = Table(show_header=True, title=f"{title} ({len(modules)})")
+        table.add_column("Module")
+        for name in modules:
+            table.add_row(name)
+        console.print(table)
+
+
+@cli.command()
+@click.argument("query")
+@click.argument("directory", type=click.Path(exists=True, file_okay=False), default=".")
+@click.option("--limit", default=20, help="Maximum number of results")
+@click.option("--json", "as_json", is_flag=True, help="Print the results as JSON")
+@click.option("--no-cache", is_flag=True, help="Ignore and don't update the per-file analysis cache")
+def find(query, directory, limit, as_json, no_cache):
+    """
+    Find modules, classes and functions by name, prefix or approximate name.
+
+    \b
+    Examples:
+      treeline find impact treeline
+      treeline find ModuleDep . --limit 5
+    """
+    dep_analyzer = ModuleDependencyAnalyzer()
+    with console.status("[bold green]Analyzing symbols..."):
+        dep_analyzer.analyze_directory(Path(directory), cache=_get_cache(directory, get_config(), no_cache))
+
+    results = dep_analyzer.search_symbols(query, limit)
+    if as_json:
+        click.echo(json.dumps(results))
+        return
+    if not results:
+        console.print(f"No symbols match '{query}'")
+        raise SystemExit(1)
+
+    table = Table(show_header=True, title=f"Symbols matching '{query}'")
+    for column in ("Symbol", "Kind", "Location", "Match", "Fan-in"):
+        table.add_column(column)
+    for result in results:
+        table.add_row(result["qualified_name"], result["kind"], f"{result['file']}:{result['line']}",
+                      result["match"], str(result["fan_in"]))
+    console.print(table)
+
+
 @cli.command()
 def serve():
     """
@@ -278,8 +476,9 @@ def serve():
 @click.argument("directory", type=click.Path(exists=True), default=".")
 @click.option("--output", default=None, help="Output markdown filename (default: a timestamped file like treeline_report_YYYYMMDD_HHMMSS.md)")
 @click.option("--json", is_flag=True, help="Output report in JSON format instead of Markdown")
-
-def report(directory, output, json):
+@click.option("--no-cache", is_flag=True, help="Ignore and don't update the per-file analysis cache")
+@click.option("--since", metavar="REV", help="Only analyze files changed since a git revision, plus their dependents")
+def report(directory, output, json, no_cache, since):
     """
     Generate a report summarizing analysis results.
 
@@ -288,10 +487,12 @@ def report(directory, output, json):
       treeline report /path/to/codebase
       treeline report . --output custom_report.md
       treeline report . --json
+      treeline report . --since origin/main --json
     """
     with console.status("[bold green]Generating report..."):
         try:
-            report_gen = ReportGenerator(Path(directory))
+            cache = _get_cache(directory, get_config(), no_cache)
+            report_gen = ReportGenerator(Path(directory), cache=cache, since=since)
             report_gen.analyze()
 
             format_str = "json" if json else "md"
@@ -34,12 +34,19 @@ class ConfigManager:
         "MAX_NESTED_DEPTH": 4,
         
         "MAX_DUPLICATED_LINES": 6,
+        "MAX_DUPLICATED_BLOCKS": 2,
+        "MIN_DUPLICATION_SIMILARITY": 0.8,
         
         "MAX_PASSWORD_LENGTH": 8,
         "ENABLE_SECURITY_CHECKS": True,
         
         "MIN_MAINTAINABILITY_INDEX": 65,
         "COGNITIVE_LOAD_THRESHOLD": 25,
+
+        "PARALLEL_CHUNK_BYTES": 262144,
+
+        "MAX_CYCLES_REPORTED": 100,
+        "MAX_CYCLE_LENGTH": 10,
     }
     
     _instance = None
@@ -2,11 +2,15 @@ import ast
 import re
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional
 from treeline.utils.metrics import calculate_cyclomatic_complexity
-from concurrent.futures import ProcessPoolExecutor
 
-from treeline.ignore import read_ignore_patterns, should_ignore
+from treeline.cache import AnalysisCache
+from treeline.module_index import ModuleIndex, absolute_import
+from treeline.optimization.graph import CSRGraph, EdgeKind, GraphBuilder
+from treeline.optimization.reachability import ReachabilityIndex
+from treeline.optimization.search import Symbol, SymbolSearchIndex
+from treeline.pipeline import AnalysisPipeline, ParsedFile, parse_file
 from treeline.models.dependency_analyzer import (
     FunctionCallInfo,
     FunctionLocation,
@@ -29,13 +33,24 @@ def default_call_graph():
 class ModuleDependencyAnalyzer:
     def __init__(self, config: Dict = None):
         self.config = config or {}
+        self.directory = None
         self.module_imports = {}
+        # Resolved module -> modules importing it; kept in step with module_imports.
+        self._importers = defaultdict(set)
+        # Module -> the _importers and function_calls keys its merged result added.
+        self._import_targets = {}
+        self._call_targets = {}
         self.module_metrics = {}
         self.complex_functions = {}
         self.function_locations = {}
         self.function_calls = defaultdict(list)  
         self.class_info = {}
         self.call_graph = defaultdict(default_call_graph)
+        self._module_results = {}
+        self._module_index = None
+        self._symbol_index = None
+        # Modules merged or forgotten since the symbol index last caught up.
+        self._stale_symbols = set()
         
         self.QUALITY_METRICS = {
             "MAX_LINE_LENGTH": self.config.get("MAX_LINE_LENGTH", 100),
@@ -67,38 +82,120 @@ class ModuleDependencyAnalyzer:
             "main_guard": r'if\s+__name__\s*==\s*[\'"]__main__[\'"]\s*:',
         }
 
-    def analyze_directory(self, directory: Path):
+    def analyze_directory(self, directory: Path, cache: AnalysisCache = None):
         self.directory = directory
-        ignore_patterns = read_ignore_patterns(directory)
-        python_files = [fp for fp in directory.rglob("*.py") if not should_ignore(fp, ignore_patterns)]
-        
-        with ProcessPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(self._analyze_file, fp) for fp in python_files]
-            for future in futures:
-                result = future.result()
-                if result:
-                    module_name = result["module_name"]
-                    if module_name not in self.module_imports:
-                        self.module_imports[module_name] = set()
-                    self.module_imports[module_name].update(result["imports"])
-                    self.module_metrics[module_name] = result["metrics"]
-                    self.function_locations.update(result["function_locations"])
-
-                    for call in result["function_calls"]:
-                        to_func_id = f"{call['to_module']}.{call['to_function']}"
-                        self.function_calls[to_func_id].append(call)
-
-                    if module_name not in self.class_info:
-                        self.class_info[module_name] = {}
-
-                    self.class_info[module_name].update(result["class_info"])
+        AnalysisPipeline(self, cache=cache).run(directory)
+
+    def merge_result(self, result: dict):
+        module_name = result["module_name"]
+        if module_name in self._module_results:
+            self.forget_module(module_name)
+        self._module_results[module_name] = result
+        if self._symbol_index is not None:
+            self._stale_symbols.add(module_name)
+        if module_name not in self.module_imports:
+            self.module_imports[module_name] = set()
+        for name in result["imports"]:
+            self._add_import(module_name, name)
+        for name in result.get("from_imports", ()):
+            if self._is_submodule(name):
+                self._add_import(module_name, name)
+        self.module_metrics[module_name] = result["metrics"]
+        self.function_locations.update(result["function_locations"])
+
+        call_targets = self._call_targets.setdefault(module_name, set())
+        for call in result["function_calls"]:
+            to_func_id = f"{self._resolve(call['to_module'])}.{call['to_function']}"
+            self.function_calls[to_func_id].append(call)
+            call_targets.add(to_func_id)
+
+        if module_name not in self.class_info:
+            self.class_info[module_name] = {}
+
+        self.class_info[module_name].update(result["class_info"])
+
+    def forget_module(self, module_name: str) -> bool:
+        """Remove everything ``merge_result`` added for ``module_name``."""
+        result = self._module_results.pop(module_name, None)
+        if result is None:
+            return False
+        if self._symbol_index is not None:
+            self._stale_symbols.add(module_name)
+        self.module_imports.pop(module_name, None)
+        for name in self._import_targets.pop(module_name, ()):
+            importers = self._importers.get(name)
+            if importers is not None:
+                importers.discard(module_name)
+                if not importers:
+                    del self._importers[name]
+        self.module_metrics.pop(module_name, None)
+        self.class_info.pop(module_name, None)
+        for func_id in result["function_locations"]:
+            self.function_locations.pop(func_id, None)
+        for to_func_id in self._call_targets.pop(module_name, ()):
+            remaining = [call for call in self.function_calls.get(to_func_id, []) if call["from_module"] != module_name]
+            if remaining:
+                self.function_calls[to_func_id] = remaining
+            else:
+                self.function_calls.pop(to_func_id, None)
+        return True
+
+    def _resolve(self, name: str) -> str:
+        """The analyzed module ``name`` refers to, or ``name`` itself for external modules."""
+        if self.directory is None:
+            return name
+        return self.module_index.resolve(name) or name
+
+    def _add_import(self, module_name: str, name: str):
+        self.module_imports[module_name].add(name)
+        target = self._resolve(name)
+        if target != module_name:
+            self._importers[target].add(module_name)
+            self._import_targets.setdefault(module_name, set()).add(target)
+
+    def _is_submodule(self, name: str) -> bool:
+        """Whether ``name`` resolves to an analyzed module of its own rather than to its package."""
+        module = self.module_index.resolve(name)
+        return module is not None and module != self.module_index.resolve(name.rsplit(".", 1)[0])
+
+    def importers_of(self, module_name: str) -> set:
+        """Modules with an import that resolves to ``module_name``."""
+        return self._importers.get(module_name, set())
+
+    def in_degree(self, module_name: str) -> int:
+        return len(self._importers.get(module_name, ()))
+
+    def out_degree(self, module_name: str) -> int:
+        return len(self.module_imports.get(module_name, ()))
+
+    def forget_file(self, file_path: Path) -> bool:
+        module_name = self.module_name_for(file_path)
+        self.module_index.remove(file_path)
+        return self.forget_module(module_name)
+
+    @property
+    def module_index(self) -> ModuleIndex:
+        """Module/file lookups for ``self.directory``; the pipeline fills it from discovery."""
+        if self._module_index is None or str(self._module_index.root) != str(self.directory):
+            self._module_index = ModuleIndex(self.directory)
+        return self._module_index
+
+    @module_index.setter
+    def module_index(self, index: ModuleIndex):
+        self._module_index = index
+
+    def module_name_for(self, file_path: Path) -> str:
+        return self.module_index.module_for(file_path)
+
+    def file_for_module(self, name: str) -> Optional[str]:
+        """The analyzed file that importing ``name`` loads, if any."""
+        module = self.module_index.resolve(name)
+        file_path = self.module_index.file_for(module) if module else None
+        return str(file_path) if file_path else None
 
     def _analyze_module(self, tree: ast.AST, module_name: str, file_path: str) -> dict:
-        for parent in ast.walk(tree):
-            for child in ast.iter_child_nodes(parent):
-                setattr(child, "parent", parent)
-
         imports = set()
+        from_imports = set()
         imported_modules = {} 
         for node in ast.walk(tree):
             if isinstance(node, ast.Import):
@@ -106,11 +203,19 @@ class ModuleDependencyAnalyzer:
                     imports.add(name.name)
                     imported_modules[name.name] = name.name  
             elif isinstance(node, ast.ImportFrom):
+                base = absolute_import(module_name, node.module, node.level) if node.level else node.module
                 if node.module:
-                    imports.add(node.module)
-                    for name in node.names:
-                        alias = name.asname or name.name
-                        imported_modules[alias] = f"{node.module}.{name.name}"  # e.g., 'file3': 'sub.file3'
+                    imports.add(base)
+                for name in node.names:
+                    alias = name.asname or name.name
+                    target = f"{base}.{name.name}" if base else name.name  # e.g., 'file3': 'sub.file3'
+                    if not node.module:
+                        # `from . import x` may import the submodule x, so record it by name.
+                        imports.add(target)
+                    elif name.name != "*":
+                        # `from pkg import x` too, but only if x is an analyzed module; see merge_result.
+                        from_imports.add(target)
+                    imported_modules[alias] = target
 
         functions = []
         classes = []
@@ -129,53 +234,52 @@ class ModuleDependencyAnalyzer:
         local_functions = set()
         imported_functions = {}
 
+        # Module-level functions are exactly the definitions in the module's body.
+        module_functions = [
+            node for node in getattr(tree, "body", ()) if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        ]
+        local_functions.update(node.name for node in module_functions)
         for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                if isinstance(getattr(node, "parent", None), ast.Module):
-                    local_functions.add(node.name)
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    for name in node.names:
-                        alias = name.asname or name.name
-                        imported_functions[alias] = f"{node.module}.{name.name}"
-
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                parent = getattr(node, "parent", None)
-                if isinstance(parent, ast.Module):
-                    func_id = f"{module_name}.{node.name}"
-                    docstring = ast.get_docstring(node)
-                    location = FunctionLocation(module=module_name, file=file_path, line=node.lineno)
-                    function_locations[func_id] = {**location.__dict__, "docstring": docstring}
-
-                    for child in ast.walk(node):
-                        if isinstance(child, ast.Call):
-                            if isinstance(child.func, ast.Name):
-                                called_func = child.func.id
-                                if called_func in local_functions:
-                                    target_module = module_name
-                                    target_func = called_func
-                                elif called_func in imported_functions:
-                                    target_module, target_func = imported_functions[called_func].rsplit(".", 1)
-                                else:
-                                    continue
-                            elif isinstance(child.func, ast.Attribute) and isinstance(child.func.value, ast.Name):
-                                module_name_attr = child.func.value.id
-                                if module_name_attr in imported_modules:
-                                    target_module = imported_modules[module_name_attr]
-                                    target_func = child.func.attr
-                                else:
-                                    continue
-                            else:
-                                continue
-                            call_info = FunctionCallInfo(
-                                from_module=module_name,
-                                from_function=node.name,
-                                to_module=target_module,
-                                to_function=target_func,
-                                line=child.lineno
-                            )
-                            function_calls.append(call_info.__dict__)
+            if isinstance(node, ast.ImportFrom):
+                base = absolute_import(module_name, node.module, node.level) if node.level else node.module
+                for name in node.names:
+                    alias = name.asname or name.name
+                    imported_functions[alias] = f"{base}.{name.name}" if base else name.name
+
+        for node in module_functions:
+            func_id = f"{module_name}.{node.name}"
+            docstring = ast.get_docstring(node)
+            location = FunctionLocation(module=module_name, file=file_path, line=node.lineno)
+            function_locations[func_id] = {**location.__dict__, "docstring": docstring}
+
+            for child in ast.walk(node):
+                if isinstance(child, ast.Call):
+                    if isinstance(child.func, ast.Name):
+                        called_func = child.func.id
+                        if called_func in local_functions:
+                            target_module = module_name
+                            target_func = called_func
+                        elif "." in imported_functions.get(called_func, ""):
+                            target_module, target_func = imported_functions[called_func].rsplit(".", 1)
+                        else:
+                            continue
+                    elif isinstance(child.func, ast.Attribute) and isinstance(child.func.value, ast.Name):
+                        module_name_attr = child.func.value.id
+                        if module_name_attr in imported_modules:
+                            target_module = imported_modules[module_name_attr]
+                            target_func = child.func.attr
+                        else:
+                            continue
+                    else:
+                        continue
+                    call_info = FunctionCallInfo(
+                        from_module=module_name,
+                        from_function=node.name,
+                        to_module=target_module,
+                        to_function=target_func,
+                        line=child.lineno
+                    )
+                    function_calls.append(call_info.__dict__)
 
         class_info = {}
         for node in ast.walk(tree):
@@ -204,6 +308,7 @@ class ModuleDependencyAnalyzer:
 
         return {
             "imports": imports,
+            "from_imports": sorted(from_imports),
             "metrics": metrics.__dict__,
             "function_locations": function_locations,
             "function_calls": function_calls,
@@ -213,12 +318,15 @@ class ModuleDependencyAnalyzer:
         
     def _analyze_file(self, file_path: Path) -> dict:
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-                tree = ast.parse(content)
-            module_name = str(file_path.relative_to(self.directory)).replace("/", ".").replace(".py", "")
-            analysis = self._analyze_module(tree, module_name, str(file_path))
-            return analysis
+            parsed = parse_file(file_path)
+        except Exception as e:
+            return None
+        return self.analyze_parsed(parsed)
+
+    def analyze_parsed(self, parsed: ParsedFile) -> dict:
+        try:
+            module_name = self.module_name_for(parsed.path)
+            return self._analyze_module(parsed.tree, module_name, str(parsed.path))
         except Exception as e:
             return None
 
@@ -226,10 +334,10 @@ class ModuleDependencyAnalyzer:
         for node in ast.walk(tree):
             if isinstance(node, ast.Import):
                 for name in node.names:
-                    self.module_imports[module_name].add(name.name)
+                    self._add_import(module_name, name.name)
             elif isinstance(node, ast.ImportFrom):
                 if node.module:
-                    self.module_imports[module_name].add(node.module)
+                    self._add_import(module_name, node.module)
 
     def _collect_metrics(self, tree: ast.AST, module_name: str):
         functions = []
@@ -254,6 +362,101 @@ class ModuleDependencyAnalyzer:
         except Exception:
             return 0
 
+    def build_graph(self) -> CSRGraph:
+        """
+        Freeze the merged results into a ``CSRGraph``.
+
+        Nodes are modules, ``module.Class``, ``module.Class.method`` and
+        ``module.function`` names. Import edges go to analyzed modules only,
+        resolved through the module index; call edges only to known functions.
+        """
+        builder = GraphBuilder()
+        for module in self.module_imports:
+            builder.add_node(module)
+        for module, imports in self.module_imports.items():
+            for name in imports:
+                target = self.module_index.resolve(name)
+                if target in self.module_imports and target != module:
+                    builder.add_edge(module, target, EdgeKind.IMPORTS)
+        for module, classes in self.class_info.items():
+            for class_name, info in classes.items():
+                class_id = f"{module}.{class_name}"
+                builder.add_edge(module, class_id, EdgeKind.CONTAINS)
+                for method_name in info.get("methods", {}):
+                    builder.add_edge(class_id, f"{class_id}.{method_name}", EdgeKind.CONTAINS)
+        for func_id, location in self.function_locations.items():
+            if "module" in location:
+                builder.add_edge(location["module"], func_id, EdgeKind.CONTAINS)
+        for to_func_id, calls in self.function_calls.items():
+            if to_func_id not in self.function_locations:
+                continue
+            for call in calls:
+                builder.add_edge(f"{call['from_module']}.{call['from_function']}", to_func_id, EdgeKind.CALLS)
+        return builder.freeze()
+
+    def import_reachability(self) -> ReachabilityIndex:
+        """Transitive import reachability between the analyzed modules."""
+        return ReachabilityIndex(self.build_graph().filtered(EdgeKind.IMPORTS))
+
+    def impact(self, name: str, reachability: ReachabilityIndex = None) -> Optional[Dict]:
+        """Modules affected by changing ``name`` and modules it depends on, both transitively."""
+        module = self.module_index.resolve(name)
+        if module is None:
+            return None
+        if reachability is None:
+            reachability = self.import_reachability()
+        affected = reachability.ancestors(module)
+        return {
+            "module": module,
+            "file": str(self.module_index.file_for(module)),
+            "in_cycle": module in affected,
+            "affected": sorted(affected - {module}),
+            "depends_on": sorted(reachability.descendants(module) - {module}),
+        }
+
+    def symbol_index(self) -> SymbolSearchIndex:
+        """Search index over module, class, method and function names, caught up with merged results."""
+        if self._symbol_index is None:
+            self._symbol_index = SymbolSearchIndex()
+            stale = set(self._module_results)
+        else:
+            stale = self._stale_symbols
+        self._stale_symbols = set()
+        for module in stale:
+            result = self._module_results.get(module)
+            if result is None:
+                self._symbol_index.remove_module(module)
+            else:
+                self._symbol_index.set_module(module, self._symbols_of(result))
+        return self._symbol_index
+
+    def _symbols_of(self, result: dict) -> List[Symbol]:
+        module = result["module_name"]
+        file_path = self.module_index.file_for(module)
+        symbols = [Symbol(module, module.rsplit(".", 1)[-1], "module", module, str(file_path or ""), 1)]
+        for func_id, location in result["function_locations"].items():
+            symbols.append(Symbol(func_id, func_id.rsplit(".", 1)[-1], "function", module,
+                                  str(location["file"]), location["line"]))
+        for class_name, info in result["class_info"].items():
+            class_id = f"{module}.{class_name}"
+            symbols.append(Symbol(class_id, class_name, "class", module, str(info["file"]), info["line"]))
+            for method_name, method in info["methods"].items():
+                symbols.append(Symbol(f"{class_id}.{method_name}", method_name, "method", module,
+                                      str(info["file"]), method["line"]))
+        return symbols
+
+    def fan_in(self, symbol: Symbol) -> int:
+        """Importers of a module, or resolved call sites of a function or class."""
+        if symbol.kind == "module":
+            return self.in_degree(symbol.qualified_name)
+        return len(self.function_calls.get(symbol.qualified_name, ()))
+
+    def search_symbols(self, query: str, limit: int = 20) -> List[Dict]:
+        return [
+            {**result.symbol._asdict(), "match": result.match, "score": result.score, "fan_in": result.fan_in}
+            for result in self.symbol_index().search(query, limit, fan_in=self.fan_in)
+        ]
+
     def get_graph_data(self):
         nodes = []
         links = []
@@ -263,8 +466,8 @@ class ModuleDependencyAnalyzer:
         for module in all_modules:
             node_id = len(nodes)
             node_lookup[module] = node_id
-            is_entry = not any(module in imports for imports in self.module_imports.values())
-            file_path = str(self.directory / (module.replace('.', '/') + '.py'))
+            is_entry = self.in_degree(module) == 0
+            file_path = str(self.module_index.file_for(module) or self.directory / (module.replace('.', '/') + '.py'))
             nodes.append({
                 "id": node_id,
                 "name": module,
@@ -355,9 +558,10 @@ class ModuleDependencyAnalyzer:
         for module, imports in self.module_imports.items():
             if module in node_lookup:
                 for imp in imports:
-                    if imp in node_lookup:
+                    target = self.module_index.resolve(imp)
+                    if target in node_lookup and target != module:
                         links.append(
-                            {"source": node_lookup[module], "target": node_lookup[imp], "type": "imports"}
+                            {"source": node_lookup[module], "target": node_lookup[target], "type": "imports"}
                         )
 
         return nodes, links
@@ -365,7 +569,7 @@ class ModuleDependencyAnalyzer:
     def get_entry_points(self):
         entry_points = []
         for module, metrics in self.module_metrics.items():
-            if not any(module in imports for imports in self.module_imports.values()):
+            if self.in_degree(module) == 0:
                 entry_points.append(module)
         return entry_points
     
@@ -393,10 +597,8 @@ class ModuleDependencyAnalyzer:
     def get_core_components(self):
         components = []
         for module in self.module_imports:
-            incoming = len(
-                [1 for imports in self.module_imports.values() if module in imports]
-            )
-            outgoing = len(self.module_imports[module])
+            incoming = self.in_degree(module)
+            outgoing = self.out_degree(module)
             if (
                 incoming > 2 and outgoing > 2
             ):
@@ -411,51 +613,69 @@ class ModuleDependencyAnalyzer:
         nodes, links = self.get_graph_data()
         
         if enhanced_analyzer and hasattr(enhanced_analyzer, 'quality_issues') and enhanced_analyzer.quality_issues:
-            file_to_module = {}
-            
+            module_nodes = {}
             for node in nodes:
                 if node['type'] == 'module':
-                    for func_name, location in self.function_locations.items():
-                        if location.get('module') == node['name'] and 'file' in location:
-                            file_to_module[location.get('file')] = node['name']
-                    
-                    for module_name, classes in self.class_info.items():
-                        if module_name == node['name']:
-                            for class_name, info in classes.items():
-                                if 'file' in info:
-                                    file_to_module[info.get('file')] = node['name']
-            
-            file_basenames = {Path(file_path).name: module_name for file_path, module_name in file_to_module.items()}
-            
+                    module_nodes.setdefault(node['name'], node)
+
+            file_to_module = {}
+            for module_name in module_nodes:
+                file_path = self.module_index.file_for(module_name)
+                if file_path is not None:
+                    file_to_module[str(file_path)] = module_name
+            for location in self.function_locations.values():
+                if location.get('module') in module_nodes and 'file' in location:
+                    file_to_module[location['file']] = location['module']
+            for module_name, classes in self.class_info.items():
+                if module_name in module_nodes:
+                    for info in classes.values():
+                        if 'file' in info:
+                            file_to_module[info['file']] = module_name
+
+            # Issue paths may be spelled relative or absolute, so they also
+            # match on trailing path components, longest match first.
+            suffixes = {}
+            for file_path, module_name in file_to_module.items():
+                parts = Path(file_path).parts
+                for start in range(len(parts)):
+                    suffixes[parts[start:]] = module_name
+
+            seen = {}
             for category, issues in enhanced_analyzer.quality_issues.items():
                 for issue in issues:
                     if isinstance(issue, dict) and 'file_path' in issue:
                         file_path = issue['file_path']
-                        module_name = file_to_module.get(file_path) or file_basenames.get(Path(file_path).name)
-                        
+                        module_name = file_to_module.get(file_path)
                         if not module_name:
-                            for path, mod in file_to_module.items():
-                                if path.endswith(file_path) or file_path.endswith(path):
-                                    module_name = mod
+                            parts = Path(file_path).parts
+                            for start in range(len(parts)):
+                                module_name = suffixes.get(parts[start:])
+                                if module_name:
                                     break
-                        
+
                         if module_name:
-                            for node in nodes:
-                                if node['type'] == 'module' and node['name'] == module_name:
-                                    if 'code_smells' not in node:
-                                        node['code_smells'] = []
-                                    new_issue = {
-                                        'type': category,
-                                        'description': issue.get('description', 'Unknown issue'),
-                                        'line': issue.get('line'),
-                                        'severity': issue.get('severity', 'medium')
-                                    }
-                                    if new_issue not in node['code_smells']:
-                                        node['code_smells'].append(new_issue)
-                                    break
+                            node = module_nodes[module_name]
+                            if 'code_smells' not in node:
+                                node['code_smells'] = []
+                            new_issue = {
+                                'type': category,
+                                'description': issue.get('description', 'Unknown issue'),
+                                'line': issue.get('line'),
+                                'severity': issue.get('severity', 'medium')
+                            }
+                            if module_name not in seen:
+                                seen[module_name] = {self._smell_key(smell) for smell in node['code_smells']}
+                            key = self._smell_key(new_issue)
+                            if key not in seen[module_name]:
+                                seen[module_name].add(key)
+                                node['code_smells'].append(new_issue)
         
         return nodes, links
 
+    @staticmethod
+    def _smell_key(smell: dict):
+        return (smell.get('type'), smell.get('description'), smell.get('line'), smell.get('severity'))
+
     def get_common_flows(self):
         flows = []
         for func, calls in self.function_calls.items():
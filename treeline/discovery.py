@@ -0,0 +1,203 @@
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from treeline.ignore import GITIGNORE_FILE_NAME, IGNORE_FILE_NAME, IgnoreMatcher
+
+# Directory mtimes this close to the scan may not reflect changes made in the
+# same filesystem timestamp tick, so results that recent aren't reused.
+RACY_WINDOW_NS = 1_000_000_000
+
+
+@dataclass
+class Discovery:
+    """The Python files found under a directory, with the stat taken while finding them.
+
+    ``dir_mtimes`` records every directory that was looked at, so the result
+    can be revalidated by re-stating directories instead of walking again.
+    """
+
+    directory: Path
+    files: List[Path]
+    stats: Dict[Path, os.stat_result] = field(default_factory=dict, repr=False)
+    dir_mtimes: Dict[str, int] = field(default_factory=dict, repr=False)
+    source: str = "scandir"
+    scanned_at_ns: int = field(default_factory=time.time_ns)
+
+    def is_current(self) -> bool:
+        for path, mtime in self.dir_mtimes.items():
+            if mtime >= self.scanned_at_ns - RACY_WINDOW_NS:
+                return False
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+
+def scan_python_files(directory: Path, ignore: IgnoreMatcher = None) -> Discovery:
+    """
+    Walk ``directory`` with ``os.scandir``, skipping ignored directories.
+
+    Ignored directories (``venv/``, ``node_modules/``, ``.treeline-ignore``
+    entries, ...) are pruned before they are entered rather than filtered
+    afterwards.
+    """
+    directory = Path(directory)
+    if ignore is None:
+        ignore = IgnoreMatcher(directory)
+
+    scanned_at_ns = time.time_ns()
+    files = []
+    stats = {}
+    dir_mtimes = {}
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            dir_mtimes[str(current)] = os.stat(current).st_mtime_ns
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            path = current / entry.name
+            try:
+                if entry.is_dir():
+                    if not ignore.prune(path):
+                        stack.append(path)
+                elif entry.name.endswith(".py") and entry.is_file():
+                    if not ignore.match(path):
+                        files.append(path)
+                        stats[path] = entry.stat()
+            except OSError:
+                continue
+
+    files.sort()
+    return Discovery(directory=directory, files=files, stats=stats, dir_mtimes=dir_mtimes,
+                     scanned_at_ns=scanned_at_ns)
+
+
+def git_python_files(directory: Path, ignore: IgnoreMatcher = None) -> Optional[Discovery]:
+    """
+    List tracked and untracked, non-gitignored Python files with ``git ls-files``.
+
+    Returns None when ``directory`` is not inside a git work tree or git is
+    unavailable, so callers can fall back to ``scan_python_files``.
+    """
+    directory = Path(directory)
+    scanned_at_ns = time.time_ns()
+    try:
+        completed = subprocess.run(
+            ["git", "-C", str(directory), "ls-files", "-z", "--cached", "--others",
+             "--exclude-standard", "--", "*.py"],
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    if ignore is None:
+        ignore = IgnoreMatcher(directory)
+
+    files = []
+    stats = {}
+    dir_mtimes = {}
+    for name in sorted(set(os.fsdecode(raw) for raw in completed.stdout.split(b"\0") if raw)):
+        path = directory / name
+        if ignore.is_ignored(path):
+            continue
+        try:
+            stats[path] = os.stat(path)
+        except OSError:
+            # Tracked but deleted in the work tree.
+            continue
+        files.append(path)
+
+    # A new untracked file can appear in any directory, not just ones that
+    # already hold Python files, so every directory git could list is watched.
+    _record_tree(directory, ignore, dir_mtimes)
+    _record_dir(directory / ".git" / "index", dir_mtimes)
+    return Discovery(directory=directory, files=files, stats=stats, dir_mtimes=dir_mtimes,
+                     source="git", scanned_at_ns=scanned_at_ns)
+
+
+def _record_tree(directory: Path, ignore: IgnoreMatcher, dir_mtimes: Dict[str, int]):
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            dir_mtimes[str(current)] = os.stat(current).st_mtime_ns
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir() and not ignore.prune(current / entry.name):
+                    stack.append(current / entry.name)
+            except OSError:
+                continue
+
+
+def _record_dir(path: Path, dir_mtimes: Dict[str, int]):
+    # Also used for files whose edits should invalidate a result, like ignore files.
+    try:
+        dir_mtimes[str(path)] = os.stat(path).st_mtime_ns
+    except OSError:
+        pass
+
+
+class FileDiscovery:
+    """
+    Memoized file discovery shared by every analyzer.
+
+    Results are keyed by directory and reused for as long as none of the
+    directories they were built from has changed. Only a fresh walk carries
+    ``stats``; a reused result has none, since files may have been edited in
+    place since.
+    """
+
+    def __init__(self, use_git: bool = True):
+        self.use_git = use_git
+        self._results: Dict[Tuple[str, bool], Discovery] = {}
+        self._lock = threading.Lock()
+
+    def discover(self, directory: Path, refresh: bool = False) -> Discovery:
+        directory = Path(directory)
+        key = (str(directory), self.use_git)
+        with self._lock:
+            result = self._results.get(key)
+        if result is not None and not refresh and result.is_current():
+            return result
+
+        # Without git, .gitignore files are still honoured so both paths agree.
+        ignore = IgnoreMatcher(directory, use_gitignore=self.use_git)
+        result = None
+        if self.use_git:
+            result = git_python_files(directory, ignore)
+        if result is None:
+            result = scan_python_files(directory, ignore)
+        for name in (IGNORE_FILE_NAME, GITIGNORE_FILE_NAME):
+            _record_dir(directory / name, result.dir_mtimes)
+        with self._lock:
+            self._results[key] = replace(result, stats={})
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+_default_discovery = FileDiscovery()
+
+
+def discover(directory: Path, refresh: bool = False) -> Discovery:
+    """Memoized Python files under ``directory``; see ``FileDiscovery``."""
+    return _default_discovery.discover(directory, refresh=refresh)
+
+
+def discover_python_files(directory: Path, refresh: bool = False) -> List[Path]:
+    return list(discover(directory, refresh=refresh).files)
@@ -1,11 +1,13 @@
 import ast
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set
 
+from treeline.cache import AnalysisCache
 from treeline.checkers.code_smells import CodeSmellChecker
 from treeline.checkers.complexity import ComplexityAnalyzer
 from treeline.checkers.duplication import DuplicationDetector
+from treeline.checkers.engine import CheckerEngine
 from treeline.checkers.security import SecurityAnalyzer
 from treeline.models.enhanced_analyzer import QualityIssue
 from treeline.checkers.sql_injection import SQLInjectionChecker
@@ -13,13 +15,14 @@ from treeline.checkers.style_checker import StyleChecker
 from treeline.checkers.unused_code import UnusedCodeChecker
 from treeline.utils.metrics import calculate_cyclomatic_complexity
 from treeline.config_manager import get_config
-from concurrent.futures import ProcessPoolExecutor
+from treeline.pipeline import AnalysisPipeline, FileAnalysis, ParsedFile, read_source
 
 class EnhancedCodeAnalyzer:
     def __init__(self, show_params: bool = True, config: Dict = None):
         self.show_params = show_params
         self.quality_issues = defaultdict(list)
         self.metrics_summary = defaultdict(dict)
+        self.file_analyses = {}
         
         self.config = config or get_config()
 
@@ -33,30 +36,107 @@ class EnhancedCodeAnalyzer:
         self.unused_code_checker = UnusedCodeChecker(self.config) 
 
     def analyze_file(self, file_path: Path) -> List[Dict]:
+        parsed = self._load_file(file_path)
+        if parsed is None:
+            return []
+        return self.analyze_parsed(parsed)
+
+    def analyze_parsed(self, parsed: ParsedFile) -> List[Dict]:
+        return self.check_parsed(parsed)["elements"]
+
+    def check_parsed(self, parsed: ParsedFile) -> Dict:
+        """Analyze one parsed file, merge the result and return it for caching."""
+        result = self.collect_parsed(parsed)
+        self.merge_cached(result, parsed.path)
+        return result
+
+    def collect_parsed(self, parsed: ParsedFile) -> Dict:
+        """
+        Analyze one parsed file without touching this analyzer's state.
+
+        This is the map step: the returned dict is picklable and JSON-safe, and
+        ``merge_cached`` is the matching reduce step.
+        """
+        file_path = parsed.path
+        tree = parsed.tree
+        file_issues = defaultdict(list)
+        unused_code_checker = self.unused_code_checker.for_file()
         try:
-            content = self._read_file(file_path)
-            if not content:
-                return []
-            
-            tree = self._parse_content(content)
-            if not tree:
-                return []
-
-            self.code_smell_checker.check(tree, file_path, self.quality_issues)
-            self.complexity_analyzer.check(tree, file_path, self.quality_issues)
-            self.security_analyzer.check(tree, file_path, self.quality_issues)
-            self.sql_injection_checker.check(tree, file_path, self.quality_issues)
-            self.style_checker.check(file_path, self.quality_issues)
-
-            results = self._analyze_code_elements(tree, content, file_path)
-            self._add_file_issues_to_elements(results, file_path)
-            
-            return results
+            CheckerEngine([
+                self.code_smell_checker,
+                self.complexity_analyzer,
+                self.security_analyzer,
+                self.sql_injection_checker,
+                unused_code_checker,
+            ]).run(tree, file_path, file_issues, parsed)
+            self.style_checker.check(file_path, file_issues, parsed)
+            fingerprints = self.duplication_detector.fingerprint(parsed)
+
+            results = self._analyze_code_elements(tree, parsed.source, file_path, file_issues)
+            self._add_file_issues_to_elements(results, file_path, file_issues)
         except Exception as e:
             print(f"Error analyzing {file_path}: {e}")
             raise
 
-    def _add_file_issues_to_elements(self, elements: List[Dict], file_path: Path):
+        return {
+            "elements": results,
+            "issues": dict(file_issues),
+            "duplication": fingerprints,
+            "unused": unused_code_checker.partial(),
+        }
+
+    def merge_cached(self, result: Dict, file_path: Path) -> List[Dict]:
+        """Fold a result previously returned by ``collect_parsed`` back into this analyzer."""
+        self._merge_issues(result["issues"])
+        self.merge_cross_file(result, file_path)
+        return result["elements"]
+
+    def merge_cross_file(self, result: Dict, file_path: Path):
+        """Add only the parts of a ``collect_parsed`` result that the cross-file checks use."""
+        self.duplication_detector.add_fingerprints(str(file_path), result["duplication"])
+        self.unused_code_checker.add_partial(str(file_path), result["unused"])
+
+    def _merge_issues(self, file_issues: Dict[str, List[Dict]]):
+        for category, issues in file_issues.items():
+            self.quality_issues[category].extend(issues)
+
+    def finalize(self, keep_state: bool = False, cache: AnalysisCache = None):
+        """
+        Run the cross-file checks over everything passed to ``analyze_parsed``.
+
+        With ``keep_state`` the duplication index is kept so later edits can be
+        applied with ``forget_file`` and ``refresh_cross_file``. With ``cache``
+        duplicate groups are carried over from the last run and only those of
+        changed files are re-reported.
+        """
+        if cache is not None:
+            self.duplication_detector.report_cached(self.quality_issues, cache, keep_state=keep_state)
+        else:
+            self.duplication_detector.report(self.quality_issues, keep_state=keep_state)
+        self.unused_code_checker.finalize_checks(self.quality_issues, keep_state=keep_state)
+
+    def forget_file(self, file_path: Path) -> Set:
+        """Remove a file's per-file issues and definitions; returns the affected duplicate groups."""
+        path_str = str(file_path)
+        for category, issues in self.quality_issues.items():
+            if category == "duplication":
+                continue
+            if any(isinstance(issue, dict) and issue.get("file_path") == path_str for issue in issues):
+                self.quality_issues[category] = [
+                    issue for issue in issues
+                    if not (isinstance(issue, dict) and issue.get("file_path") == path_str)
+                ]
+        self.file_analyses.pop(path_str, None)
+        self.unused_code_checker.remove_file(path_str)
+        return self.duplication_detector.remove_file(path_str)
+
+    def refresh_cross_file(self, affected: Set):
+        self.duplication_detector.refresh(self.quality_issues, affected)
+        self.unused_code_checker.refresh(self.quality_issues)
+
+    def _add_file_issues_to_elements(self, elements: List[Dict], file_path: Path, issues_by_category: Dict = None):
+        if issues_by_category is None:
+            issues_by_category = self.quality_issues
         file_issues = [
             {
                 'type': category,
@@ -64,7 +144,7 @@ class EnhancedCodeAnalyzer:
                 'line': issue.get('line'),
                 'severity': issue.get('severity', 'medium')
             }
-            for category, issues in self.quality_issues.items()
+            for category, issues in issues_by_category.items()
             for issue in issues if isinstance(issue, dict) and issue.get('file_path') == str(file_path)
         ]
         
@@ -76,62 +156,87 @@ class EnhancedCodeAnalyzer:
         elements.sort(key=lambda e: e.get('line', 0))
         sortable_issues.sort(key=lambda i: i['line'])
 
-    def analyze_directory(self, directory: Path) -> List[Dict]:
+    def analyze_directory(self, directory: Path, dependency_analyzer=None, cache: AnalysisCache = None,
+                          files: Optional[List[Path]] = None, context: Optional[List[Path]] = None) -> List[Dict]:
+        """
+        Analyze every Python file under ``directory``, or only ``files`` if given.
+
+        When ``dependency_analyzer`` is given it is fed from the same parse of
+        each file. With ``cache``, unchanged files are replayed instead of parsed,
+        and the cached results of ``context`` feed the cross-file checks.
+        """
         results = []
-        python_files = list(directory.rglob("*.py"))
+        pipeline = AnalysisPipeline(dependency_analyzer, self, cache=cache)
+        for analysis in pipeline.run(directory, files, context=context):
+            self.file_analyses[analysis.path] = analysis
+            results.extend(analysis.elements)
+        return results
 
-        with ProcessPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(self.analyze_file, file_path) for file_path in python_files]
-            for future in futures:
-                results.extend(future.result())
+    def iter_analyze(self, directory: Path, dependency_analyzer=None, cache: AnalysisCache = None,
+                     files: Optional[List[Path]] = None, context: Optional[List[Path]] = None) -> Iterator[FileAnalysis]:
+        """
+        Yield a ``FileAnalysis`` for each file as soon as it is done.
 
-        self.duplication_detector.analyze_directory(directory, self.quality_issues)
-        self.unused_code_checker.finalize_checks(self.quality_issues)
+        Unlike ``analyze_directory`` nothing is collected, so consumers can
+        stream results while keeping memory flat. Files come in completion
+        order. Cross-file issues (duplication, unused functions) are in
+        ``quality_issues`` once the generator is exhausted.
+        """
+        pipeline = AnalysisPipeline(dependency_analyzer, self, cache=cache)
+        yield from pipeline.iter_run(directory, files, context=context)
 
-        return results
+    def _load_file(self, file_path: Path) -> Optional[ParsedFile]:
+        content = self._read_file(file_path)
+        if not content:
+            return None
+        tree = self._parse_content(content, file_path)
+        if not tree:
+            return None
+        return ParsedFile.from_source(content, file_path, tree)
 
     def _read_file(self, file_path: Path) -> Optional[str]:
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
+            return read_source(file_path)
         except Exception as e:
-            self._add_issue("file", f"Could not read file: {str(e)}")
+            self._add_issue("file", f"Could not read file: {str(e)}", str(file_path))
             return None
 
-    def _parse_content(self, content: str) -> Optional[ast.AST]:
+    def _parse_content(self, content: str, file_path: Path = None) -> Optional[ast.AST]:
         try:
             return ast.parse(content)
         except Exception as e:
-            self._add_issue("parsing", f"Could not parse content: {str(e)}")
+            self._add_issue("parsing", f"Could not parse content: {str(e)}", str(file_path) if file_path else None)
             return None
 
     def _add_issue(self, category: str, description: str, file_path: str = None, line: int = None):
         issue = QualityIssue(description=description, file_path=file_path, line=line)
         self.quality_issues[category].append(issue.__dict__)
 
-    def _analyze_code_elements(self, tree: ast.AST, content: str, file_path: Path) -> List[Dict]:
+    def _analyze_code_elements(self, tree: ast.AST, content: str, file_path: Path, issues_by_category: Dict = None) -> List[Dict]:
         results = []
         
         for node in ast.walk(tree):
             if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                 func_info = self._analyze_function(node, content, file_path)
-                self._add_quality_issues_to_element(func_info, node.lineno, file_path)
+                self._add_quality_issues_to_element(func_info, node.lineno, file_path, issues_by_category)
                 results.append(func_info)
                 
             elif isinstance(node, ast.ClassDef):
                 class_info = self._analyze_class(node, content, file_path)
-                self._add_quality_issues_to_element(class_info, node.lineno, file_path)
+                self._add_quality_issues_to_element(class_info, node.lineno, file_path, issues_by_category)
                 results.append(class_info)
     
         return results
 
-    def _add_quality_issues_to_element(self, element_info: Dict, line_number: int, file_path: Path):
+    def _add_quality_issues_to_element(self, element_info: Dict, line_number: int, file_path: Path, issues_by_category: Dict = None):
         if 'code_smells' not in element_info:
             element_info['code_smells'] = []
+        if issues_by_category is None:
+            issues_by_category = self.quality_issues
         
         file_path_str = str(file_path)
         
-        for category, issues in self.quality_issues.items():
+        for category, issues in issues_by_category.items():
             for issue in issues:
                 if (isinstance(issue, dict) and
                     issue.get('file_path') == file_path_str and
@@ -1,6 +1,7 @@
-import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 DEFAULT_IGNORE_PATTERNS = [
     'venv/',
@@ -22,7 +23,7 @@ DEFAULT_IGNORE_PATTERNS = [
 def read_ignore_patterns(directory: Path) -> List[str]:
     ignore_patterns = DEFAULT_IGNORE_PATTERNS.copy()
     
-    ignore_file = directory / ".treeline-ignore"
+    ignore_file = directory / IGNORE_FILE_NAME
     if ignore_file.exists():
         with open(ignore_file, "r") as f:
             user_patterns = [
@@ -32,21 +33,234 @@ def read_ignore_patterns(directory: Path) -> List[str]:
     
     return ignore_patterns
 
-def should_ignore(path: Path, ignore_patterns: List[str]) -> bool:
-    rel_path = str(path)
-    
-    for excluded in {'venv/', '.venv/', 'env/', '__pycache__/', '.git/', '.svn/', 'build/', 'dist/', 'node_modules/'}:
-        if f'/{excluded}' in rel_path or rel_path.startswith(excluded):
-            return True
-
-    for pattern in ignore_patterns:
-        if pattern.endswith('/'):
-            dir_name = pattern.rstrip('/')
-            if f'/{dir_name}/' in rel_path or rel_path.startswith(f"{dir_name}/"):
-                return True
+IGNORE_FILE_NAME = ".treeline-ignore"
+GITIGNORE_FILE_NAME = ".gitignore"
+
+
+def _translate_segment(segment: str) -> str:
+    """Translate one path segment of a gitignore pattern into a regex."""
+    out = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == "\\" and i + 1 < len(segment):
+            out.append(re.escape(segment[i + 1]))
+            i += 2
+            continue
+        if char == "*":
+            out.append("[^/]*")
+        elif char == "?":
+            out.append("[^/]")
+        elif char == "[":
+            end = segment.find("]", i + 2 if segment[i + 1:i + 2] in ("!", "^") else i + 1)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                body = segment[i + 1:end]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
         else:
-            match_pattern = '**/' + pattern if not pattern.startswith('/') else pattern
-            if path.match(match_pattern):
+            out.append(re.escape(char))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRule(NamedTuple):
+    regex: str
+    negated: bool
+    dir_only: bool
+    anchored: bool
+
+
+def compile_pattern(line: str) -> Optional[IgnoreRule]:
+    """
+    Translate one gitignore line into an ``IgnoreRule``.
+
+    Anchored rules (those containing a ``/``) match a ``/``-separated path
+    relative to the directory the pattern came from; the others match the
+    last path component only. Returns None for blank lines and comments.
+    """
+    line = line.rstrip("\n")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated or line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    anchored = "/" in line
+    line = line.lstrip("/")
+    parts = line.split("/")
+    out = []
+    need_separator = False
+    for index, part in enumerate(parts):
+        first = index == 0
+        last = index == len(parts) - 1
+        if part == "**":
+            if first and last:
+                out.append(".*")
+            elif first:
+                out.append("(?:[^/]*/)*")
+            elif last:
+                out.append("/.*")
+            else:
+                out.append("(?:/[^/]*)*")
+            continue
+        if need_separator:
+            out.append("/")
+        out.append(_translate_segment(part))
+        need_separator = True
+
+    return IgnoreRule("".join(out), negated, dir_only, anchored)
+
+
+class _RuleSet:
+    """The patterns of one ignore file, compiled into a few combined regexes.
+
+    Unanchored rules are matched against the last path component and anchored
+    ones against the whole relative path, so each check is one regex match
+    per kind. Alternatives are listed in reverse, so the first one to match is
+    the last such pattern in the file; of the two kinds, the later rule wins,
+    as in gitignore.
+    """
+
+    def __init__(self, lines: List[str]):
+        rules = [rule for rule in (compile_pattern(line) for line in lines) if rule is not None]
+        self.negated = [rule.negated for rule in rules]
+        self.regexes = {
+            is_dir: (
+                self._combine(rules, is_dir, anchored=False),
+                self._combine(rules, is_dir, anchored=True),
+            )
+            for is_dir in (False, True)
+        }
+
+    @staticmethod
+    def _combine(rules: List[IgnoreRule], is_dir: bool, anchored: bool):
+        alternatives = [
+            f"(?P<r{index}>{rule.regex})"
+            for index, rule in reversed(list(enumerate(rules)))
+            if rule.anchored == anchored and (is_dir or not rule.dir_only)
+        ]
+        if not alternatives:
+            return None
+        return re.compile("(?:" + "|".join(alternatives) + ")", re.DOTALL)
+
+    def match(self, relative: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a negation, None if no pattern matches."""
+        basename_regex, path_regex = self.regexes[is_dir]
+        winner = -1
+        if basename_regex is not None:
+            m = basename_regex.fullmatch(relative.rpartition("/")[2])
+            if m is not None:
+                winner = int(m.lastgroup[1:])
+        if path_regex is not None:
+            m = path_regex.fullmatch(relative)
+            if m is not None:
+                winner = max(winner, int(m.lastgroup[1:]))
+        if winner < 0:
+            return None
+        return not self.negated[winner]
+
+
+class IgnoreMatcher:
+    """
+    Gitignore-style matcher for one analyzed directory.
+
+    The root scope holds ``DEFAULT_IGNORE_PATTERNS``, the root ``.gitignore``
+    (with ``use_gitignore``) and ``.treeline-ignore``, in that order. With
+    ``use_gitignore``, ``.gitignore`` files in subdirectories add scopes of
+    their own which take precedence over their parents. Supports negation,
+    anchoring, ``**`` and directory-only patterns. As in git, nothing inside
+    an ignored directory can be re-included.
+    """
+
+    def __init__(self, root: Optional[Path] = None, patterns: List[str] = None, use_gitignore: bool = False):
+        self.root = Path(root) if root is not None else None
+        self.use_gitignore = use_gitignore and self.root is not None
+        if patterns is None:
+            patterns = read_ignore_patterns(self.root) if self.root is not None else list(DEFAULT_IGNORE_PATTERNS)
+            if self.use_gitignore:
+                patterns = DEFAULT_IGNORE_PATTERNS + self._read_lines(self.root / GITIGNORE_FILE_NAME) + patterns[len(DEFAULT_IGNORE_PATTERNS):]
+        self._scopes: Dict[Tuple[str, ...], Optional[_RuleSet]] = {(): _RuleSet(patterns)}
+        self._dirs: Dict[Tuple[str, ...], bool] = {}
+
+    @staticmethod
+    def _read_lines(path: Path) -> List[str]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return []
+
+    def _parts(self, path: Path) -> Tuple[str, ...]:
+        path = Path(path)
+        if self.root is not None:
+            try:
+                return path.relative_to(self.root).parts
+            except ValueError:
+                pass
+        return tuple(part for part in path.parts if part != path.anchor)
+
+    def _scope(self, parts: Tuple[str, ...]) -> Optional[_RuleSet]:
+        if parts not in self._scopes:
+            rules = None
+            if self.use_gitignore:
+                lines = self._read_lines(self.root.joinpath(*parts, GITIGNORE_FILE_NAME))
+                if lines:
+                    rules = _RuleSet(lines)
+            self._scopes[parts] = rules
+        return self._scopes[parts]
+
+    def _match_parts(self, parts: Tuple[str, ...], is_dir: bool) -> bool:
+        for depth in range(len(parts) - 1, -1, -1):
+            rules = self._scope(parts[:depth])
+            if rules is not None:
+                result = rules.match("/".join(parts[depth:]), is_dir)
+                if result is not None:
+                    return result
+        return False
+
+    def match(self, path: Path, is_dir: bool = False) -> bool:
+        """Whether ``path`` itself matches, assuming its parent directories are not ignored."""
+        return self._match_parts(self._parts(path), is_dir)
+
+    def prune(self, directory: Path) -> bool:
+        """Whether a directory, and so everything below it, can be skipped."""
+        return self.match(directory, is_dir=True)
+
+    def is_ignored(self, path: Path, is_dir: bool = False) -> bool:
+        """Whether ``path`` is ignored, either itself or through an ignored parent directory."""
+        parts = self._parts(path)
+        for depth in range(1, len(parts)):
+            prefix = parts[:depth]
+            if prefix not in self._dirs:
+                parent_ignored = depth > 1 and self._dirs[parts[:depth - 1]]
+                self._dirs[prefix] = parent_ignored or self._match_parts(prefix, True)
+            if self._dirs[prefix]:
                 return True
-    
-    return False
\ No newline at end of file
+        return self._match_parts(parts, is_dir)
+
+
+@lru_cache(maxsize=32)
+def _matcher_for(patterns: Tuple[str, ...]) -> IgnoreMatcher:
+    return IgnoreMatcher(patterns=list(patterns))
+
+
+def should_ignore(path: Path, ignore_patterns: List[str]) -> bool:
+    return _matcher_for(tuple(ignore_patterns)).is_ignored(Path(path))
+
+
+def should_ignore_dir(path: Path, ignore_patterns: List[str]) -> bool:
+    """Whether a directory (and so everything below it) is ignored."""
+    return _matcher_for(tuple(ignore_patterns)).prune(Path(path))
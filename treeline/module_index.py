@@ -0,0 +1,110 @@
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+
+def absolute_import(module: str, name: Optional[str], level: int) -> str:
+    """
+    The absolute name of a relative import made from ``module``.
+
+    ``from . import x`` in ``pkg.mod`` or ``pkg.__init__`` is relative to
+    ``pkg``; each extra leading dot goes one package further up. Names that
+    would climb above the analyzed root are clamped to it.
+    """
+    package = module.split(".")[:-1]
+    if level > 1:
+        package = package[:max(len(package) - (level - 1), 0)]
+    if name:
+        package.append(name)
+    return ".".join(package)
+
+
+class ModuleIndex:
+    """
+    Two-way map between the Python files under ``root`` and their dotted module names.
+
+    Module names follow the analyzer's spelling: the path relative to ``root``
+    with ``/`` replaced by ``.``, so a package is ``pkg.__init__``. Both
+    ``module_for`` and ``file_for`` are dictionary lookups; ``resolve`` maps an
+    imported name onto an indexed module.
+    """
+
+    def __init__(self, root: Union[str, Path], files: Iterable[Union[str, Path]] = ()):
+        self.root = Path(root)
+        self.package = self.root.resolve().name
+        self._files: Dict[str, Path] = {}
+        self._modules: Dict[str, str] = {}
+        for file_path in files:
+            self.add(file_path)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, module: str) -> bool:
+        return module in self._files
+
+    def module_name(self, file_path: Union[str, Path]) -> str:
+        """Compute the module name of a file under ``root`` without indexing it."""
+        parts = list(Path(file_path).relative_to(self.root).parts)
+        if parts and parts[-1].endswith(".py"):
+            parts[-1] = parts[-1][:-3]
+        return ".".join(parts)
+
+    def add(self, file_path: Union[str, Path]) -> str:
+        file_path = Path(file_path)
+        module = self._modules.get(str(file_path))
+        if module is None:
+            module = self.module_name(file_path)
+            self._modules[str(file_path)] = module
+            self._files[module] = file_path
+        return module
+
+    def remove(self, file_path: Union[str, Path]) -> Optional[str]:
+        module = self._modules.pop(str(file_path), None)
+        if module is not None:
+            self._files.pop(module, None)
+        return module
+
+    def module_for(self, file_path: Union[str, Path]) -> str:
+        module = self._modules.get(str(file_path))
+        if module is None:
+            module = self.module_name(file_path)
+        return module
+
+    def file_for(self, module: str) -> Optional[Path]:
+        """The file defining ``module``; a package name gives its ``__init__.py``."""
+        file_path = self._files.get(module)
+        if file_path is None:
+            file_path = self._files.get(f"{module}.__init__")
+        return file_path
+
+    def resolve(self, name: str, importer: Optional[str] = None, level: int = 0) -> Optional[str]:
+        """
+        The indexed module that importing ``name`` loads, if any.
+
+        Relative imports are resolved against ``importer``. Names spelled with
+        the root directory's own name as a prefix (``treeline.cache`` when
+        indexing ``treeline/``) match too. If ``name`` itself is not a module,
+        the closest enclosing package is used, as for ``from pkg import func``.
+        """
+        if level:
+            if importer is None:
+                return None
+            name = absolute_import(importer, name, level)
+        candidates = [name.split(".")]
+        if name.startswith(self.package + "."):
+            candidates.insert(0, name[len(self.package) + 1:].split("."))
+        longest = max(len(parts) for parts in candidates)
+        for length in range(longest, 0, -1):
+            for parts in candidates:
+                if len(parts) >= length and parts[0]:
+                    module = self._lookup(".".join(parts[:length]))
+                    if module is not None:
+                        return module
+        return None
+
+    def _lookup(self, module: str) -> Optional[str]:
+        if module in self._files:
+            return module
+        if f"{module}.__init__" in self._files:
+            return f"{module}.__init__"
+        return None
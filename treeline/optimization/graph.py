@@ -1,25 +1,390 @@
-from collections import defaultdict
-from typing import Dict, List, Set
+from array import array
+from collections.abc import Mapping
+from enum import IntEnum
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from collections import deque
 
+
+class EdgeKind(IntEnum):
+    IMPORTS = 0
+    CALLS = 1
+    CONTAINS = 2
+
+
+class NodeTable:
+    """Interns node names as dense integer IDs, in insertion order."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        node = self.ids.get(name)
+        if node is None:
+            node = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return node
+
+    def get(self, name: str) -> Optional[int]:
+        return self.ids.get(name)
+
+    def copy(self) -> "NodeTable":
+        table = NodeTable()
+        table.ids = dict(self.ids)
+        table.names = list(self.names)
+        return table
+
+
+class CSRGraph:
+    """
+    An immutable directed graph in compressed sparse row form.
+
+    The edges of node ``v`` are ``targets[offsets[v]:offsets[v + 1]]``, sorted
+    by target, with the matching edge kinds in ``kinds``. Build one with
+    ``GraphBuilder.freeze``.
+    """
+
+    def __init__(self, table: NodeTable, offsets: array, targets: array, kinds: array):
+        self.table = table
+        self.offsets = offsets
+        self.targets = targets
+        self.kinds = kinds
+        self._reverse = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(buf) * buf.itemsize for buf in (self.offsets, self.targets, self.kinds))
+
+    def id_of(self, name: str) -> Optional[int]:
+        return self.table.get(name)
+
+    def name_of(self, node: int) -> str:
+        return self.table.names[node]
+
+    def successors(self, node: int, kind: Optional[EdgeKind] = None):
+        start, end = self.offsets[node], self.offsets[node + 1]
+        if kind is None:
+            return self.targets[start:end]
+        return [self.targets[i] for i in range(start, end) if self.kinds[i] == kind]
+
+    def out_degree(self, node: int) -> int:
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def in_degree(self, node: int) -> int:
+        return self.reverse().out_degree(node)
+
+    def edges(self) -> Iterator[Tuple[int, int, int]]:
+        offsets, targets, kinds = self.offsets, self.targets, self.kinds
+        for node in range(self.node_count):
+            for i in range(offsets[node], offsets[node + 1]):
+                yield node, targets[i], kinds[i]
+
+    def reverse(self) -> "CSRGraph":
+        """The transposed graph, built once with a counting sort and cached."""
+        if self._reverse is None:
+            n = self.node_count
+            counts = array("q", bytes(8 * (n + 1)))
+            for target in self.targets:
+                counts[target + 1] += 1
+            for node in range(n):
+                counts[node + 1] += counts[node]
+            offsets = array("q", counts)
+            targets = array("i", bytes(self.targets.itemsize * self.edge_count))
+            kinds = array("b", bytes(self.edge_count))
+            for source, target, kind in self.edges():
+                slot = counts[target]
+                targets[slot] = source
+                kinds[slot] = kind
+                counts[target] = slot + 1
+            self._reverse = CSRGraph(self.table, offsets, targets, kinds)
+            self._reverse._reverse = self
+        return self._reverse
+
+    def filtered(self, kind: EdgeKind) -> "CSRGraph":
+        """A graph over the same nodes keeping only edges of ``kind``."""
+        offsets = array("q", [0])
+        targets = array("i")
+        kinds = array("b")
+        for node in range(self.node_count):
+            for i in range(self.offsets[node], self.offsets[node + 1]):
+                if self.kinds[i] == kind:
+                    targets.append(self.targets[i])
+                    kinds.append(kind)
+            offsets.append(len(targets))
+        return CSRGraph(self.table, offsets, targets, kinds)
+
+
+class GraphBuilder:
+    """
+    Collects edges in flat arrays and freezes them into a ``CSRGraph``.
+
+    Duplicate edges (same endpoints and kind) are kept once. A builder can be
+    frozen again after more edges are added.
+    """
+
+    def __init__(self, table: NodeTable = None):
+        self.table = table if table is not None else NodeTable()
+        self._sources = array("i")
+        self._targets = array("i")
+        self._kinds = array("b")
+
+    def add_node(self, name: str) -> int:
+        return self.table.intern(name)
+
+    def add_edge(self, source: str, target: str, kind: EdgeKind = EdgeKind.IMPORTS):
+        self.add_edge_ids(self.table.intern(source), self.table.intern(target), kind)
+
+    def add_edge_ids(self, source: int, target: int, kind: EdgeKind = EdgeKind.IMPORTS):
+        self._sources.append(source)
+        self._targets.append(target)
+        self._kinds.append(kind)
+
+    def freeze(self) -> CSRGraph:
+        n = len(self.table)
+        width = len(EdgeKind)
+        # Encode each edge as one int ordered by (source, target, kind), so
+        # one sort both groups rows and removes duplicates.
+        keys = sorted({
+            (source * n + target) * width + kind
+            for source, target, kind in zip(self._sources, self._targets, self._kinds)
+        })
+        offsets = array("q", bytes(8 * (n + 1)))
+        targets = array("i", bytes(4 * len(keys)))
+        kinds = array("b", bytes(len(keys)))
+        for i, key in enumerate(keys):
+            edge, kind = divmod(key, width)
+            source, target = divmod(edge, n)
+            offsets[source + 1] += 1
+            targets[i] = target
+            kinds[i] = kind
+        for node in range(n):
+            offsets[node + 1] += offsets[node]
+        return CSRGraph(self.table, offsets, targets, kinds)
+
+
+class NamedAdjacency(Mapping):
+    """Read-only ``name -> set of names`` view over a ``CSRGraph``."""
+
+    def __init__(self, graph: CSRGraph):
+        self.graph = graph
+
+    def __getitem__(self, name: str) -> Set[str]:
+        node = self.graph.id_of(name)
+        if node is None:
+            return set()
+        return {self.graph.name_of(target) for target in self.graph.successors(node)}
+
+    def __contains__(self, name) -> bool:
+        node = self.graph.id_of(name)
+        return node is not None and self.graph.out_degree(node) > 0
+
+    def __iter__(self) -> Iterator[str]:
+        for node in range(self.graph.node_count):
+            if self.graph.out_degree(node):
+                yield self.graph.name_of(node)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def tarjan_scc(nodes: Iterable[int], successors) -> List[List[int]]:
+    """Iterative Tarjan over ``nodes``; components come out in reverse topological order."""
+    index: Dict[int, int] = {}
+    low: Dict[int, int] = {}
+    on_stack: Set[int] = set()
+    stack: List[int] = []
+    components = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+        while work:
+            v, neighbors = work[-1]
+            for w in neighbors:
+                if w not in index:
+                    index[w] = low[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(successors(w))))
+                    break
+                if w in on_stack and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+                if work:
+                    u = work[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+    return components
+
+
+def strongly_connected_components(graph: CSRGraph) -> List[List[int]]:
+    """Strongly connected components of ``graph`` in O(V + E), without recursion."""
+    return tarjan_scc(range(graph.node_count), graph.successors)
+
+
+def cyclic_components(graph: CSRGraph) -> List[List[int]]:
+    """Components that contain a cycle: more than one node, or a self-loop."""
+    return [
+        component for component in strongly_connected_components(graph)
+        if len(component) > 1 or component[0] in graph.successors(component[0])
+    ]
+
+
+def simple_cycles(graph: CSRGraph, max_cycles: Optional[int] = None, max_length: Optional[int] = None,
+                  min_length: int = 1) -> Iterator[List[int]]:
+    """
+    Elementary cycles of ``graph`` as node lists, each starting at its lowest node ID.
+
+    Without ``max_length`` this is Johnson's algorithm, which spends
+    O(V + E) per cycle found. Johnson's blocking does not hold under a length
+    bound, so with ``max_length`` each start node is searched depth-first up to
+    that many nodes instead. ``max_cycles`` stops after that many cycles.
+    """
+    if max_cycles is not None and max_cycles <= 0:
+        return
+    found = 0
+    pending = [sorted(component) for component in cyclic_components(graph)]
+    while pending:
+        component = pending.pop()
+        members = set(component)
+        start = component[0]
+        adjacency = {
+            node: [w for w in graph.successors(node) if w in members]
+            for node in component
+        }
+        if max_length is None:
+            circuits = _johnson_circuits(start, adjacency)
+        else:
+            circuits = _bounded_circuits(start, adjacency, max_length)
+        for cycle in circuits:
+            if len(cycle) < min_length:
+                continue
+            yield cycle
+            found += 1
+            if max_cycles is not None and found >= max_cycles:
+                return
+
+        members.discard(start)
+        rest = {node: [w for w in adjacency[node] if w in members] for node in members}
+        for sub in tarjan_scc(sorted(members), rest.__getitem__):
+            if len(sub) > 1 or sub[0] in rest[sub[0]]:
+                pending.append(sorted(sub))
+
+
+def _johnson_circuits(start: int, adjacency: Dict[int, List[int]]) -> Iterator[List[int]]:
+    path = [start]
+    blocked = {start}
+    closed = set()
+    blocked_by: Dict[int, Set[int]] = {}
+    stack = [(start, list(adjacency[start]))]
+    while stack:
+        node, neighbors = stack[-1]
+        if neighbors:
+            following = neighbors.pop()
+            if following == start:
+                yield path[:]
+                closed.update(path)
+            elif following not in blocked:
+                path.append(following)
+                stack.append((following, list(adjacency[following])))
+                closed.discard(following)
+                blocked.add(following)
+                continue
+        if not neighbors:
+            if node in closed:
+                unblock = [node]
+                while unblock:
+                    current = unblock.pop()
+                    if current in blocked:
+                        blocked.discard(current)
+                        unblock.extend(blocked_by.pop(current, ()))
+            else:
+                for neighbor in adjacency[node]:
+                    blocked_by.setdefault(neighbor, set()).add(node)
+            stack.pop()
+            path.pop()
+
+
+def _bounded_circuits(start: int, adjacency: Dict[int, List[int]], max_length: int) -> Iterator[List[int]]:
+    path = [start]
+    on_path = {start}
+    stack = [iter(adjacency[start])]
+    while stack:
+        for following in stack[-1]:
+            if following == start:
+                yield path[:]
+            elif following not in on_path and len(path) < max_length:
+                path.append(following)
+                on_path.add(following)
+                stack.append(iter(adjacency[following]))
+                break
+        else:
+            stack.pop()
+            on_path.discard(path.pop())
+
+
+class _OutgoingEdges:
+    def __init__(self, graph: "OptimizedDependencyGraph"):
+        self._graph = graph
+
+    def __getitem__(self, node: int) -> Set[int]:
+        frozen = self._graph.frozen()
+        if node >= frozen.node_count:
+            return set()
+        return set(frozen.successors(node))
+
+
 class OptimizedDependencyGraph:
     """High-performance graph structure for code dependencies"""
 
     def __init__(self):
-        self.nodes: Dict[str, int] = {} 
-        self.reverse_nodes: Dict[int, str] = {} 
-        self.node_types: Dict[int, str] = {}  
-        self._next_index: int = 0
-        self.outgoing_edges: Dict[int, Set[int]] = defaultdict(set)
+        self._builder = GraphBuilder()
+        self.node_types: Dict[int, str] = {}
+        self.outgoing_edges = _OutgoingEdges(self)
+        self._frozen: Optional[CSRGraph] = None
         self._cache = {}
 
+    @property
+    def nodes(self) -> Dict[str, int]:
+        return self._builder.table.ids
+
+    @property
+    def reverse_nodes(self) -> List[str]:
+        return self._builder.table.names
+
+    @property
+    def _next_index(self) -> int:
+        return len(self._builder.table)
+
     def _get_node_index(self, name: str, node_type: str = None) -> int:
         if name not in self.nodes:
-            self.nodes[name] = self._next_index
-            self.reverse_nodes[self._next_index] = name
+            index = self._builder.add_node(name)
             if node_type:
-                self.node_types[self._next_index] = node_type
-            self._next_index += 1
+                self.node_types[index] = node_type
         return self.nodes[name]
 
     def add_edge(
@@ -29,9 +394,20 @@ class OptimizedDependencyGraph:
         from_idx = self._get_node_index(from_node, from_type)
         to_idx = self._get_node_index(to_node, to_type)
 
-        self.outgoing_edges[from_idx].add(to_idx)
+        self._builder.add_edge_ids(from_idx, to_idx)
 
+        self._frozen = None
+        reachability = self._cache.get("reachability")
         self._cache.clear()
+        if reachability is not None:
+            reachability.add_edge(from_node, to_node)
+            self._cache["reachability"] = reachability
+
+    def frozen(self) -> CSRGraph:
+        """The edges added so far as a ``CSRGraph``, rebuilt after new edges."""
+        if self._frozen is None:
+            self._frozen = self._builder.freeze()
+        return self._frozen
 
     def get_connected_components(self) -> List[Set[str]]:
         """Get strongly connected components using efficient algorithms"""
@@ -43,11 +419,24 @@ class OptimizedDependencyGraph:
 
         return self._cache[cache_key]
 
+    def reachability(self) -> "ReachabilityIndex":
+        """A ``ReachabilityIndex`` over the current edges, kept up to date by ``add_edge``"""
+        from treeline.optimization.reachability import ReachabilityIndex
+
+        if "reachability" not in self._cache:
+            self._cache["reachability"] = ReachabilityIndex(self.frozen())
+        return self._cache["reachability"]
+
+    def depends_on(self, from_node: str, to_node: str) -> bool:
+        """Whether ``from_node`` transitively depends on ``to_node``"""
+        return self.reachability().reaches(from_node, to_node)
+
     def get_dependency_chain(self, start_node: str, max_depth: int = -1) -> Dict[str, int]:
         """Get all dependencies and their distances from start node"""
         if start_node not in self.nodes:
             return {}
         start_idx = self.nodes[start_node]
+        graph = self.frozen()
         queue = deque([(start_idx, 0)])
         visited = set([start_idx])
         chain = {}
@@ -57,85 +446,27 @@ class OptimizedDependencyGraph:
                 continue
             node_name = self.reverse_nodes[node_idx]
             chain[node_name] = depth
-            for neighbor in self.outgoing_edges[node_idx]:
+            for neighbor in graph.successors(node_idx):
                 if neighbor not in visited:
                     visited.add(neighbor)
                     queue.append((neighbor, depth + 1))
         return chain
 
     def _strongly_connected_components(self) -> List[Set[str]]:
-        index_counter = 0
-        stack = []
-        on_stack = set()
-        index_map = {}
-        lowlink = {}
-        sccs = []
-
-        def strongconnect(v):
-            nonlocal index_counter
-            index_map[v] = index_counter
-            lowlink[v] = index_counter
-            index_counter += 1
-            stack.append(v)
-            on_stack.add(v)
-
-            for w in self.outgoing_edges[v]:
-                if w not in index_map:
-                    strongconnect(w)
-                    lowlink[v] = min(lowlink[v], lowlink[w])
-                elif w in on_stack:
-                    lowlink[v] = min(lowlink[v], index_map[w])
-
-            if lowlink[v] == index_map[v]:
-                comp = set()
-                while True:
-                    w = stack.pop()
-                    on_stack.remove(w)
-                    comp.add(self.reverse_nodes[w])
-                    if w == v:
-                        break
-                sccs.append(comp)
-
-        for node_idx in range(self._next_index):
-            if node_idx not in index_map:
-                strongconnect(node_idx)
-
-        return sccs
-
-    def get_cycles(self) -> List[List[str]]:
-        """Detect dependency cycles efficiently"""
-        cache_key = "cycles"
+        return [
+            {self.reverse_nodes[node] for node in component}
+            for component in strongly_connected_components(self.frozen())
+        ]
+
+    def get_cycles(self, max_cycles: Optional[int] = None, max_length: Optional[int] = None) -> List[List[str]]:
+        """Elementary dependency cycles, optionally capped in number and length"""
+        cache_key = ("cycles", max_cycles, max_length)
         if cache_key in self._cache:
             return self._cache[cache_key]
 
-        cycles = []
-        visited = set()
-        path = []
-        path_set = set()
-
-        def dfs(node_idx):
-            if node_idx in path_set:
-                cycle_start = path.index(node_idx)
-                cycle = path[cycle_start:]
-                cycles.append([self.reverse_nodes[i] for i in cycle])
-                return
-
-            if node_idx in visited:
-                return
-
-            visited.add(node_idx)
-            path.append(node_idx)
-            path_set.add(node_idx)
-
-            for neighbor in self.outgoing_edges[node_idx]:
-                dfs(neighbor)
-
-            path.pop()
-            path_set.remove(node_idx)
-
-        for node_idx in range(self._next_index):
-            if node_idx not in visited:
-                dfs(node_idx)
-
+        cycles = [
+            [self.reverse_nodes[node] for node in cycle]
+            for cycle in simple_cycles(self.frozen(), max_cycles=max_cycles, max_length=max_length)
+        ]
         self._cache[cache_key] = cycles
         return cycles
@@ -1,15 +1,25 @@
 import ast
-import json
 import mmap
 import os
-from collections import defaultdict, deque
+import tokenize
+from collections import deque
+from collections.abc import Mapping
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Optional
+from typing import Callable, Dict, Iterator, List, Set, Tuple, Optional, Union
 
 import xxhash
 
+from treeline.discovery import discover
+from treeline.module_index import ModuleIndex
+from treeline.optimization.graph import CSRGraph, EdgeKind, GraphBuilder, NamedAdjacency
+from treeline.optimization.reachability import ReachabilityIndex
+from treeline.optimization.store import SymbolStore
+from treeline.pipeline import DEFAULT_CHUNK_BYTES, size_chunks
+
+DEFAULT_STORE_PATH = "treeline_index.db"
+
 @dataclass
 class IndexEntry:
     path: str
@@ -19,58 +29,111 @@ class IndexEntry:
     name: str
     hash: str
     dependencies: Set[str]
+    qualified_name: str = ""
+
+
+def _import_names(tokens: List[tokenize.TokenInfo]) -> List[str]:
+    """The names one ``import``/``from`` statement depends on, spelled as ``_parse_ast`` spells them."""
+    words = [token.string for token in tokens if token.string not in ("(", ")")]
+    if words[0] == "import":
+        names = []
+        for part in " ".join(words[1:]).split(","):
+            name = part.split(" as ")[0].replace(" ", "")
+            if name:
+                names.append(name)
+        return names
+
+    if "import" not in words:
+        return []
+    split = words.index("import")
+    module = "".join(words[1:split]).lstrip(".")
+    if not module:
+        return []
+    names = []
+    for part in " ".join(words[split + 1:]).split(","):
+        name = part.split(" as ")[0].strip()
+        if name:
+            names.append(f"{module}.{name}")
+    return names
+
+
+class StoredIndex(Mapping):
+    """Read-only ``{entry hash: IndexEntry}`` view that queries the store on access."""
+
+    def __init__(self, store: SymbolStore):
+        self.store = store
+
+    def __getitem__(self, entry_hash: str) -> IndexEntry:
+        entry = self.store.entry_by_hash(entry_hash)
+        if entry is None:
+            raise KeyError(entry_hash)
+        return entry
+
+    def __iter__(self) -> Iterator[str]:
+        return self.store.hashes()
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def values(self) -> List[IndexEntry]:
+        return self.store.entries()
+
 
 class FastIndexer:
-    def __init__(self, max_workers: int = 8):
-        self.index: Dict[str, IndexEntry] = {}
-        self.dependency_graph = defaultdict(set)
-        self.reverse_index = defaultdict(set)
-        self.file_hashes = {}
+    """
+    Symbol indexer backed by a ``SymbolStore`` on disk.
+
+    Each run hashes every discovered file and re-parses only those whose hash
+    differs from the stored one; their rows are replaced and rows of files
+    that disappeared are dropped. Everything else, including the dependency
+    graph, is read back from the store, so a warm run sees the full index.
+    """
+
+    def __init__(self, max_workers: int = 8, chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                 store_path: Union[str, Path] = DEFAULT_STORE_PATH):
+        self.store = SymbolStore(store_path)
+        self._graph: Optional[CSRGraph] = None
+        self._reachability: Optional[ReachabilityIndex] = None
+        self.file_hashes: Dict[str, str] = {}
         self.max_workers = max_workers
-        self.index_state_file = "treeline_index_state.json"
         self.last_index_state: Dict[str, str] = {}
         self.mmap_threshold = 10 * 1024 * 1024
-        self.batch_size = 1000
-        self._load_index_state()
+        self.chunk_bytes = chunk_bytes
 
-    def _load_index_state(self):
-        index_state_path = Path(self.index_state_file)
-        if index_state_path.exists():
-            try:
-                with open(index_state_path, "r", encoding="utf-8") as f:
-                    self.last_index_state = json.load(f)
-            except json.JSONDecodeError:
-                self.last_index_state = {}
-            except FileNotFoundError:
-                self.last_index_state = {}
-            except PermissionError:
-                self.last_index_state = {}
-
-    def _save_index_state(self):
-        try:
-            with open(self.index_state_file, "w", encoding="utf-8") as f:
-                json.dump(self.file_hashes, f, indent=2)
-        except PermissionError:
-            pass
-        except IOError:
-            pass
+    def __getstate__(self):
+        # Workers only parse files; the graph stays in the parent process.
+        state = self.__dict__.copy()
+        state["_graph"] = None
+        state["_reachability"] = None
+        return state
+
+    @property
+    def index(self) -> StoredIndex:
+        return StoredIndex(self.store)
+
+    @property
+    def graph(self) -> CSRGraph:
+        if self._graph is None:
+            builder = GraphBuilder()
+            for name, dependency in self.store.edges():
+                builder.add_edge(name, dependency, EdgeKind.IMPORTS)
+            self._graph = builder.freeze()
+        return self._graph
+
+    @property
+    def reachability(self) -> ReachabilityIndex:
+        if self._reachability is None:
+            self._reachability = ReachabilityIndex(self.graph)
+        return self._reachability
 
     def _process_file(self, file_path: Path) -> Tuple[str, List[IndexEntry]]:
         try:
             file_size = os.path.getsize(file_path)
-            file_hash = ""
-            
             if file_size > self.mmap_threshold:
-                try:
-                    with open(file_path, "rb") as f:
-                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
-                            file_hash = xxhash.xxh64(mm).hexdigest()
-                except (OSError, ValueError):
-                    with open(file_path, "rb") as f:
-                        file_hash = xxhash.xxh64(f.read()).hexdigest()
-            else:
-                with open(file_path, "rb") as f:
-                    file_hash = xxhash.xxh64(f.read()).hexdigest()
+                return self._process_large_file(file_path)
+
+            with open(file_path, "rb") as f:
+                file_hash = xxhash.xxh64(f.read()).hexdigest()
             
             path_str = str(file_path)
             old_hash = self.last_index_state.get(path_str, "")
@@ -80,13 +143,10 @@ class FastIndexer:
                 
             entries = []
             try:
-                if file_size > self.mmap_threshold:
-                    entries = self._parse_large_file(file_path, file_hash)
-                else:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                    tree = ast.parse(content)
-                    entries = self._parse_ast(tree, file_path, file_hash)
+                with open(file_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+                tree = ast.parse(content)
+                entries = self._parse_ast(tree, file_path, file_hash)
             except SyntaxError:
                 pass
             except UnicodeDecodeError:
@@ -106,6 +166,36 @@ class FastIndexer:
         except Exception:
             return "", []
 
+    def _process_large_file(self, file_path: Path) -> Tuple[str, List[IndexEntry]]:
+        """Hash and index a file through a single ``mmap`` without reading it into memory."""
+        with open(file_path, "rb") as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                buffer = None
+
+            if buffer is None:
+                hasher = xxhash.xxh64()
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(block)
+                file_hash = hasher.hexdigest()
+                f.seek(0)
+                readline = f.readline
+            else:
+                file_hash = xxhash.xxh64(buffer).hexdigest()
+                readline = buffer.readline
+
+            try:
+                if file_hash == self.last_index_state.get(str(file_path)):
+                    return file_hash, []
+                return file_hash, self._parse_large_file(readline, file_path, file_hash)
+            finally:
+                if buffer is not None:
+                    buffer.close()
+
+    def _process_chunk(self, paths: List[Path]) -> List[Tuple[Path, str, List[IndexEntry]]]:
+        return [(path, *self._process_file(path)) for path in paths]
+
     def _parse_ast(self, tree: ast.AST, file_path: Path, file_hash: str) -> List[IndexEntry]:
         entries = []
         module_deps = set()
@@ -160,173 +250,234 @@ class FastIndexer:
                 
         return entries
 
-    def _parse_large_file(self, file_path: Path, file_hash: str) -> List[IndexEntry]:
+    def _parse_large_file(self, readline: Callable[[], bytes], file_path: Path,
+                          file_hash: str) -> List[IndexEntry]:
+        """
+        Index a file from its token stream, as ``_parse_ast`` would from its AST.
+
+        Definitions are opened at their ``def``/``async def``/``class`` line and
+        closed at the last logical line before the next statement that is not
+        indented deeper, so nested definitions get exact ranges. Imports are
+        read up to the end of their logical line, parenthesized continuation
+        lines included, and count for the module when at top level and for
+        every enclosing definition. Only the open definitions are kept besides
+        the result, so memory does not grow with the file. A tokenize error
+        ends the scan and keeps what was indexed up to it.
+        """
+        path_str = str(file_path)
         entries = []
         module_deps = set()
-        functions = []
-        classes = []
-        
-        with open(file_path, "r", encoding="utf-8") as f:
-            line_num = 0
-            current_def = None
-            current_type = None
-            current_start = 0
-            
-            for line in f:
-                line_num += 1
-                stripped = line.strip()
-                
-                if stripped.startswith("import ") or stripped.startswith("from "):
-                    if "import " in stripped:
-                        parts = stripped.split("import ")
-                        if len(parts) > 1:
-                            imports = parts[1].split(",")
-                            for imp in imports:
-                                module_deps.add(imp.strip().split(" as ")[0])
-                
-                elif stripped.startswith("def "):
-                    if current_def:
-                        if current_type == "function":
-                            functions.append((current_def, current_start, line_num - 1))
-                        else:
-                            classes.append((current_def, current_start, line_num - 1))
-                    
-                    current_def = stripped[4:].split("(")[0].strip()
-                    current_type = "function"
-                    current_start = line_num
-                
-                elif stripped.startswith("class "):
-                    if current_def:
-                        if current_type == "function":
-                            functions.append((current_def, current_start, line_num - 1))
-                        else:
-                            classes.append((current_def, current_start, line_num - 1))
-                    
-                    current_def = stripped[6:].split("(")[0].split(":")[0].strip()
-                    current_type = "class"
-                    current_start = line_num
-        
-        if current_def:
-            if current_type == "function":
-                functions.append((current_def, current_start, line_num))
-            else:
-                classes.append((current_def, current_start, line_num))
-        
+        open_defs: List[Tuple[int, IndexEntry]] = []
+        depth = 0
+        brackets = 0
+        last_line = 0
+        at_statement_start = True
+        first_statement = True
+        # Set after a compound header's colon on the same line, e.g. ``if x: import y``.
+        inline_body = False
+        pending = None
+        statement: Optional[List[tokenize.TokenInfo]] = None
+
+        def close(min_depth: int):
+            while open_defs and open_defs[-1][0] >= min_depth:
+                _, entry = open_defs.pop()
+                entry.line_end = last_line
+                entry.hash = f"{file_hash}:{entry.line_start}-{entry.line_end}"
+
+        def finish_import():
+            nonlocal statement
+            if statement is not None:
+                names = _import_names(statement)
+                if depth == 0 and not open_defs and not inline_body:
+                    module_deps.update(names)
+                for _, entry in open_defs:
+                    entry.dependencies.update(names)
+                statement = None
+
+        try:
+            for token in tokenize.tokenize(readline):
+                kind = token.type
+                if kind in (tokenize.ENCODING, tokenize.NL, tokenize.COMMENT):
+                    continue
+                if kind == tokenize.INDENT:
+                    depth += 1
+                    continue
+                if kind == tokenize.DEDENT:
+                    depth -= 1
+                    continue
+                if kind == tokenize.NEWLINE:
+                    last_line = token.start[0]
+                    finish_import()
+                    pending = None
+                    brackets = 0
+                    at_statement_start = True
+                    first_statement = True
+                    inline_body = False
+                    continue
+                if kind == tokenize.ENDMARKER:
+                    break
+
+                if at_statement_start:
+                    at_statement_start = False
+                    if first_statement:
+                        # Anything not indented deeper than a definition ends it.
+                        close(depth)
+                        first_statement = False
+                    if token.string in ("def", "class"):
+                        pending = ("class" if token.string == "class" else "function", token.start[0])
+                    elif token.string == "async":
+                        pending = ("async", token.start[0])
+                    elif token.string in ("import", "from"):
+                        statement = [token]
+                    continue
+
+                if token.string in ("(", "[", "{"):
+                    brackets += 1
+                elif token.string in (")", "]", "}"):
+                    brackets -= 1
+                elif brackets == 0 and (token.string == ";" or token.string == ":" and statement is None):
+                    # A colon at bracket depth zero ends a compound header
+                    # (or an annotation, which is harmless to treat the same).
+                    finish_import()
+                    at_statement_start = True
+                    inline_body = inline_body or token.string == ":"
+                    continue
+
+                if pending is not None:
+                    definition_type, line = pending
+                    if definition_type == "async":
+                        pending = ("function", line) if token.string == "def" else None
+                    elif kind == tokenize.NAME:
+                        entry = IndexEntry(
+                            path=path_str,
+                            line_start=line,
+                            line_end=line,
+                            type=definition_type,
+                            name=token.string,
+                            hash="",
+                            dependencies=set()
+                        )
+                        entries.append(entry)
+                        open_defs.append((depth, entry))
+                        pending = None
+                elif statement is not None:
+                    statement.append(token)
+        except (tokenize.TokenError, SyntaxError, UnicodeDecodeError):
+            pass
+        close(0)
+
         if module_deps:
-            module_name = file_path.stem
-            entries.append(IndexEntry(
-                path=str(file_path),
+            entries.insert(0, IndexEntry(
+                path=path_str,
                 line_start=1,
                 line_end=1,
                 type="module",
-                name=module_name,
+                name=file_path.stem,
                 hash=f"{file_hash}:module",
                 dependencies=module_deps
             ))
-        
-        for name, start, end in functions:
-            entries.append(IndexEntry(
-                path=str(file_path),
-                line_start=start,
-                line_end=end,
-                type="function",
-                name=name,
-                hash=f"{file_hash}:{start}-{end}",
-                dependencies=set()
-            ))
-        
-        for name, start, end in classes:
-            entries.append(IndexEntry(
-                path=str(file_path),
-                line_start=start,
-                line_end=end,
-                type="class",
-                name=name,
-                hash=f"{file_hash}:{start}-{end}",
-                dependencies=set()
-            ))
-        
         return entries
 
     def index_codebase(self, root_path: Path):
-        python_files = list(root_path.rglob("*.py"))
-        if not python_files:
-            return
+        discovery = discover(root_path)
+        self.last_index_state = self.store.file_hashes()
+        prefix = os.path.join(str(Path(root_path)), "")
+        discovered = {str(path) for path in discovery.files}
+        removed = [path for path in self.last_index_state
+                   if path.startswith(prefix) and path not in discovered]
 
-        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_path = {executor.submit(self._process_file, path): path for path in python_files}
-            
-            new_entries = []
-            for future in as_completed(future_to_path):
-                path = future_to_path[future]
-                file_hash, entries = future.result()
-                
-                if file_hash:
-                    self.file_hashes[str(path)] = file_hash
-                
-                if entries:
-                    new_entries.extend(entries)
-        
-        self._save_index_state()
-        
-        for i in range(0, len(new_entries), self.batch_size):
-            batch = new_entries[i:i+self.batch_size]
-            
-            for entry in batch:
-                self.index[entry.hash] = entry
-                
-                for dep in entry.dependencies:
-                    self.dependency_graph[entry.name].add(dep)
-                    self.reverse_index[dep].add(entry.name)
+        sizes = []
+        for path in discovery.files:
+            stat = discovery.stats.get(path)
+            if stat is not None:
+                sizes.append((path, stat.st_size))
+                continue
+            try:
+                sizes.append((path, os.path.getsize(path)))
+            except OSError:
+                sizes.append((path, 0))
+
+        module_index = ModuleIndex(root_path)
+        changed = []
+        if sizes:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(self._process_chunk, chunk)
+                    for chunk in size_chunks(sizes, self.chunk_bytes)
+                ]
+                for future in as_completed(futures):
+                    for path, file_hash, entries in future.result():
+                        if not file_hash:
+                            continue
+                        self.file_hashes[str(path)] = file_hash
+                        if file_hash == self.last_index_state.get(str(path)):
+                            continue
+                        module = module_index.module_name(path)
+                        for entry in entries:
+                            entry.qualified_name = module if entry.type == "module" else f"{module}.{entry.name}"
+                        changed.append((str(path), file_hash, entries))
+
+        if changed or removed:
+            edges = set(self.store.edges()) if self._reachability is not None else None
+            self.store.update(changed, removed)
+            self._graph = None
+            if edges is not None:
+                current = set(self.store.edges())
+                for source, target in edges - current:
+                    self._reachability.remove_edge(source, target)
+                for source, target in current - edges:
+                    self._reachability.add_edge(source, target)
+
+    @property
+    def dependency_graph(self) -> NamedAdjacency:
+        return NamedAdjacency(self.graph)
+
+    @property
+    def reverse_index(self) -> NamedAdjacency:
+        return NamedAdjacency(self.graph.reverse())
 
     def get_dependencies(self, name: str, depth: int = -1) -> Set[str]:
-        if depth == 0:
-            return set()
-        
-        result = set()
-        visited = set()
-        queue = deque([(name, 0)])
-        
-        while queue:
-            current, level = queue.popleft()
-            
-            if current in visited:
-                continue
-                
-            visited.add(current)
-            deps = self.dependency_graph[current]
-            result.update(deps)
-            
-            if depth == -1 or level + 1 < depth:
-                for dep in deps:
-                    queue.append((dep, level + 1))
-        
-        return result
+        if depth == -1:
+            return self.reachability.descendants(name)
+        return self._walk(self.graph, name, depth)
 
     def get_dependents(self, name: str, depth: int = -1) -> Set[str]:
-        if depth == 0:
+        if depth == -1:
+            return self.reachability.ancestors(name)
+        return self._walk(self.graph.reverse(), name, depth)
+
+    def depends_on(self, name: str, other: str) -> bool:
+        return self.reachability.reaches(name, other)
+
+    def _walk(self, graph: CSRGraph, name: str, depth: int) -> Set[str]:
+        start = graph.id_of(name)
+        if depth == 0 or start is None:
             return set()
-        
+
         result = set()
-        visited = set()
-        queue = deque([(name, 0)])
+        visited = {start}
+        queue = deque([(start, 0)])
         
         while queue:
             current, level = queue.popleft()
-            
-            if current in visited:
-                continue
-                
-            visited.add(current)
-            dependents = self.reverse_index[current]
-            result.update(dependents)
+            neighbors = graph.successors(current)
+            result.update(neighbors)
             
             if depth == -1 or level + 1 < depth:
-                for dep in dependents:
-                    queue.append((dep, level + 1))
+                for neighbor in neighbors:
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        queue.append((neighbor, level + 1))
         
-        return result
+        return {graph.name_of(node) for node in result}
 
     def get_definitions_for_file(self, file_path: str) -> List[IndexEntry]:
-        file_path_str = str(file_path)
-        return [entry for entry in self.index.values() if entry.path == file_path_str]
\ No newline at end of file
+        return self.store.entries_for_file(file_path)
+
+    def find(self, name: str) -> List[IndexEntry]:
+        """Entries defined under ``name``, in any file."""
+        return self.store.entries_named(name)
+
+    def find_qualified(self, qualified_name: str) -> List[IndexEntry]:
+        """Entries for a dotted name such as ``pkg.mod.func`` or ``pkg.mod``."""
+        return self.store.entries_qualified(qualified_name)
@@ -0,0 +1,159 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from treeline.optimization.graph import CSRGraph, tarjan_scc
+
+
+def _set_bits(bits: int) -> List[int]:
+    digits = bin(bits)[:1:-1]
+    positions = []
+    position = digits.find("1")
+    while position != -1:
+        positions.append(position)
+        position = digits.find("1", position + 1)
+    return positions
+
+
+class ReachabilityIndex:
+    """
+    Transitive reachability over a ``CSRGraph``, precomputed on its condensation.
+
+    Each strongly connected component gets two bitsets (Python ints): the
+    components it reaches and the components reaching it, filled in one pass
+    over the condensation DAG in topological order. ``reaches`` is then a
+    single bit test, and ``descendants``/``ancestors`` cost what they return.
+    A node counts as reaching itself only if it lies on a cycle.
+
+    ``add_edge`` updates the bitsets in place unless the edge closes a new
+    cycle; that and ``remove_edge`` mark the index for a rebuild on the next
+    query.
+    """
+
+    def __init__(self, graph: CSRGraph):
+        self.graph = graph
+        # Nodes added later are interned here only; the frozen graph's table must not grow.
+        self.table = graph.table.copy()
+        self._added: Dict[int, Set[int]] = {}
+        self._removed: Set[Tuple[int, int]] = set()
+        self._dirty = True
+        self._components: List[List[int]] = []
+        self._component_of: List[int] = []
+        self._descendants: List[int] = []
+        self._ancestors: List[int] = []
+
+    def _successors(self, node: int) -> List[int]:
+        successors = []
+        if node < self.graph.node_count:
+            successors = [target for target in self.graph.successors(node)
+                          if (node, target) not in self._removed]
+        successors.extend(self._added.get(node, ()))
+        return successors
+
+    def _build(self):
+        node_count = len(self.table)
+        # Tarjan emits a component only after every component it reaches.
+        components = tarjan_scc(range(node_count), self._successors)
+        component_of = [0] * node_count
+        for index, component in enumerate(components):
+            for node in component:
+                component_of[node] = index
+
+        descendants = [0] * len(components)
+        predecessors: List[Set[int]] = [set() for _ in components]
+        cyclic = [len(component) > 1 for component in components]
+        for index, component in enumerate(components):
+            bits = 0
+            for node in component:
+                for target in self._successors(node):
+                    target_component = component_of[target]
+                    if target_component == index:
+                        cyclic[index] = True
+                    else:
+                        bits |= (1 << target_component) | descendants[target_component]
+                        predecessors[target_component].add(index)
+            if cyclic[index]:
+                bits |= 1 << index
+            descendants[index] = bits
+
+        ancestors = [0] * len(components)
+        for index in range(len(components) - 1, -1, -1):
+            bits = 1 << index if cyclic[index] else 0
+            for predecessor in predecessors[index]:
+                bits |= (1 << predecessor) | ancestors[predecessor]
+            ancestors[index] = bits
+
+        self._components = components
+        self._component_of = component_of
+        self._descendants = descendants
+        self._ancestors = ancestors
+        self._dirty = False
+
+    def _ensure(self):
+        if self._dirty:
+            self._build()
+            return
+        # Nodes interned since the last build start as their own component.
+        while len(self._component_of) < len(self.table):
+            self._component_of.append(len(self._components))
+            self._components.append([len(self._component_of) - 1])
+            self._descendants.append(0)
+            self._ancestors.append(0)
+
+    def _component(self, name: str) -> Optional[int]:
+        node = self.table.get(name)
+        if node is None:
+            return None
+        self._ensure()
+        return self._component_of[node]
+
+    def _members(self, bits: int) -> Set[str]:
+        names = self.table.names
+        return {names[node] for index in _set_bits(bits) for node in self._components[index]}
+
+    def reaches(self, source: str, target: str) -> bool:
+        """Whether ``source`` transitively depends on ``target``."""
+        source_component = self._component(source)
+        target_component = self._component(target)
+        if source_component is None or target_component is None:
+            return False
+        return bool((self._descendants[source_component] >> target_component) & 1)
+
+    def descendants(self, name: str) -> Set[str]:
+        """Everything ``name`` transitively depends on."""
+        component = self._component(name)
+        return set() if component is None else self._members(self._descendants[component])
+
+    def ancestors(self, name: str) -> Set[str]:
+        """Everything that transitively depends on ``name``, i.e. is affected by changing it."""
+        component = self._component(name)
+        return set() if component is None else self._members(self._ancestors[component])
+
+    def add_edge(self, source: str, target: str):
+        source_node = self.table.intern(source)
+        target_node = self.table.intern(target)
+        self._removed.discard((source_node, target_node))
+        self._added.setdefault(source_node, set()).add(target_node)
+        if self._dirty:
+            return
+        self._ensure()
+        source_component = self._component_of[source_node]
+        target_component = self._component_of[target_node]
+        if (self._descendants[target_component] >> source_component) & 1 or source_component == target_component:
+            # The edge closes a cycle, so components merge.
+            self._dirty = True
+            return
+
+        reached = (1 << target_component) | self._descendants[target_component]
+        for index in [source_component, *_set_bits(self._ancestors[source_component])]:
+            self._descendants[index] |= reached
+        reaching = (1 << source_component) | self._ancestors[source_component]
+        for index in [target_component, *_set_bits(self._descendants[target_component])]:
+            self._ancestors[index] |= reaching
+
+    def remove_edge(self, source: str, target: str):
+        source_node = self.table.get(source)
+        target_node = self.table.get(target)
+        if source_node is None or target_node is None:
+            return
+        self._added.get(source_node, set()).discard(target_node)
+        self._removed.add((source_node, target_node))
+        self._dirty = True
@@ -0,0 +1,211 @@
+import heapq
+import math
+from bisect import bisect_left
+from collections import defaultdict
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Prefix matches examined per query; short prefixes of huge trees stop here.
+MAX_PREFIX_CANDIDATES = 2000
+# Distinct names scored per fuzzy query.
+MAX_FUZZY_CANDIDATES = 2000
+# Fraction of the query's trigrams a name must contain to count as a fuzzy match.
+MIN_FUZZY_SIMILARITY = 0.5
+
+EXACT = 3
+PREFIX = 2
+FUZZY = 1
+MATCH_NAMES = {EXACT: "exact", PREFIX: "prefix", FUZZY: "fuzzy"}
+
+
+class Symbol(NamedTuple):
+    qualified_name: str
+    name: str
+    kind: str
+    module: str
+    file: str
+    line: int
+
+
+class SearchResult(NamedTuple):
+    symbol: Symbol
+    match: str
+    score: float
+    fan_in: int
+
+
+def trigrams(text: str) -> Set[str]:
+    """Three-letter windows of ``text``, with ``^``/``$`` marking its ends."""
+    padded = f"^{text}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolSearchIndex:
+    """
+    Name search over symbols, grouped by the module defining them.
+
+    Three structures answer a query, cheapest first: a dictionary of
+    lowercased short and qualified names for exact hits, sorted key arrays
+    that serve as a flat prefix trie (a prefix is one ``bisect`` plus a scan
+    of its range), and trigram posting lists over distinct short names for
+    fuzzy hits. Fuzzy candidates are only gathered from the rarest posting
+    lists that any sufficiently similar name must appear in, and at most
+    ``MAX_FUZZY_CANDIDATES`` of them are scored.
+
+    ``set_module`` replaces one module's symbols. New keys go to a small
+    sorted run that is merged into the main one only once it grows, and
+    removed symbols are left as tombstones and skipped; everything is
+    rebuilt once half of the symbols are dead. Re-indexing a few modules
+    therefore never costs a full rebuild.
+    """
+
+    def __init__(self):
+        self._clear()
+
+    def _clear(self):
+        self._symbols: List[Optional[Symbol]] = []
+        self._by_module: Dict[str, List[int]] = {}
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        self._keys: List[Tuple[str, int]] = []
+        self._recent_keys: List[Tuple[str, int]] = []
+        self._unsorted = False
+        self._name_ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._name_symbols: List[List[int]] = []
+        self._trigrams: Dict[str, List[int]] = defaultdict(list)
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._symbols) - self._dead
+
+    def __contains__(self, module: str) -> bool:
+        return module in self._by_module
+
+    def symbols(self, module: str) -> List[Symbol]:
+        return [self._symbols[symbol_id] for symbol_id in self._by_module.get(module, ())]
+
+    def set_module(self, module: str, symbols: Iterable[Symbol]):
+        symbols = list(symbols)
+        if module in self._by_module and self.symbols(module) == symbols:
+            return
+        self.remove_module(module)
+        self._by_module[module] = [self._add(symbol) for symbol in symbols]
+
+    def remove_module(self, module: str):
+        symbol_ids = self._by_module.pop(module, None)
+        if symbol_ids is None:
+            return
+        for symbol_id in symbol_ids:
+            self._symbols[symbol_id] = None
+        self._dead += len(symbol_ids)
+        if self._dead > 1024 and self._dead * 2 > len(self._symbols):
+            self._compact()
+
+    def _add(self, symbol: Symbol) -> int:
+        symbol_id = len(self._symbols)
+        self._symbols.append(symbol)
+        name = symbol.name.lower()
+        qualified_name = symbol.qualified_name.lower()
+        self._exact[name].append(symbol_id)
+        self._recent_keys.append((name, symbol_id))
+        if qualified_name != name:
+            self._exact[qualified_name].append(symbol_id)
+            self._recent_keys.append((qualified_name, symbol_id))
+        self._unsorted = True
+
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+            self._name_symbols.append([])
+            for trigram in trigrams(name):
+                self._trigrams[trigram].append(name_id)
+        self._name_symbols[name_id].append(symbol_id)
+        return symbol_id
+
+    def _compact(self):
+        modules = {module: self.symbols(module) for module in self._by_module}
+        self._clear()
+        for module, symbols in modules.items():
+            self._by_module[module] = [self._add(symbol) for symbol in symbols]
+
+    def _key_runs(self) -> Tuple[List[Tuple[str, int]], ...]:
+        if self._unsorted:
+            self._recent_keys.sort(key=itemgetter(0))
+            self._unsorted = False
+        if len(self._recent_keys) > max(4096, len(self._keys) // 16):
+            # Timsort merges the two sorted runs in linear time; sorting on
+            # the name alone keeps it from comparing whole tuples.
+            self._keys.extend(self._recent_keys)
+            self._keys.sort(key=itemgetter(0))
+            self._recent_keys = []
+        return self._keys, self._recent_keys
+
+    def search(self, query: str, limit: int = 20,
+               fan_in: Callable[[Symbol], int] = None) -> List[SearchResult]:
+        """
+        The ``limit`` best symbols for ``query``.
+
+        Exact matches rank above prefix matches, which rank above fuzzy ones.
+        Fuzzy matches are ordered by similarity; ties, and the other tiers,
+        go to the higher ``fan_in`` and then to the shorter qualified name.
+        Fuzzy matching only runs when the other tiers leave room.
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        tiers: Dict[int, Tuple[int, float]] = {}
+        for symbol_id in self._exact.get(query, ()):
+            if self._symbols[symbol_id] is not None:
+                tiers[symbol_id] = (EXACT, 1.0)
+
+        for keys in self._key_runs():
+            position = bisect_left(keys, (query,))
+            end = min(position + MAX_PREFIX_CANDIDATES, len(keys))
+            while position < end:
+                key, symbol_id = keys[position]
+                if not key.startswith(query):
+                    break
+                position += 1
+                if symbol_id not in tiers and self._symbols[symbol_id] is not None:
+                    tiers[symbol_id] = (PREFIX, len(query) / len(key))
+
+        if len(tiers) < limit:
+            for symbol_id, similarity in self._fuzzy(query):
+                if symbol_id not in tiers:
+                    tiers[symbol_id] = (FUZZY, similarity)
+
+        ranked = []
+        for symbol_id, (tier, similarity) in tiers.items():
+            symbol = self._symbols[symbol_id]
+            degree = fan_in(symbol) if fan_in is not None else 0
+            closeness = similarity if tier == FUZZY else 0.0
+            ranked.append((-tier, -closeness, -degree, len(symbol.qualified_name), symbol.qualified_name, symbol_id))
+        return [
+            SearchResult(self._symbols[symbol_id], MATCH_NAMES[-tier],
+                         round(tiers[symbol_id][0] + tiers[symbol_id][1], 3), -degree)
+            for tier, _, degree, _, _, symbol_id in heapq.nsmallest(limit, ranked)
+        ]
+
+    def _fuzzy(self, query: str) -> List[Tuple[int, float]]:
+        wanted = trigrams(query)
+        needed = max(1, math.ceil(len(wanted) * MIN_FUZZY_SIMILARITY))
+        postings = sorted((self._trigrams.get(trigram, ()) for trigram in wanted), key=len)
+        # A name sharing ``needed`` trigrams must be in one of the rarest
+        # ``len(wanted) - needed + 1`` lists.
+        candidates = set()
+        for posting in postings[:len(wanted) - needed + 1]:
+            candidates.update(posting[:MAX_FUZZY_CANDIDATES - len(candidates)])
+            if len(candidates) >= MAX_FUZZY_CANDIDATES:
+                break
+
+        matches = []
+        for name_id in candidates:
+            padded = f"^{self._names[name_id]}$"
+            shared = sum(trigram in padded for trigram in wanted)
+            if shared >= needed:
+                similarity = shared / len(wanted)
+                matches.extend((symbol_id, similarity) for symbol_id in self._name_symbols[name_id]
+                               if self._symbols[symbol_id] is not None)
+        return matches
@@ -0,0 +1,189 @@
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from treeline.optimization.indexer import IndexEntry
+
+# Bump when the tables change; an older store is dropped and rebuilt.
+STORE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    qualified_name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    line_start INTEGER NOT NULL,
+    line_end INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_name ON entries(name);
+CREATE INDEX IF NOT EXISTS entries_path ON entries(path);
+CREATE INDEX IF NOT EXISTS entries_qualified_name ON entries(qualified_name);
+CREATE INDEX IF NOT EXISTS entries_hash ON entries(hash);
+CREATE TABLE IF NOT EXISTS dependencies (
+    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dependencies_entry ON dependencies(entry_id);
+CREATE INDEX IF NOT EXISTS dependencies_name ON dependencies(name);
+"""
+
+ENTRY_COLUMNS = "id, path, line_start, line_end, type, name, hash, qualified_name"
+
+# Past this many ids one scan of the dependencies table beats binding them
+# all, which SQLite would also refuse past its parameter limit.
+_MAX_BOUND_IDS = 500
+
+
+class SymbolStore:
+    """
+    SQLite file holding ``IndexEntry`` rows, their dependencies and file hashes.
+
+    Entries belong to the file they were parsed from, so re-indexing a file
+    replaces its rows in one statement and removing a file cascades to its
+    entries and their dependencies. Lookups by name, path, qualified name and
+    hash are served by indexes rather than by loading the whole table.
+
+    The connection is opened on first use and not pickled, so the store can
+    ride along with an indexer sent to worker processes.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        return state
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(str(self.path))
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+                connection.executescript(
+                    "DROP TABLE IF EXISTS dependencies;"
+                    "DROP TABLE IF EXISTS entries;"
+                    "DROP TABLE IF EXISTS files;"
+                )
+                connection.execute(f"PRAGMA user_version = {STORE_VERSION}")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def file_hashes(self) -> Dict[str, str]:
+        return dict(self.connection.execute("SELECT path, hash FROM files"))
+
+    def update(self, changed: Iterable[Tuple[str, str, Sequence["IndexEntry"]]] = (),
+               removed: Iterable[str] = ()):
+        """
+        Replace the rows of every ``(path, hash, entries)`` in ``changed`` and
+        drop the files in ``removed``, all in one transaction.
+        """
+        connection = self.connection
+        with connection:
+            connection.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in removed))
+            for path, file_hash, entries in changed:
+                connection.execute("DELETE FROM entries WHERE path = ?", (path,))
+                connection.execute(
+                    "INSERT INTO files (path, hash) VALUES (?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET hash = excluded.hash",
+                    (path, file_hash),
+                )
+                for entry in entries:
+                    cursor = connection.execute(
+                        "INSERT INTO entries (path, name, qualified_name, type, line_start, line_end, hash) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (path, entry.name, entry.qualified_name, entry.type,
+                         entry.line_start, entry.line_end, entry.hash),
+                    )
+                    connection.executemany(
+                        "INSERT INTO dependencies (entry_id, name) VALUES (?, ?)",
+                        ((cursor.lastrowid, dependency) for dependency in sorted(entry.dependencies)),
+                    )
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def entries(self) -> List["IndexEntry"]:
+        return self._select("")
+
+    def entries_for_file(self, path: Union[str, Path]) -> List["IndexEntry"]:
+        return self._select("WHERE path = ?", (str(path),))
+
+    def entries_named(self, name: str) -> List["IndexEntry"]:
+        return self._select("WHERE name = ?", (name,))
+
+    def entries_qualified(self, qualified_name: str) -> List["IndexEntry"]:
+        return self._select("WHERE qualified_name = ?", (qualified_name,))
+
+    def entry_by_hash(self, entry_hash: str) -> Optional["IndexEntry"]:
+        entries = self._select("WHERE hash = ? LIMIT 1", (entry_hash,))
+        return entries[0] if entries else None
+
+    def hashes(self) -> Iterator[str]:
+        for (entry_hash,) in self.connection.execute("SELECT hash FROM entries ORDER BY id"):
+            yield entry_hash
+
+    def edges(self) -> Iterator[Tuple[str, str]]:
+        """Every ``(entry name, dependency)`` pair in the store."""
+        return iter(self.connection.execute(
+            "SELECT entries.name, dependencies.name FROM dependencies "
+            "JOIN entries ON entries.id = dependencies.entry_id"
+        ))
+
+    def _select(self, where: str, parameters: Sequence = ()) -> List["IndexEntry"]:
+        from treeline.optimization.indexer import IndexEntry
+
+        rows = self.connection.execute(
+            f"SELECT {ENTRY_COLUMNS} FROM entries {where}", parameters
+        ).fetchall()
+        dependencies = self._dependencies([row[0] for row in rows])
+        return [
+            IndexEntry(
+                path=path,
+                line_start=line_start,
+                line_end=line_end,
+                type=entry_type,
+                name=name,
+                hash=entry_hash,
+                dependencies=dependencies.get(entry_id, set()),
+                qualified_name=qualified_name,
+            )
+            for entry_id, path, line_start, line_end, entry_type, name, entry_hash, qualified_name in rows
+        ]
+
+    def _dependencies(self, entry_ids: List[int]) -> Dict[int, set]:
+        dependencies = defaultdict(set)
+        if len(entry_ids) > _MAX_BOUND_IDS:
+            rows = self.connection.execute("SELECT entry_id, name FROM dependencies")
+            wanted = set(entry_ids)
+            for entry_id, name in rows:
+                if entry_id in wanted:
+                    dependencies[entry_id].add(name)
+            return dependencies
+        if entry_ids:
+            placeholders = ", ".join("?" * len(entry_ids))
+            rows = self.connection.execute(
+                f"SELECT entry_id, name FROM dependencies WHERE entry_id IN ({placeholders})", entry_ids
+            )
+            for entry_id, name in rows:
+                dependencies[entry_id].add(name)
+        return dependencies
@@ -0,0 +1,494 @@
+import ast
+import os
+from array import array
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar, Union
+
+from treeline.cache import hash_bytes
+from treeline.discovery import discover
+from treeline.module_index import ModuleIndex
+
+T = TypeVar("T")
+
+# Target total source size per task sent to a worker process; override with
+# the PARALLEL_CHUNK_BYTES config setting.
+DEFAULT_CHUNK_BYTES = 256 * 1024
+
+
+class ParentIndex:
+    """Parent and ancestors of every node in a tree, from one walk.
+
+    Nodes are numbered in breadth-first order and each one's parent number is
+    kept in a compact array, with -1 for the root. Looking up a parent is one
+    dictionary probe and one array read; nothing is attached to the nodes.
+    """
+
+    def __init__(self, tree: ast.AST):
+        nodes = [tree]
+        parents = array("i", [-1])
+        index = 0
+        while index < len(nodes):
+            for child in ast.iter_child_nodes(nodes[index]):
+                nodes.append(child)
+                parents.append(index)
+            index += 1
+        self._nodes = nodes
+        self._parents = parents
+        self._order = {node: number for number, node in enumerate(nodes)}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def parent(self, node: ast.AST) -> Optional[ast.AST]:
+        number = self._order.get(node)
+        if number is None or self._parents[number] < 0:
+            return None
+        return self._nodes[self._parents[number]]
+
+    def ancestors(self, node: ast.AST) -> Iterator[ast.AST]:
+        """The node's parent, its parent's parent and so on up to the root."""
+        number = self._order.get(node)
+        if number is None:
+            return
+        number = self._parents[number]
+        while number >= 0:
+            yield self._nodes[number]
+            number = self._parents[number]
+
+    def enclosing(self, node: ast.AST, node_types: Union[Type[ast.AST], Tuple[Type[ast.AST], ...]]) -> Optional[ast.AST]:
+        """The nearest ancestor that is an instance of ``node_types``."""
+        for ancestor in self.ancestors(node):
+            if isinstance(ancestor, node_types):
+                return ancestor
+        return None
+
+
+@dataclass
+class ParsedFile:
+    """A source file that has been read, decoded and parsed exactly once.
+
+    Every analyzer and checker receives the same instance, so none of them
+    has to reopen the file or call ``ast.parse`` again.
+    """
+
+    path: Path
+    source: str
+    lines: List[str]
+    tree: ast.Module
+    _parent_index: Optional[ParentIndex] = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_source(cls, source: str, path: Union[str, Path], tree: ast.Module = None) -> "ParsedFile":
+        if tree is None:
+            tree = ast.parse(source)
+        return cls(path=Path(path), source=source, lines=source.split("\n"), tree=tree)
+
+    @property
+    def parent_index(self) -> ParentIndex:
+        """Built on first use and shared by every checker that looks up parents in this file."""
+        if self._parent_index is None:
+            self._parent_index = ParentIndex(self.tree)
+        return self._parent_index
+
+    def parent_of(self, node: ast.AST) -> Optional[ast.AST]:
+        return self.parent_index.parent(node)
+
+
+@dataclass
+class FileAnalysis:
+    path: str
+    lines: int
+    elements: List[Dict]
+
+
+def decode_source(raw: bytes) -> str:
+    """Decode file bytes the way text-mode ``open`` would."""
+    source = raw.decode("utf-8")
+    if "\r" in source:
+        source = source.replace("\r\n", "\n").replace("\r", "\n")
+    return source
+
+
+def read_source(file_path: Union[str, Path]) -> str:
+    with open(file_path, "rb") as f:
+        return decode_source(f.read())
+
+
+def parse_file(file_path: Union[str, Path]) -> ParsedFile:
+    """Read and parse a file once. Raises ``OSError``, ``UnicodeDecodeError`` or ``SyntaxError``."""
+    return ParsedFile.from_source(read_source(file_path), file_path)
+
+
+def count_lines(parsed: ParsedFile) -> int:
+    """Number of lines as ``readlines()`` would report them."""
+    if parsed.lines and parsed.lines[-1] == "":
+        return len(parsed.lines) - 1
+    return len(parsed.lines)
+
+
+def default_workers() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return min(4, len(os.sched_getaffinity(0)))
+    return min(4, os.cpu_count() or 1)
+
+
+# Worker-process state for ``AnalysisPipeline``; built once per process by
+# ``_init_worker`` so analyzers and checkers are never pickled per task.
+_worker_pipeline = None
+
+
+def _init_worker(directory: Path, dependency_spec, code_spec):
+    global _worker_pipeline
+    dependency_analyzer = code_analyzer = None
+    if dependency_spec is not None:
+        cls, config = dependency_spec
+        dependency_analyzer = cls(config=config)
+        dependency_analyzer.directory = directory
+    if code_spec is not None:
+        cls, config, show_params = code_spec
+        code_analyzer = cls(show_params=show_params, config=config)
+    _worker_pipeline = AnalysisPipeline(dependency_analyzer, code_analyzer, workers=1)
+
+
+def _map_chunk(tasks):
+    return [(index, _worker_pipeline.map_file(file_path, raw)) for index, file_path, raw in tasks]
+
+
+def size_chunks(items: List[Tuple[T, int]], chunk_bytes: int) -> List[List[T]]:
+    """
+    Group ``(item, size)`` pairs into chunks of roughly ``chunk_bytes`` each.
+
+    Items are packed largest first, so the biggest files are handed out at
+    the start and don't leave one worker busy after the others finish.
+    A single item larger than the budget gets a chunk of its own.
+    """
+    chunks = []
+    current = []
+    current_size = 0
+    for item, size in sorted(items, key=lambda pair: pair[1], reverse=True):
+        if current and current_size + size > chunk_bytes:
+            chunks.append(current)
+            current = []
+            current_size = 0
+        current.append(item)
+        current_size += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class AnalysisPipeline:
+    """Feeds one parse per file to the dependency analyzer and the quality analyzer.
+
+    Each file goes through a map step (``map_file``) that returns a compact,
+    picklable result, and a reduce step (``reduce_file``) that merges it into
+    the analyzers. With more than one worker the map step runs in a process
+    pool whose workers build their own analyzers once. Cross-file checks
+    (duplication, unused functions) run in the parent once all files have
+    been reduced. With an ``AnalysisCache``, files whose content is unchanged
+    since the last run are reduced straight from the cache.
+    """
+
+    # Below this many files to map, starting worker processes costs more than it saves.
+    PARALLEL_THRESHOLD = 64
+
+    def __init__(self, dependency_analyzer=None, code_analyzer=None, cache=None, workers: Optional[int] = None,
+                 chunk_bytes: Optional[int] = None):
+        self.dependency_analyzer = dependency_analyzer
+        self.code_analyzer = code_analyzer
+        self.cache = cache
+        self.workers = workers or default_workers()
+        self.chunk_bytes = chunk_bytes or self._configured_chunk_bytes()
+        # Stat results recorded during discovery, used once each instead of re-stating.
+        self._stats = {}
+
+    def _configured_chunk_bytes(self) -> int:
+        for analyzer in (self.code_analyzer, self.dependency_analyzer):
+            config = getattr(analyzer, "config", None)
+            if isinstance(config, dict) and config.get("PARALLEL_CHUNK_BYTES"):
+                return int(config["PARALLEL_CHUNK_BYTES"])
+        return DEFAULT_CHUNK_BYTES
+
+    def run(self, directory: Path, files: Optional[Iterable[Path]] = None, finalize: bool = True,
+            context: Optional[Iterable[Path]] = None) -> List[FileAnalysis]:
+        """
+        Analyze ``files`` (default: every discovered file) and run the cross-file checks.
+
+        Cached results of the files in ``context`` also go into the cross-file
+        checks, so duplicates and uses in files that weren't re-analyzed still
+        count; see ``replay_cross_file``.
+        """
+        directory, files = self._prepare(directory, files)
+        if self.workers > 1 and len(files) >= self.PARALLEL_THRESHOLD:
+            analyses = self._run_parallel(directory, files)
+        else:
+            analyses = [self.analyze_file(file_path) for file_path in files]
+
+        if finalize and self.code_analyzer is not None:
+            self.replay_cross_file(context or ())
+            self.code_analyzer.finalize(cache=self.cache)
+        return analyses
+
+    def iter_run(self, directory: Path, files: Optional[Iterable[Path]] = None,
+                 finalize: bool = True, context: Optional[Iterable[Path]] = None) -> Iterator[FileAnalysis]:
+        """
+        Like ``run``, but yield each file's analysis as soon as it is reduced.
+
+        Files are yielded in completion order rather than discovery order, and
+        nothing is kept after it has been yielded, so memory stays flat on
+        large trees. With workers, at most ``workers * 2`` chunks are in
+        flight at once. Cross-file issues, including the cached results of
+        ``context``, are added when the generator is exhausted.
+        """
+        directory, files = self._prepare(directory, files)
+        if self.workers > 1 and len(files) >= self.PARALLEL_THRESHOLD:
+            yield from self._iter_parallel(directory, files)
+        else:
+            for file_path in files:
+                yield self.analyze_file(file_path)
+
+        if finalize and self.code_analyzer is not None:
+            self.replay_cross_file(context or ())
+            self.code_analyzer.finalize(cache=self.cache)
+
+    def replay_cross_file(self, files: Iterable[Path]) -> int:
+        """
+        Feed the cached results of ``files`` to the code analyzer's cross-file
+        checks only; their per-file issues are not reported. Files without a
+        cache entry covering them are skipped. Returns the number replayed.
+        """
+        if self.cache is None or self.code_analyzer is None:
+            return 0
+        replayed = 0
+        for file_path in files:
+            file_path = Path(file_path)
+            entry = self._lookup(file_path).entry
+            if entry is not None and "quality" in entry:
+                self.code_analyzer.merge_cross_file(entry["quality"], file_path)
+                replayed += 1
+        return replayed
+
+    def _prepare(self, directory: Path, files: Optional[Iterable[Path]]):
+        directory = Path(directory)
+        discovered = files is None
+        if discovered:
+            discovery = discover(directory)
+            files = discovery.files
+            self._stats = discovery.stats
+        files = [Path(file_path) for file_path in files]
+        if self.dependency_analyzer is not None:
+            module_index = ModuleIndex(directory, files)
+            self.dependency_analyzer.directory = directory
+            self.dependency_analyzer.module_index = module_index
+            if discovered:
+                # A re-run over the whole tree drops modules whose files are gone.
+                for module in [module for module in self.dependency_analyzer.module_imports if module not in module_index]:
+                    self.dependency_analyzer.forget_module(module)
+        return directory, files
+
+    def _iter_parallel(self, directory: Path, files: List[Path]) -> Iterator[FileAnalysis]:
+        chunks = deque(size_chunks(
+            [(index, self._file_size(file_path, _Lookup())) for index, file_path in enumerate(files)],
+            self.chunk_bytes,
+        ))
+        max_in_flight = self.workers * 2
+        in_flight = {}
+        initargs = (directory, self._dependency_spec(), self._code_spec())
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=initargs) as executor:
+            while chunks or in_flight:
+                while chunks and len(in_flight) < max_in_flight:
+                    tasks = []
+                    for index in chunks.popleft():
+                        lookup = self._lookup(files[index])
+                        if lookup.entry is not None:
+                            yield self.reduce_file(files[index], lookup.entry)
+                        else:
+                            tasks.append((index, lookup))
+                    if tasks:
+                        future = executor.submit(_map_chunk, [(index, files[index], lookup.raw) for index, lookup in tasks])
+                        for _, lookup in tasks:
+                            lookup.raw = None
+                        in_flight[future] = tasks
+                if not in_flight:
+                    continue
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    mapped = dict(future.result())
+                    for index, lookup in in_flight.pop(future):
+                        yield self._finish(files[index], lookup, mapped[index])
+
+    def analyze_file(self, file_path: Path) -> FileAnalysis:
+        """Run one file through the attached analyzers, without the cross-file checks."""
+        lookup = self._lookup(file_path)
+        if lookup.entry is not None:
+            return self.reduce_file(file_path, lookup.entry)
+        return self._finish(file_path, lookup, self.map_file(file_path, lookup.raw))
+
+    def _run_parallel(self, directory: Path, files: List[Path]) -> List[FileAnalysis]:
+        lookups = [self._lookup(file_path) for file_path in files]
+        pending = [index for index, lookup in enumerate(lookups) if lookup.entry is None]
+        if len(pending) < self.PARALLEL_THRESHOLD:
+            return [self._complete(file_path, lookup) for file_path, lookup in zip(files, lookups)]
+
+        chunks = size_chunks(
+            [(index, self._file_size(files[index], lookups[index])) for index in pending],
+            self.chunk_bytes,
+        )
+        mapped = {}
+        analyses = []
+        initargs = (directory, self._dependency_spec(), self._code_spec())
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=initargs) as executor:
+            futures = [
+                executor.submit(_map_chunk, [(index, files[index], lookups[index].raw) for index in chunk])
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                mapped.update(future.result())
+                # Reduce in file order so the merged results don't depend on scheduling.
+                while len(analyses) < len(files):
+                    index = len(analyses)
+                    lookup = lookups[index]
+                    if lookup.entry is None and index not in mapped:
+                        break
+                    analyses.append(self._complete(files[index], lookup, mapped.pop(index, None)))
+        return analyses
+
+    def _complete(self, file_path: Path, lookup: "_Lookup", results: Dict = None) -> FileAnalysis:
+        if lookup.entry is not None:
+            return self.reduce_file(file_path, lookup.entry)
+        if results is None:
+            results = self.map_file(file_path, lookup.raw)
+        return self._finish(file_path, lookup, results)
+
+    def _file_size(self, file_path: Path, lookup: "_Lookup") -> int:
+        if lookup.raw is not None:
+            return len(lookup.raw)
+        if lookup.stat is not None:
+            return lookup.stat.st_size
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return 0
+
+    def _dependency_spec(self):
+        if self.dependency_analyzer is None:
+            return None
+        return (type(self.dependency_analyzer), self.dependency_analyzer.config)
+
+    def _code_spec(self):
+        if self.code_analyzer is None:
+            return None
+        return (type(self.code_analyzer), self.code_analyzer.config, self.code_analyzer.show_params)
+
+    def map_file(self, file_path: Path, raw: bytes = None) -> Dict:
+        """
+        Analyze one file without changing any analyzer state.
+
+        The result holds everything ``reduce_file`` needs. Read and parse
+        failures are returned under ``errors`` rather than raised.
+        """
+        results = {"source_path": str(file_path), "lines": 0, "errors": []}
+        parsed = self._parse(file_path, raw, results["errors"])
+        if parsed is None:
+            return results
+
+        results["lines"] = count_lines(parsed)
+        if self.dependency_analyzer is not None:
+            result = self.dependency_analyzer.analyze_parsed(parsed)
+            if result:
+                result = {**result, "imports": sorted(result["imports"])}
+            results["dependencies"] = result
+        if self.code_analyzer is not None:
+            results["quality"] = self.code_analyzer.collect_parsed(parsed)
+        return results
+
+    def reduce_file(self, file_path: Path, results: Dict) -> FileAnalysis:
+        """Merge a result from ``map_file`` or the cache into the attached analyzers."""
+        for category, description in results.get("errors", ()):
+            self._report(category, description, file_path)
+        if self.dependency_analyzer is not None and results.get("dependencies"):
+            self.dependency_analyzer.module_index.add(file_path)
+            self.dependency_analyzer.merge_result(results["dependencies"])
+        elements = []
+        if self.code_analyzer is not None and "quality" in results:
+            elements = self.code_analyzer.merge_cached(results["quality"], file_path)
+        return FileAnalysis(path=str(file_path), lines=results["lines"], elements=elements)
+
+    def _finish(self, file_path: Path, lookup: "_Lookup", results: Dict) -> FileAnalysis:
+        if self.cache is not None and lookup.content_hash is not None and not results["errors"]:
+            self.cache.put(file_path, lookup.content_hash, {k: v for k, v in results.items() if k != "errors"}, lookup.stat)
+        return self.reduce_file(file_path, results)
+
+    def _lookup(self, file_path: Path) -> "_Lookup":
+        """Find a usable cache entry, reading the file only when its stat doesn't match."""
+        lookup = _Lookup()
+        if self.cache is None:
+            return lookup
+        lookup.stat = self._stats.pop(file_path, None)
+        if lookup.stat is None:
+            try:
+                lookup.stat = os.stat(file_path)
+            except OSError:
+                lookup.stat = None
+        entry = self.cache.lookup(file_path, lookup.stat) if lookup.stat is not None else None
+        if entry is None:
+            try:
+                lookup.raw = self._read_bytes(file_path)
+            except OSError:
+                return lookup
+            lookup.content_hash = hash_bytes(lookup.raw)
+            entry = self.cache.get(file_path, lookup.content_hash)
+        if entry is not None and self._covers(entry, file_path):
+            self.cache.hits += 1
+            lookup.entry = entry
+            return lookup
+        self.cache.misses += 1
+        lookup.content_hash = lookup.content_hash or entry["hash"]
+        return lookup
+
+    def _covers(self, entry: Dict, file_path: Path) -> bool:
+        # Cached issues and locations embed the path as it was given, so a
+        # differently spelled path to the same file is treated as a miss.
+        if entry.get("source_path") != str(file_path):
+            return False
+        if self.dependency_analyzer is not None and "dependencies" not in entry:
+            return False
+        if self.code_analyzer is not None and "quality" not in entry:
+            return False
+        return "lines" in entry
+
+    def _report(self, category: str, description: str, file_path: Path):
+        if self.code_analyzer is not None:
+            self.code_analyzer._add_issue(category, description, str(file_path))
+
+    def _read_bytes(self, file_path: Path) -> bytes:
+        with open(file_path, "rb") as f:
+            return f.read()
+
+    def _parse(self, file_path: Path, raw: bytes = None, errors: List = None) -> Optional[ParsedFile]:
+        if errors is None:
+            errors = []
+        try:
+            if raw is None:
+                raw = self._read_bytes(file_path)
+            source = decode_source(raw)
+        except (OSError, UnicodeDecodeError) as e:
+            errors.append(("file", f"Could not read file: {str(e)}"))
+            return None
+        try:
+            return ParsedFile.from_source(source, file_path)
+        except (SyntaxError, ValueError) as e:
+            errors.append(("parsing", f"Could not parse content: {str(e)}"))
+        return None
+
+
+@dataclass
+class _Lookup:
+    stat: Optional[os.stat_result] = None
+    raw: Optional[bytes] = None
+    content_hash: Optional[str] = None
+    entry: Optional[Dict] = None
@@ -0,0 +1,116 @@
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import Iterable, List, Set
+
+from treeline.ignore import IgnoreMatcher
+from treeline.discovery import discover_python_files
+from treeline.pipeline import AnalysisPipeline
+
+
+class GitError(Exception):
+    """Raised when the changed files can't be determined from git."""
+
+
+def _git(directory: Path, *args: str) -> List[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "-C", str(directory), *args],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except FileNotFoundError:
+        raise GitError("git executable not found")
+    except subprocess.CalledProcessError as e:
+        raise GitError(e.stderr.strip() or f"git {' '.join(args)} failed")
+    return [line for line in completed.stdout.splitlines() if line]
+
+
+def git_changed_files(directory: Path, rev: str) -> List[Path]:
+    """
+    Python files under ``directory`` that differ from ``rev``.
+
+    Covers committed and uncommitted changes to tracked files plus untracked,
+    non-ignored files. Deleted files are included so their importers are still
+    picked up. Paths are spelled relative to ``directory`` the same way
+    ``discover_python_files`` spells them.
+    """
+    directory = Path(directory)
+    root = Path(_git(directory, "rev-parse", "--show-toplevel")[0])
+    names = _git(directory, "diff", "--name-only", "--no-renames", rev, "--")
+    names += _git(directory, "ls-files", "--others", "--exclude-standard", "--full-name")
+
+    base = directory.resolve()
+    ignore = IgnoreMatcher(directory)
+    changed = []
+    for name in sorted(set(names)):
+        if not name.endswith(".py"):
+            continue
+        try:
+            relative = (root / name).resolve().relative_to(base)
+        except ValueError:
+            continue
+        file_path = directory / relative
+        if not ignore.is_ignored(file_path):
+            changed.append(file_path)
+    return changed
+
+
+def importers_closure(dependency_analyzer, modules: Iterable[str]) -> Set[str]:
+    """
+    ``modules`` plus every module that imports one of them, directly or transitively.
+
+    Importers come from ``dependency_analyzer``'s importer index, which keys
+    imports by the module they resolve to. Deleted modules are no longer in
+    the module index, so their importers are found by spelling instead.
+    """
+    selected = set(modules)
+    queue = deque(selected)
+    while queue:
+        module = queue.popleft()
+        importers = dependency_analyzer.importers_of(module)
+        if module not in dependency_analyzer.module_index:
+            importers = importers | _importers_by_spelling(dependency_analyzer, module)
+        for importer in importers:
+            if importer not in selected:
+                selected.add(importer)
+                queue.append(importer)
+    return selected
+
+
+def _importers_by_spelling(dependency_analyzer, module: str) -> Set[str]:
+    if module.endswith(".__init__"):
+        module = module[:-len(".__init__")]
+    spellings = (module, f"{dependency_analyzer.module_index.package}.{module}")
+    return {
+        importer
+        for importer, names in dependency_analyzer.module_imports.items()
+        if importer != module and any(
+            name == spelling or name.startswith(spelling + ".") for name in names for spelling in spellings
+        )
+    }
+
+
+def select_since(directory: Path, rev: str, dependency_analyzer, cache=None) -> List[Path]:
+    """
+    Files changed since ``rev`` together with the files that depend on them.
+
+    ``dependency_analyzer`` is run over the whole tree to get the import graph;
+    with ``cache`` the unchanged files are replayed rather than parsed. Deleted
+    files are not returned, but the files importing them are.
+    """
+    directory = Path(directory)
+    changed = git_changed_files(directory, rev)
+    files = discover_python_files(directory)
+    AnalysisPipeline(dependency_analyzer, cache=cache).run(directory, files)
+
+    changed_modules = {dependency_analyzer.module_name_for(file_path) for file_path in changed}
+    selected = importers_closure(dependency_analyzer, changed_modules)
+    return [file_path for file_path in files if dependency_analyzer.module_name_for(file_path) in selected]
+
+
+def unselected_files(directory: Path, selected: Iterable[Path]) -> List[Path]:
+    """The discovered files not in ``selected``, whose cached results still feed cross-file checks."""
+    selected = set(selected)
+    return [file_path for file_path in discover_python_files(directory) if file_path not in selected]
@@ -3,9 +3,16 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict
 
+from treeline.config_manager import get_config
+from treeline.discovery import discover_python_files
+from treeline.optimization.graph import CSRGraph, GraphBuilder, cyclic_components, simple_cycles
+from treeline.optimization.reachability import ReachabilityIndex
+
 class ReportGenerator:
-    def __init__(self, target_dir: Path, output_dir: Path = None):
+    def __init__(self, target_dir: Path, output_dir: Path = None, cache=None, since: str = None):
         self.target_dir = target_dir
+        self.cache = cache
+        self.since = since
         self.output_dir = output_dir or Path("treeline_reports")
         self.output_dir.mkdir(exist_ok=True)
 
@@ -33,30 +40,49 @@ class ReportGenerator:
         self.function_usage = defaultdict(set)
 
     def analyze(self):
-        
-        self.enhanced_analyzer.analyze_directory(self.target_dir)
+        selected = None
+        if self.since:
+            from treeline.since import select_since, unselected_files
+
+            selected = select_since(self.target_dir, self.since, self.dependency_analyzer, cache=self.cache)
+            self.enhanced_analyzer.analyze_directory(
+                self.target_dir,
+                cache=self.cache,
+                files=selected,
+                context=unselected_files(self.target_dir, selected),
+            )
+        else:
+            self.enhanced_analyzer.analyze_directory(
+                self.target_dir,
+                dependency_analyzer=self.dependency_analyzer,
+                cache=self.cache,
+            )
 
         self.all_file_results = {}
         self.total_lines = 0
         self.file_line_counts = {} 
 
-        for py_file in self.target_dir.rglob("*.py"):
+        for py_file in selected if selected is not None else discover_python_files(self.target_dir):
             if not self._should_analyze_file(py_file):
                 continue
             self.analyzed_files.append(py_file)
             try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    line_count = len(lines)
-                    self.file_line_counts[str(py_file)] = line_count
-                    self.total_lines += line_count
+                analysis = self.enhanced_analyzer.file_analyses.get(str(py_file))
+                if analysis is not None:
+                    line_count = analysis.lines
+                    file_results = analysis.elements
+                else:
+                    with open(py_file, 'r', encoding='utf-8') as f:
+                        line_count = len(f.readlines())
+                    file_results = self.enhanced_analyzer.analyze_file(py_file)
+                self.file_line_counts[str(py_file)] = line_count
+                self.total_lines += line_count
 
-                file_results = self.enhanced_analyzer.analyze_file(py_file)
                 self.all_file_results[str(py_file)] = file_results
                 for result in file_results:
                     if result["type"] == "function":
                         func_name = result["name"]
-                        module_name = str(py_file.relative_to(self.target_dir)).replace('/', '.').replace('\\', '.').replace('.py', '')
+                        module_name = self.dependency_analyzer.module_name_for(py_file)
                         full_name = f"{module_name}.{func_name}"
                         self.function_docstrings[full_name] = {
                             "has_docstring": result["docstring"] is not None,
@@ -81,8 +107,6 @@ class ReportGenerator:
                     })
                     self.code_smells_by_category[category].append(issue)
 
-        self.dependency_analyzer.analyze_directory(self.target_dir)
-        
         self.function_dependencies = self._collect_function_dependencies()
         self.functions_by_complexity = self._collect_complex_functions()
         self.entry_points = self.dependency_analyzer.get_entry_points()
@@ -98,59 +122,41 @@ class ReportGenerator:
 
     def detect_circular_dependencies(self):
         """Detect circular dependencies between functions and modules."""
-        circular_deps = {
-            "function_level": [],
-            "module_level": []
+        function_graph = self._freeze_adjacency({
+            func_name: [called["function"] for called in deps["calls"]]
+            for func_name, deps in self.function_dependencies.items()
+        })
+        module_graph = self._freeze_adjacency(self.dependency_analyzer.module_imports)
+        return {
+            "function_level": self._example_cycles(function_graph),
+            "module_level": self._example_cycles(module_graph),
+            "function_components": self._named_components(function_graph),
+            "module_components": self._named_components(module_graph),
         }
-        seen_cycles = set()
-        
-        for func_name in self.function_dependencies:
-            path = []
-            visited = set()
-            self._find_circular_path(func_name, func_name, path, visited, circular_deps["function_level"], seen_cycles)
-        
-        module_seen_cycles = set()
-        for module in self.dependency_analyzer.module_imports:
-            path = []
-            visited = set()
-            self._find_module_circular_path(module, module, path, visited, circular_deps["module_level"], module_seen_cycles)
-        
-        return circular_deps
-
-    def _find_circular_path(self, start, current, path, visited, results, seen_cycles):
-        """DFS to find circular dependencies between functions."""
-        path.append(current)
-        visited.add(current)
-        
-        if current in self.function_dependencies:
-            for called in self.function_dependencies[current]["calls"]:
-                called_func = called["function"]
-                if called_func == start and len(path) > 1:
-                    cycle = path.copy()
-                    cycle.append(start)
-                    edges = frozenset((cycle[i], cycle[i+1]) for i in range(len(cycle)-1))
-                    if edges not in seen_cycles:
-                        seen_cycles.add(edges)
-                        results.append(cycle)
-                elif called_func not in visited:
-                    self._find_circular_path(start, called_func, path.copy(), visited.copy(), results, seen_cycles)
-
-    def _find_module_circular_path(self, start, current, path, visited, results, seen_cycles):
-        """DFS to find circular dependencies between modules."""
-        path.append(current)
-        visited.add(current)
-        
-        if current in self.dependency_analyzer.module_imports:
-            for imported in self.dependency_analyzer.module_imports[current]:
-                if imported == start and len(path) > 1:
-                    cycle = path.copy()
-                    cycle.append(start)
-                    edges = frozenset((cycle[i], cycle[i+1]) for i in range(len(cycle)-1))
-                    if edges not in seen_cycles:
-                        seen_cycles.add(edges)
-                        results.append(cycle)
-                elif imported not in visited:
-                    self._find_module_circular_path(start, imported, path.copy(), visited.copy(), results, seen_cycles)
+
+    def _freeze_adjacency(self, adjacency) -> CSRGraph:
+        builder = GraphBuilder()
+        for node in adjacency:
+            builder.add_node(node)
+        for node, targets in adjacency.items():
+            for target in targets:
+                # Self-references (recursion) aren't reported as circular dependencies.
+                if target in adjacency and target != node:
+                    builder.add_edge(node, target)
+        return builder.freeze()
+
+    def _example_cycles(self, graph: CSRGraph):
+        """Up to MAX_CYCLES_REPORTED cycles of at most MAX_CYCLE_LENGTH nodes, closed back on their start."""
+        config = get_config()
+        cycles = simple_cycles(
+            graph,
+            max_cycles=config.get("MAX_CYCLES_REPORTED", 100),
+            max_length=config.get("MAX_CYCLE_LENGTH", 10) or None,
+        )
+        return [[graph.name_of(node) for node in cycle + cycle[:1]] for cycle in cycles]
+
+    def _named_components(self, graph: CSRGraph):
+        return [sorted(graph.name_of(node) for node in component) for component in cyclic_components(graph)]
 
     def _generate_circular_dependency_section(self):
         """Generate a section about circular dependencies for the report."""
@@ -166,6 +172,8 @@ class ReportGenerator:
             for i, cycle in enumerate(circular_deps["module_level"]):
                 sections.append(f"{i+1}. {' → '.join(cycle)}")
             sections.append(f"\nTotal module-level circular dependencies: {len(circular_deps['module_level'])}")
+            components = circular_deps["module_components"]
+            sections.append(f"Modules involved in cycles: {sum(len(c) for c in components)} across {len(components)} strongly connected components")
         else:
             sections.append("No module-level circular dependencies detected. Good job! 👍\n")
         
@@ -178,6 +186,8 @@ class ReportGenerator:
                 sections.append(f"\n...and {len(circular_deps['function_level']) - 10} more function-level circular dependencies.")
             
             sections.append(f"\nTotal function-level circular dependencies: {len(circular_deps['function_level'])}")
+            components = circular_deps["function_components"]
+            sections.append(f"Functions involved in cycles: {sum(len(c) for c in components)} across {len(components)} strongly connected components")
             
             sections.append("\n**Recommendations to resolve circular dependencies:**")
             sections.append("1. Identify shared functionality and extract it to a common module")
@@ -227,7 +237,7 @@ class ReportGenerator:
                         complexity = 0
                     
                     if complexity > 5:
-                        module_path = str(Path(file_path).relative_to(self.target_dir)).replace('/', '.').replace('\\', '.').replace('.py', '')
+                        module_path = self.dependency_analyzer.module_name_for(file_path)
                         complex_funcs.append({
                             "module": module_path,
                             "function": result["name"],
@@ -284,17 +294,11 @@ class ReportGenerator:
     def _module_to_file_path(self, module_name):
         if not module_name:
             return None
-            
-        for func_name, location in self.dependency_analyzer.function_locations.items():
-            if location.get("module") == module_name and "file" in location:
-                return location["file"]
-                
-        for mod, classes in self.dependency_analyzer.class_info.items():
-            if mod == module_name:
-                for class_name, info in classes.items():
-                    if "file" in info:
-                        return info["file"]
-        
+
+        file_path = self.dependency_analyzer.file_for_module(module_name)
+        if file_path:
+            return file_path
+
         try:
             module_parts = module_name.split(".")
             path = self.target_dir.joinpath(*module_parts).with_suffix(".py")
@@ -326,6 +330,8 @@ class ReportGenerator:
         sections.append(f"# Treeline Code Analysis Report\n")
         sections.append(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         sections.append(f"**Project:** {self.target_dir.absolute()}")
+        if self.since:
+            sections.append(f"**Scope:** files changed since `{self.since}` and their dependents")
         total_funcs = len(self.function_docstrings)
         categories = self.dependency_analyzer.categorize_functions() 
         sections.append(f"**Files Analyzed:** {len(self.analyzed_files)}")
@@ -428,8 +434,8 @@ class ReportGenerator:
 
         module_stability = []
         for module in self.dependency_analyzer.module_imports:
-            incoming = len([1 for imports in self.dependency_analyzer.module_imports.values() if module in imports])
-            outgoing = len(self.dependency_analyzer.module_imports[module])
+            incoming = self.dependency_analyzer.in_degree(module)
+            outgoing = self.dependency_analyzer.out_degree(module)
             total_deps = incoming + outgoing
             stability = incoming / total_deps if total_deps > 0 else 0.5
             
@@ -446,20 +452,16 @@ class ReportGenerator:
         sections.append("\n### Change Impact Analysis\n")
         sections.append("These modules would have the highest ripple effect if modified - changes here will impact many other parts of the codebase:\n")
 
+        reachability = ReachabilityIndex(self._freeze_adjacency(self.dependency_analyzer.module_imports))
         cascade_impact = []
         for module in self.dependency_analyzer.module_imports:
-            impact_count = 0
-            impacted = set()
-            for other_mod, imports in self.dependency_analyzer.module_imports.items():
-                if module in imports:
-                    impact_count += 1
-                    impacted.add(other_mod)
-            cascade_impact.append((module, impact_count, impacted))
-
-        for module, count, impacted in sorted(cascade_impact, key=lambda x: x[1], reverse=True)[:5]:
-            sections.append(f"- **{module}**: Would affect {count} modules")
-            if impacted:
-                sections.append(f" -> Most notable dependents: {', '.join(sorted(list(impacted))[:3])}")
+            impacted = reachability.ancestors(module) - {module}
+            cascade_impact.append((module, len(impacted), self.dependency_analyzer.importers_of(module)))
+
+        for module, count, direct in sorted(cascade_impact, key=lambda x: x[1], reverse=True)[:5]:
+            sections.append(f"- **{module}**: Would affect {count} modules ({len(direct)} directly)")
+            if direct:
+                sections.append(f" -> Most notable dependents: {', '.join(sorted(list(direct))[:3])}")
             if count > 3:
                 sections.append(f" -> Impact risk: {'High ⚠' if count > 7 else 'Medium'}")
         
@@ -870,6 +872,7 @@ class ReportGenerator:
             "metadata": {
                 "generated_at": datetime.now().isoformat(),
                 "project": str(self.target_dir.absolute()),
+                "since": self.since,
                 "files_analyzed": len(self.analyzed_files),
                 "issues_found": self.issues_count
             },
@@ -0,0 +1,305 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from treeline.dependency_analyzer import ModuleDependencyAnalyzer
+from treeline.discovery import discover, discover_python_files
+from treeline.enhanced_analyzer import EnhancedCodeAnalyzer
+from treeline.ignore import IgnoreMatcher
+from treeline.pipeline import AnalysisPipeline
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class RescanRequired(Exception):
+    """Raised by a watcher when it lost events and the whole tree must be re-checked."""
+
+
+class PollingWatcher:
+    """Detects changes by comparing ``(mtime, size)`` snapshots of every Python file."""
+
+    def __init__(self, directory: Path, interval: float = 1.0):
+        self.directory = Path(directory)
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Dict[Path, tuple]:
+        discovery = discover(self.directory, refresh=True)
+        return {path: (stat.st_mtime_ns, stat.st_size) for path, stat in discovery.stats.items()}
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._take_snapshot()
+            changed = {
+                path for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            sleep_for = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(sleep_for)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher using ``ctypes``; every non-ignored directory gets a watch."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.ignore = IgnoreMatcher(self.directory, use_gitignore=True)
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: Dict[int, Path] = {}
+        self._add_tree(self.directory)
+
+    def _add_watch(self, directory: Path) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            return False
+        self._watches[wd] = directory
+        return True
+
+    def _add_tree(self, root: Path) -> Set[Path]:
+        """Watch ``root`` and its subdirectories; returns the Python files already inside."""
+        found = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            current = Path(dirpath)
+            dirnames[:] = [d for d in dirnames if not self.ignore.prune(current / d)]
+            self._add_watch(current)
+            found.update(current / name for name in filenames if name.endswith(".py"))
+        return found
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                raise RescanRequired()
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            parent = self._watches.get(wd)
+            if parent is None or not name:
+                continue
+            path = parent / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.ignore.is_ignored(path, is_dir=True):
+                    changed.update(self._add_tree(path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    # Files below a removed directory produce no events of their own.
+                    raise RescanRequired()
+                continue
+            if path.suffix == ".py":
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(directory: Path, force_polling: bool = False, interval: float = 1.0):
+    """Return an inotify watcher where available, otherwise a polling one."""
+    if not force_polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory, interval=interval)
+
+
+@dataclass
+class ChangeSummary:
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    issues: Dict[str, List[Dict]] = field(default_factory=dict)
+    duplication: List[Dict] = field(default_factory=list)
+    cycles: List[List[str]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+class WatchSession:
+    """
+    Keeps both analyzers warm for a directory and patches them as files change.
+
+    Only changed files are re-analyzed. Duplicate groups that involve those
+    files are re-reported, and import cycles are recomputed only for the
+    strongly connected components containing changed modules.
+    """
+
+    def __init__(self, directory: Path, config: Dict = None, cache=None):
+        self.directory = Path(directory)
+        self.ignore = IgnoreMatcher(self.directory, use_gitignore=True)
+        self.dependency_analyzer = ModuleDependencyAnalyzer(config=config)
+        self.code_analyzer = EnhancedCodeAnalyzer(config=config)
+        self.pipeline = AnalysisPipeline(self.dependency_analyzer, self.code_analyzer, cache=cache)
+        self.files: Set[Path] = set()
+
+    def start(self):
+        files = discover_python_files(self.directory)
+        for analysis in self.pipeline.run(self.directory, files, finalize=False):
+            self.code_analyzer.file_analyses[analysis.path] = analysis
+        self.code_analyzer.finalize(keep_state=True, cache=self.pipeline.cache)
+        self.files = set(files)
+
+    def apply(self, paths: Iterable[Path]) -> ChangeSummary:
+        started = time.perf_counter()
+        summary = ChangeSummary()
+        affected_groups = set()
+        changed_modules = set()
+
+        for path in sorted(set(paths)):
+            if path.suffix != ".py" or self.ignore.is_ignored(path):
+                continue
+            if path in self.files:
+                affected_groups |= self.code_analyzer.forget_file(path)
+                self.dependency_analyzer.forget_file(path)
+            changed_modules.add(self.dependency_analyzer.module_name_for(path))
+
+            if not path.exists():
+                self.files.discard(path)
+                summary.removed.append(str(path))
+                continue
+
+            analysis = self.pipeline.analyze_file(path)
+            self.code_analyzer.file_analyses[analysis.path] = analysis
+            self.files.add(path)
+            affected_groups |= self.code_analyzer.duplication_detector.groups_for(str(path))
+            summary.changed.append(str(path))
+            summary.issues[str(path)] = self._issues_for(str(path))
+
+        if summary.changed or summary.removed:
+            self.code_analyzer.refresh_cross_file(affected_groups)
+            reported = self.code_analyzer.duplication_detector.reported
+            summary.duplication = [reported[key] for key in affected_groups if key in reported]
+        summary.cycles = module_cycles_through(self.dependency_analyzer.module_imports, changed_modules)
+        summary.elapsed = time.perf_counter() - started
+        return summary
+
+    def rescan(self) -> ChangeSummary:
+        """Re-check every known and discovered file; unchanged ones are cheap with a cache."""
+        return self.apply(self.files | set(discover_python_files(self.directory, refresh=True)))
+
+    def _issues_for(self, path_str: str) -> List[Dict]:
+        return [
+            {**issue, "category": category}
+            for category, issues in self.code_analyzer.quality_issues.items()
+            if category != "duplication"
+            for issue in issues
+            if isinstance(issue, dict) and issue.get("file_path") == path_str
+        ]
+
+
+def module_cycles_through(module_imports: Dict[str, Set[str]], modules: Iterable[str]) -> List[List[str]]:
+    """
+    Strongly connected import components that contain any of ``modules``.
+
+    Each component is found from one module by intersecting what it reaches
+    with what reaches it, searching only inside the forward-reachable part.
+    """
+    components = []
+    seen = set()
+    for module in sorted(modules):
+        if module in seen or module not in module_imports:
+            continue
+        reachable = _reachable(module_imports, module, nodes=module_imports)
+        if module not in reachable:
+            continue
+
+        reverse = defaultdict(set)
+        for node in reachable:
+            for target in module_imports.get(node, ()):
+                if target in reachable:
+                    reverse[target].add(node)
+        component = _reachable(reverse, module)
+        component.add(module)
+        seen |= component
+        components.append(sorted(component))
+    return components
+
+
+def _reachable(edges: Dict[str, Set[str]], start: str, nodes=None) -> Set[str]:
+    reached = set()
+    queue = deque(edges.get(start, ()))
+    while queue:
+        node = queue.popleft()
+        if node in reached or (nodes is not None and node not in nodes):
+            continue
+        reached.add(node)
+        queue.extend(edges.get(node, ()))
+    return reached
+
+
+def watch(directory: Path, session: WatchSession, on_change, debounce: float = 0.2,
+          force_polling: bool = False, interval: float = 1.0, stop=None):
+    """
+    Block and feed coalesced batches of changes through ``session``.
+
+    ``on_change(summary)`` is called once per batch; events that arrive within
+    ``debounce`` seconds of each other are merged into the same batch.
+    ``stop()`` is checked between batches so callers can end the loop.
+    """
+    watcher = create_watcher(directory, force_polling=force_polling, interval=interval)
+    try:
+        while stop is None or not stop():
+            try:
+                pending = watcher.poll(timeout=1.0)
+                if not pending:
+                    continue
+                while True:
+                    more = watcher.poll(timeout=debounce)
+                    if not more:
+                        break
+                    pending |= more
+                summary = session.apply(pending)
+            except RescanRequired:
+                summary = session.rescan()
+            if summary.changed or summary.removed:
+                on_change(summary)
+    finally:
+        watcher.close()